@@ -1,22 +1,35 @@
 """Arquivo principal da API do Soletrando."""
 import asyncio
 import json
-import queue
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 
-from game.gerenciador_jogo import GerenciadorJogo
+from config.settings import SESSAO_PADRAO, INTERVALO_EXPIRACAO_SEGUNDOS
+from game.eventos import EventoErro
+from game.sessoes import GerenciadorSessoes, LimiteSessoesAtingido
+from services.conexoes_ws import ConnectionManager
+from services.executor_reconhecimento import EXECUTOR_RECONHECIMENTO
+from services.metricas import REGISTRO_METRICAS, DURACAO_ETAPAS
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Inicia a tarefa de processamento da fila em segundo plano
+    # Inicia as tarefas de processamento de eventos e de expiração de sessões em segundo plano
+    sessoes.barramento.vincular_loop(asyncio.get_running_loop())
+    sessoes.catalogo.iniciar_monitoramento()
     task = asyncio.create_task(process_queue())
-    print("Servidor iniciado, processador de fila no ar.")
+    task_expiracao = asyncio.create_task(expirar_sessoes())
+    print("Servidor iniciado, processador de eventos no ar.")
     yield
-    # Lógica de encerramento (se necessário)
+    # Lógica de encerramento
     task.cancel()
+    task_expiracao.cancel()
     await task
+    await task_expiracao
+    await asyncio.to_thread(sessoes.encerrar_todas)
+    sessoes.catalogo.parar_monitoramento()
     print("Servidor encerrado.")
 
 
@@ -37,130 +50,214 @@ app.add_middleware(
 )
 
 # --- Gerenciador de Conexões WebSocket ---
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
+manager = ConnectionManager()
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# --- Registro de sessões: um Gerenciador do Jogo por sessão ---
+sessoes = GerenciadorSessoes()
+# Um jogo com clientes conectados não é descartado para abrir vaga a outra sessão
+sessoes.em_uso = manager.tem_clientes
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+@app.exception_handler(LimiteSessoesAtingido)
+async def limite_sessoes(request, erro: LimiteSessoesAtingido):
+    return JSONResponse(status_code=503, content={"status": "erro", "mensagem": str(erro)})
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+# --- Métricas (ver /metrics): além das durações por etapa, medidores lidos na coleta ---
+DURACAO_FILA_EVENTOS = DURACAO_ETAPAS.rotulado(etapa="fila_eventos")
 
-manager = ConnectionManager()
+def _por_ip(campo: str) -> list[tuple[dict, float]]:
+    return [({"ip": ip}, float(estado[campo])) for ip, estado in sessoes.pool_nao.estado().items()]
 
-# --- Singleton do Gerenciador do Jogo ---
-game_manager = GerenciadorJogo()
+REGISTRO_METRICAS.medidor(
+    "soletrando_clientes_websocket", "Clientes WebSocket conectados.", manager.total_conexoes
+)
+REGISTRO_METRICAS.medidor("soletrando_sessoes", "Sessões de jogo ativas.", lambda: len(sessoes))
+REGISTRO_METRICAS.medidor(
+    "soletrando_reconhecimentos_em_voo", "Segmentos de fala no executor de reconhecimento.",
+    lambda: EXECUTOR_RECONHECIMENTO.contadores()["em_voo"]
+)
+REGISTRO_METRICAS.medidor(
+    "soletrando_reconhecimentos_total", "Segmentos de fala por resultado no executor de reconhecimento.",
+    lambda: [({"resultado": chave}, valor) for chave, valor in EXECUTOR_RECONHECIMENTO.contadores().items()
+             if chave != "em_voo"],
+    tipo="counter"
+)
+REGISTRO_METRICAS.medidor("soletrando_nao_conexao_ativa", "Conexão com o robô ativa (1) ou caída (0).",
+                          lambda: _por_ip("ativa"))
+REGISTRO_METRICAS.medidor("soletrando_nao_sessoes", "Sessões que usam a conexão com o robô.",
+                          lambda: _por_ip("referencias"))
+REGISTRO_METRICAS.medidor("soletrando_nao_reconexoes_total", "Reconexões com o robô.",
+                          lambda: _por_ip("reconexoes"), tipo="counter")
+REGISTRO_METRICAS.medidor(
+    "soletrando_historico_tentativas_total", "Tentativas gravadas e descartadas pelo histórico.",
+    lambda: [({"resultado": "gravadas"}, sessoes.historico.gravadas),
+             ({"resultado": "descartadas"}, sessoes.historico.descartadas)],
+    tipo="counter"
+)
 
 # --- WebSocket para atualizações em tempo real ---
 @app.websocket("/ws/game")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+async def websocket_endpoint(websocket: WebSocket, sessao: str = SESSAO_PADRAO):
+    cliente = await manager.connect(websocket, sessao, sessoes.obter_estado(sessao))
     try:
         while True:
-            # Apenas para manter a conexão viva
-            await websocket.receive_text()
+            # O cliente só envia pedidos de ressincronização: {"tipo": "resync", "seq": n}
+            texto = await websocket.receive_text()
+            try:
+                mensagem = json.loads(texto)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(mensagem, dict) and mensagem.get("tipo") == "resync":
+                seq = mensagem.get("seq")
+                manager.ressincronizar(cliente, seq if isinstance(seq, int) else -1)
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
         print("Cliente WebSocket desconectado")
+    finally:
+        manager.disconnect(websocket, sessao)
 
-async def broadcast_state():
-    """Esta função será chamada para enviar o estado atual para todos os clientes"""
-    state = game_manager.obter_estado()
-    await manager.broadcast(json.dumps(state))
+async def broadcast_state(sessao: str):
+    """Esta função será chamada para enviar as mudanças de estado para os clientes da sessão"""
+    if not manager.tem_clientes(sessao):
+        return
+    jogo = sessoes.procurar(sessao)
+    if jogo is None:
+        return
+    await manager.publicar_estado(sessao, jogo.obter_estado())
 
 async def process_queue():
+    """Consome o barramento de eventos, enviando um único estado por sessão a cada lote."""
     while True:
         try:
-            # Usamos to_thread para não bloquear o event loop
-            soletracao = await asyncio.to_thread(game_manager.queue.get)
-            await broadcast_state()
-            game_manager.queue.task_done()
+            lote = await sessoes.barramento.proximo_lote()
+            for sessao, eventos in lote.items():
+                # A sessão pode ter expirado enquanto o evento esperava
+                if not sessoes.existe(sessao):
+                    continue
+                agora = time.perf_counter()
+                for evento in eventos:
+                    DURACAO_FILA_EVENTOS.observar(agora - evento.criado)
+                    if isinstance(evento, EventoErro):
+                        print(f"Erro na sessão '{sessao}': {evento.mensagem}")
+                await broadcast_state(sessao)
+        except asyncio.CancelledError:
+            print("Processador de eventos cancelado.")
+            break
+        except Exception as e:
+            print(f"Erro no processador de eventos: {e}")
+
+async def expirar_sessoes():
+    """Descarta periodicamente as sessões inativas."""
+    while True:
+        try:
+            await asyncio.sleep(INTERVALO_EXPIRACAO_SEGUNDOS)
+            expiradas = await asyncio.to_thread(sessoes.expirar_inativas)
+            if expiradas:
+                print(f"Sessões expiradas: {', '.join(expiradas)}")
         except asyncio.CancelledError:
-            print("Processador de fila cancelado.")
             break
-        except queue.Empty:
-            await asyncio.sleep(0.1)
 
 
 # --- Endpoints da API ---
+# As ações que podem falar com o NAO ou esperar threads de escuta rodam em
+# asyncio.to_thread, para não travar o event loop dos demais clientes.
 
 @app.post("/game/start", tags=["Game"])
-async def start_game():
-    response = game_manager.iniciar_jogo()
-    await broadcast_state()
+async def start_game(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).iniciar_jogo)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/next-round", tags=["Game"])
-async def next_round():
-    response = game_manager.iniciar_nova_rodada()
-    await broadcast_state()
+async def next_round(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).iniciar_nova_rodada)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/spell", tags=["Game"])
-async def spell(device: str | int | None = None):
-    # A atualização aqui é feita pela queue no _adicionar_letra
-    return game_manager.iniciar_soletracao(device)
+async def spell(device: str | int | None = None, sessao: str = SESSAO_PADRAO):
+    # A atualização aqui é feita pelo barramento de eventos no _adicionar_letra
+    return await asyncio.to_thread(sessoes.obter(sessao).iniciar_soletracao, device)
 
 @app.post("/game/stop-spelling", tags=["Game"])
-async def stop_spelling():
-    response = game_manager.parar_escuta_voz()
-    await broadcast_state()
+async def stop_spelling(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).parar_escuta_voz)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/check", tags=["Game"])
-async def check_spelling():
-    response = game_manager.verificar_soletracao()
-    await broadcast_state()
+async def check_spelling(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).verificar_soletracao)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/backspace", tags=["Game"])
-async def backspace():
-    response = game_manager.apagar_ultima_letra()
-    await broadcast_state()
+async def backspace(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).apagar_ultima_letra)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/level", tags=["Game"])
-async def set_level(level: str):
-    response = game_manager.definir_nivel(level)
-    await broadcast_state()
+async def set_level(level: str, length: int | None = None, syllables: int | None = None,
+                    digraph: str | None = None, sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).definir_nivel, level, length, syllables, digraph)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/mic-source", tags=["Game"])
-async def set_mic_source(source: str):
-    response = game_manager.definir_fonte_microfone(source)
-    await broadcast_state()
+async def set_mic_source(source: str, sessao: str = SESSAO_PADRAO):
+    response = sessoes.obter(sessao).definir_fonte_microfone(source)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/game/audio-output", tags=["Game"])
-async def set_audio_output(output: str):
-    response = game_manager.definir_saida_audio(output)
-    await broadcast_state()
+async def set_audio_output(output: str, sessao: str = SESSAO_PADRAO):
+    response = sessoes.obter(sessao).definir_saida_audio(output)
+    await broadcast_state(sessao)
+    return response
+
+@app.post("/game/student", tags=["Game"])
+async def set_student(name: str, sessao: str = SESSAO_PADRAO):
+    response = sessoes.obter(sessao).definir_aluno(name)
+    await broadcast_state(sessao)
     return response
 
 @app.get("/game/state", tags=["Game"])
-async def get_state():
-    return game_manager.obter_estado()
+async def get_state(sessao: str = SESSAO_PADRAO):
+    return sessoes.obter_estado(sessao)
 
 # --- Endpoints do NAO ---
 
 @app.post("/nao/connect", tags=["NAO"])
-async def connect_nao(ip: str):
-    response = game_manager.conectar_nao(ip)
-    await broadcast_state()
+async def connect_nao(ip: str, sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).conectar_nao, ip)
+    await broadcast_state(sessao)
     return response
 
 @app.post("/nao/disconnect", tags=["NAO"])
-async def disconnect_nao():
-    response = game_manager.desconectar_nao()
-    await broadcast_state()
+async def disconnect_nao(sessao: str = SESSAO_PADRAO):
+    response = await asyncio.to_thread(sessoes.obter(sessao).desconectar_nao)
+    await broadcast_state(sessao)
     return response
 
+# --- Estatísticas para o painel da turma (lidas do histórico de tentativas) ---
+
+@app.get("/stats/students", tags=["Stats"])
+async def student_error_rates(level: str | None = None):
+    return await asyncio.to_thread(sessoes.historico.taxa_erros_por_aluno, level)
+
+@app.get("/stats/words", tags=["Stats"])
+async def word_error_rates(level: str | None = None, student: str | None = None, limit: int = 20):
+    return await asyncio.to_thread(sessoes.historico.taxa_erros_por_palavra, level, student, limit)
+
+@app.get("/stats/students/{student}/attempts", tags=["Stats"])
+async def student_attempts(student: str, limit: int = 50):
+    return await asyncio.to_thread(sessoes.historico.tentativas_do_aluno, student, limit)
+
+# --- Métricas no formato de texto do Prometheus ---
+
+@app.get("/metrics", tags=["Metrics"], response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(REGISTRO_METRICAS.exportar(), media_type="text/plain; version=0.0.4")
+
 # --- Para executar a API localmente ---
 if __name__ == "__main__":
     import uvicorn
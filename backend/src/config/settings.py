@@ -6,6 +6,19 @@ DIRETORIO_SCRIPT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 # Configurações do NAO
 PORTA_NAO = 9559
+# Conectar a este IP usa o NAO simulado em processo (services.simulador_nao),
+# com esta latência por chamada e soletrando esta palavra no ALAudioDevice
+IP_NAO_SIMULADO = "simulado"
+LATENCIA_NAO_SIMULADO_S = float(os.environ.get("SOLETRANDO_LATENCIA_NAO_SIMULADO", "0.02"))
+PALAVRA_NAO_SIMULADO = os.environ.get("SOLETRANDO_PALAVRA_NAO_SIMULADO", "")
+# Heartbeat das conexões com os robôs e backoff das tentativas de reconexão
+INTERVALO_HEARTBEAT_NAO_S = 2.0
+TIMEOUT_HEARTBEAT_NAO_S = 1.0
+BACKOFF_INICIAL_NAO_S = 1.0
+BACKOFF_MAXIMO_NAO_S = 30.0
+# Falas pré-renderizadas no disco do robô (sayToFile), tocadas pelo ALAudioPlayer
+CACHE_FALAS_NAO = True
+DIRETORIO_CACHE_FALAS_NAO = "/home/nao/.cache/soletrando/falas"
 
 # Caminhos
 CAMINHO_LISTAS_PALAVRAS = os.path.join(DIRETORIO_SCRIPT, "word_lists")
@@ -13,3 +26,52 @@ CAMINHO_DADOS = os.path.join(DIRETORIO_SCRIPT, "data")
 
 # Arquivos
 ARQUIVO_MAPA_LETRAS = os.path.join(CAMINHO_DADOS, "letter_map.json")
+
+# Catálogo de palavras: de quanto em quanto tempo procurar listas alteradas em word_lists/
+INTERVALO_RECARGA_PALAVRAS_S = 2.0
+# Seleção adaptativa: o sorteio favorece as palavras que o aluno mais erra ou demora
+# a soletrar (ver game.selecao_palavras). False volta ao sorteio uniforme
+SELECAO_ADAPTATIVA_PALAVRAS = True
+PESO_ERRO_PALAVRA = 3.0
+PESO_LENTIDAO_PALAVRA = 1.0
+SEGUNDOS_POR_LETRA_REFERENCIA = 1.5
+PESO_MINIMO_PALAVRA = 0.05
+
+# Reconhecimento de voz
+# "google" (online) ou "vosk" (offline, restrito ao vocabulário do letter_map.json)
+MOTOR_RECONHECIMENTO = os.environ.get("SOLETRANDO_MOTOR_RECONHECIMENTO", "google")
+IDIOMA_RECONHECIMENTO = "pt-BR"
+CAMINHO_MODELO_VOSK = os.environ.get(
+    "SOLETRANDO_MODELO_VOSK", os.path.join(DIRETORIO_SCRIPT, "models", "vosk-model-small-pt-0.3")
+)
+# Captura contínua com VAD no microfone do PC (False volta ao Recognizer.listen)
+CAPTURA_STREAMING_PC = True
+# Executor de reconhecimento compartilhado por todas as capturas e sessões
+WORKERS_RECONHECIMENTO = 8
+# Segmentos esperando reconhecimento por captura (acima disso, o novo é descartado)
+MAX_RECONHECIMENTOS_EM_VOO = 8
+# Um segmento sem resposta nesse tempo é abandonado, para não atrasar as letras seguintes
+TIMEOUT_RECONHECIMENTO_S = 10.0
+# Uso dos 4 microfones do NAO no modo híbrido: "referencia" (feixe de bloqueio como
+# referência de ruído do microfone do PC), "principal" (o próprio feixe do NAO como
+# sinal) ou "desligado" (só o primeiro canal, como referência)
+MODO_BEAMFORMING_NAO = "referencia"
+# Diretório onde gravar o áudio bruto de cada captura, para replay (vazio: não grava)
+DIRETORIO_GRAVACAO_AUDIO = os.environ.get("SOLETRANDO_GRAVAR_AUDIO", "")
+
+# Sessões de jogo
+SESSAO_PADRAO = "padrao"
+MAX_SESSOES = 500
+TTL_SESSAO_SEGUNDOS = 30 * 60
+INTERVALO_EXPIRACAO_SEGUNDOS = 60
+
+# Histórico de tentativas (SQLite): gravado em lotes por uma thread
+ARQUIVO_HISTORICO = os.environ.get("SOLETRANDO_HISTORICO", os.path.join(CAMINHO_DADOS, "historico.db"))
+TAMANHO_LOTE_HISTORICO = 256
+INTERVALO_LOTE_HISTORICO_S = 0.5
+MAX_TENTATIVAS_PENDENTES = 10_000
+
+# WebSocket
+TAMANHO_FILA_WS = 8
+TIMEOUT_ENVIO_WS = 5.0
+HISTORICO_DELTAS_WS = 64
@@ -0,0 +1,241 @@
+"""Módulo do catálogo de palavras: todas as listas em memória, indexadas e recarregadas quando mudam."""
+import os
+import random
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+import numpy as np
+
+from config.settings import CAMINHO_LISTAS_PALAVRAS, INTERVALO_RECARGA_PALAVRAS_S
+
+# Dificuldades ortográficas indexadas (ç e os dígrafos que mais confundem na soletração)
+DIGRAFOS = ("ç", "lh", "nh", "rr", "ss")
+VOGAIS = set("aeiouáéíóúâêôãõàü")
+# Encontros vocálicos que formam uma sílaba só (ditongos decrescentes e nasais)
+DITONGOS = {"ai", "au", "ei", "eu", "iu", "oi", "ou", "ui", "ão", "ãe", "õe", "ao", "ae"}
+
+
+def normalizar_nivel(nivel: str) -> str:
+    """Nome do nível como o nome do arquivo. Ex: "1º Ano" -> "1_ano"."""
+    return nivel.lower().replace('º ', '_')
+
+
+def contar_silabas(palavra: str) -> int:
+    """
+    Número aproximado de sílabas: um núcleo por grupo de vogais, dividindo os
+    hiatos e ignorando o "u" mudo de "qu"/"gu".
+    """
+    silabas, anterior = 0, ""
+    for i, letra in enumerate(palavra):
+        if letra not in VOGAIS:
+            anterior = ""
+            continue
+        if letra == "u" and i > 0 and palavra[i - 1] in "qg" and i + 1 < len(palavra) and palavra[i + 1] in VOGAIS:
+            continue
+        if not anterior or anterior + letra not in DITONGOS:
+            silabas += 1
+        anterior = letra
+    return max(silabas, 1)
+
+
+def _agrupar(chaves: np.ndarray) -> dict[int, np.ndarray]:
+    """Índices das palavras (em ordem) para cada valor de `chaves`."""
+    ordem = np.argsort(chaves, kind="stable")
+    valores, inicios = np.unique(chaves[ordem], return_index=True)
+    return {int(v): grupo.astype(np.int32) for v, grupo in zip(valores, np.split(ordem, inicios[1:]))}
+
+
+@dataclass(frozen=True)
+class ListaNivel:
+    """
+    As palavras de um nível e seus índices. Imutável: uma recarga cria outra
+    lista, e quem já tem esta continua com uma visão consistente.
+    """
+    nivel: str
+    palavras: tuple[str, ...]
+    versao: tuple[int, int]
+    por_tamanho: dict[int, np.ndarray] = field(repr=False)
+    por_silabas: dict[int, np.ndarray] = field(repr=False)
+    por_digrafo: dict[str, np.ndarray] = field(repr=False)
+
+    @classmethod
+    def de_arquivo(cls, nivel: str, caminho: str) -> "ListaNivel":
+        estado = os.stat(caminho)
+        with open(caminho, 'r', encoding='utf-8') as f:
+            palavras = tuple(linha.strip().lower() for linha in f if linha.strip())
+        tamanhos = np.fromiter((len(p) for p in palavras), dtype=np.int32, count=len(palavras))
+        silabas = np.fromiter((contar_silabas(p) for p in palavras), dtype=np.int32, count=len(palavras))
+        por_digrafo = {
+            digrafo: np.fromiter((i for i, p in enumerate(palavras) if digrafo in p), dtype=np.int32)
+            for digrafo in DIGRAFOS
+        }
+        return cls(nivel, palavras, (estado.st_mtime_ns, estado.st_size),
+                   _agrupar(tamanhos), _agrupar(silabas), por_digrafo)
+
+    def __len__(self):
+        return len(self.palavras)
+
+    @cached_property
+    def posicoes(self) -> dict[str, int]:
+        """Índice de cada palavra na lista (montado só quando usado, pela seleção adaptativa)."""
+        return {palavra: i for i, palavra in enumerate(self.palavras)}
+
+    def indices(self, tamanho: int | None = None, silabas: int | None = None, digrafo: str | None = None) -> np.ndarray:
+        """Índices (crescentes) das palavras que atendem a todos os filtros dados."""
+        vazio = np.zeros(0, dtype=np.int32)
+        selecao = None
+        for indice, chave in ((self.por_tamanho, tamanho), (self.por_silabas, silabas), (self.por_digrafo, digrafo)):
+            if chave is None:
+                continue
+            grupo = indice.get(chave, vazio)
+            selecao = grupo if selecao is None else np.intersect1d(selecao, grupo, assume_unique=True)
+        return np.arange(len(self.palavras), dtype=np.int32) if selecao is None else selecao
+
+
+class PermutacaoAleatoria:
+    """
+    Sorteio sem repetição de 0..n-1 (ou de `indices`), sem copiar nem embaralhar
+    a lista: um Fisher-Yates preguiçoso que guarda só as posições trocadas.
+    Cada sorteio é O(1) e a memória cresce com o número de sorteios, não com n.
+    """
+    def __init__(self, n: int, indices: np.ndarray | None = None, rng: random.Random | None = None):
+        self.n = n if indices is None else len(indices)
+        self.indices = indices
+        self.rng = rng or random.Random()
+        self.restantes = self.n
+        self._trocas: dict[int, int] = {}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        if self.restantes == 0:
+            raise StopIteration
+        j = self.rng.randrange(self.restantes)
+        self.restantes -= 1
+        ultimo = self.restantes
+        valor = self._trocas.get(j, j)
+        # A posição sorteada passa a guardar o último ainda não sorteado
+        self._trocas[j] = self._trocas.pop(ultimo, ultimo)
+        if j == ultimo:
+            self._trocas.pop(j, None)
+        return valor if self.indices is None else int(self.indices[valor])
+
+
+class CatalogoPalavras:
+    """
+    Todas as listas de `word_lists/` carregadas uma vez, compartilhadas pelas
+    sessões. `iniciar_monitoramento` verifica os arquivos a cada
+    `INTERVALO_RECARGA_PALAVRAS_S` e troca atomicamente os níveis alterados,
+    criados ou removidos.
+    """
+    def __init__(self, diretorio: str = CAMINHO_LISTAS_PALAVRAS, intervalo_s: float = INTERVALO_RECARGA_PALAVRAS_S):
+        self.diretorio = diretorio
+        self.intervalo_s = intervalo_s
+        self._niveis: dict[str, ListaNivel] = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self.recarregar()
+
+    def nivel(self, nivel: str) -> ListaNivel | None:
+        """A lista atual de um nível (pelo nome do arquivo ou como vem da interface, ex. "1º Ano")."""
+        return self._niveis.get(normalizar_nivel(nivel))
+
+    def niveis(self) -> list[str]:
+        return sorted(self._niveis)
+
+    def recarregar(self) -> list[str]:
+        """Relê os arquivos novos ou alterados e descarta os removidos. Retorna os níveis que mudaram."""
+        try:
+            arquivos = {
+                entrada.name[:-len(".txt")]: entrada.path
+                for entrada in os.scandir(self.diretorio) if entrada.name.endswith(".txt")
+            }
+        except FileNotFoundError:
+            print(f"Diretório de palavras não encontrado: {self.diretorio}")
+            arquivos = {}
+
+        atuais = self._niveis
+        novos, mudaram = {}, []
+        for nivel, caminho in arquivos.items():
+            lista = atuais.get(nivel)
+            try:
+                estado = os.stat(caminho)
+                if lista is None or lista.versao != (estado.st_mtime_ns, estado.st_size):
+                    lista = ListaNivel.de_arquivo(nivel, caminho)
+                    mudaram.append(nivel)
+            except OSError as e:
+                # Arquivo sendo substituído: fica a versão anterior até a próxima verificação
+                print(f"Falha ao ler a lista de palavras {caminho}: {e}")
+                if lista is None:
+                    continue
+            novos[nivel] = lista
+        mudaram += [nivel for nivel in atuais if nivel not in novos]
+
+        if mudaram:
+            with self._trava:
+                self._niveis = novos
+        return mudaram
+
+    def iniciar_monitoramento(self):
+        with self._trava:
+            if self._thread is not None:
+                return
+            self._parar.clear()
+            self._thread = threading.Thread(target=self._monitorar, name="CatalogoPalavras", daemon=True)
+            self._thread.start()
+
+    def parar_monitoramento(self):
+        with self._trava:
+            thread, self._thread = self._thread, None
+        self._parar.set()
+        if thread:
+            thread.join(timeout=self.intervalo_s)
+
+    def _monitorar(self):
+        while not self._parar.wait(self.intervalo_s):
+            mudaram = self.recarregar()
+            if mudaram:
+                print(f"Listas de palavras recarregadas: {', '.join(sorted(mudaram))}")
+
+
+if __name__ == "__main__":
+    # Carga, indexação e sorteio com um catálogo sintético de 100k+ palavras
+    import tempfile
+    import time
+    import tracemalloc
+
+    rng = random.Random(0)
+    silabas_base = ["ba", "ca", "lha", "nho", "rro", "sso", "ção", "te", "mi", "pu", "qui", "gue", "ei", "ou"]
+    with tempfile.TemporaryDirectory() as diretorio:
+        with open(os.path.join(diretorio, "grande.txt"), "w", encoding="utf-8") as f:
+            for _ in range(150_000):
+                f.write("".join(rng.choice(silabas_base) for _ in range(rng.randint(2, 6))) + "\n")
+
+        inicio = time.perf_counter()
+        catalogo = CatalogoPalavras(diretorio)
+        lista = catalogo.nivel("grande")
+        print(f"Carga e indexação de {len(lista)} palavras: {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+        inicio = time.perf_counter()
+        selecao = lista.indices(silabas=3, digrafo="lh")
+        print(f"Filtro 3 sílabas + 'lh': {len(selecao)} palavras em {(time.perf_counter() - inicio) * 1e6:.0f} µs")
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        permutacao = PermutacaoAleatoria(len(lista))
+        sorteadas = [lista.palavras[next(permutacao)] for _ in range(20)]
+        decorrido = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"20 sorteios: {decorrido * 1e6:.0f} µs, pico de memória {pico / 1024:.1f} KB (ex.: {', '.join(sorteadas[:3])})")
+
+        completa = PermutacaoAleatoria(len(lista))
+        assert sorted(completa) == list(range(len(lista))), "a permutação deveria cobrir todos os índices uma vez"
+        print("Permutação completa: cada palavra sorteada exatamente uma vez")
+
+        time.sleep(0.01)
+        with open(os.path.join(diretorio, "grande.txt"), "a", encoding="utf-8") as f:
+            f.write("palavranova\n")
+        print(f"Recarga após edição: {catalogo.recarregar()} ({len(catalogo.nivel('grande'))} palavras)")
@@ -0,0 +1,92 @@
+"""Módulo do estado do jogo: fotografias imutáveis trocadas por transições atômicas e versionadas."""
+import threading
+from dataclasses import dataclass, replace
+
+# Fases de uma rodada
+OCIOSO = "ocioso"
+ESCUTANDO = "escutando"
+VERIFICANDO = "verificando"
+FINALIZADO = "finalizado"
+
+# Para onde cada fase pode ir (ficar na mesma fase, mudando outros campos, sempre pode)
+TRANSICOES = {
+    OCIOSO: {ESCUTANDO, VERIFICANDO, FINALIZADO},
+    ESCUTANDO: {OCIOSO, VERIFICANDO, FINALIZADO},
+    VERIFICANDO: {OCIOSO, FINALIZADO},
+    FINALIZADO: {OCIOSO},
+}
+
+
+@dataclass(frozen=True)
+class EstadoJogo:
+    """Uma fotografia do estado de uma sessão. `versao` cresce a cada transição."""
+    versao: int = 0
+    fase: str = OCIOSO
+    # Identifica cada escuta, para ignorar as letras e o fim de uma escuta anterior
+    escuta: int = 0
+    aluno: str = ""
+    palavra_atual: str = ""
+    # Início da rodada (time.monotonic) e, para cada letra, os segundos desde ele
+    inicio_rodada: float = 0.0
+    soletracao: str = ""
+    confiancas: tuple[int, ...] = ()
+    tempos: tuple[float, ...] = ()
+    nivel: str = "1"
+    # Filtros do sorteio dentro do nível, como pares (nome, valor) (ver ListaNivel.indices)
+    filtros_palavras: tuple[tuple[str, object], ...] = ()
+    fonte_microfone: str = "pc"
+    saida_audio: str = "sistema"
+    jogo_iniciado: bool = False
+    erro: str | None = None
+    acertos: int = 0
+    erros: int = 0
+
+    @property
+    def escutando(self) -> bool:
+        return self.fase == ESCUTANDO
+
+
+class MaquinaEstadoJogo:
+    """
+    Guarda o EstadoJogo atual de uma sessão, mudado pelas rotas HTTP e pelas
+    threads de reconhecimento e do NAO.
+
+    Ler (`atual`) só pega a referência da fotografia atual: nunca bloqueia e
+    nunca vê um estado pela metade. Escrever calcula a próxima fotografia a
+    partir da atual e a troca numa seção crítica curta, sem I/O, validando a
+    mudança de fase pela tabela TRANSICOES.
+    """
+    def __init__(self, estado: EstadoJogo | None = None):
+        self._estado = estado if estado is not None else EstadoJogo()
+        self._trava = threading.Lock()
+
+    @property
+    def atual(self) -> EstadoJogo:
+        return self._estado
+
+    def transicionar(self, para: str | None = None, de: tuple[str, ...] | None = None, **campos) -> EstadoJogo | None:
+        """
+        Muda para a fase `para` (ou mantém a fase) com os `campos` dados. Com
+        `de`, só se a fase atual for uma delas. Retorna o novo estado, ou None
+        se a transição não é permitida agora.
+        """
+        return self.atualizar(lambda _: campos, para, de)
+
+    def atualizar(self, funcao: callable, para: str | None = None, de: tuple[str, ...] | None = None) -> EstadoJogo | None:
+        """
+        Como `transicionar`, mas os campos vêm de `funcao(estado_atual)`,
+        calculados dentro da seção crítica (ex. acrescentar uma letra).
+        `funcao` retornando None desiste da transição.
+        """
+        with self._trava:
+            atual = self._estado
+            if de is not None and atual.fase not in de:
+                return None
+            if para is not None and para != atual.fase and para not in TRANSICOES[atual.fase]:
+                return None
+            campos = funcao(atual)
+            if campos is None:
+                return None
+            novo = replace(atual, versao=atual.versao + 1, fase=para or atual.fase, **campos)
+            self._estado = novo
+            return novo
@@ -0,0 +1,77 @@
+"""Módulo do barramento de eventos entre as threads de reconhecimento e o event loop."""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+MAX_EVENTOS_PENDENTES_POR_SESSAO = 32
+
+
+@dataclass(frozen=True)
+class Evento:
+    """Evento base publicado por uma sessão de jogo."""
+    sessao: str
+    # Momento da publicação (time.perf_counter), para medir a espera até o event loop tratá-lo
+    criado: float = field(default_factory=time.perf_counter, kw_only=True)
+
+
+@dataclass(frozen=True)
+class EventoLetra(Evento):
+    """Uma letra foi reconhecida e adicionada à soletração."""
+    letra: str
+    soletracao: str
+    confianca: int = 100
+
+
+@dataclass(frozen=True)
+class EventoEscutaFinalizada(Evento):
+    """O reconhecimento de voz parou de escutar."""
+
+
+@dataclass(frozen=True)
+class EventoErro(Evento):
+    """Um serviço de reconhecimento falhou."""
+    mensagem: str
+
+
+class BarramentoEventos:
+    """
+    Recebe eventos de qualquer thread via `call_soon_threadsafe` e os entrega
+    ao event loop agrupados por sessão, para que uma rajada de letras gere
+    um único envio de estado.
+    """
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._sinal: asyncio.Event | None = None
+        self._pendentes: dict[str, deque[Evento]] = {}
+
+    def vincular_loop(self, loop: asyncio.AbstractEventLoop):
+        """Associa o barramento ao event loop que vai consumir os eventos."""
+        self._loop = loop
+        self._sinal = asyncio.Event()
+
+    def publicar(self, evento: Evento):
+        """Publica um evento; pode ser chamado de qualquer thread."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self._receber, evento)
+        except RuntimeError:
+            # O loop já foi encerrado
+            pass
+
+    def _receber(self, evento: Evento):
+        """Executa dentro do event loop."""
+        pendentes = self._pendentes.get(evento.sessao)
+        if pendentes is None:
+            pendentes = self._pendentes[evento.sessao] = deque(maxlen=MAX_EVENTOS_PENDENTES_POR_SESSAO)
+        pendentes.append(evento)
+        self._sinal.set()
+
+    async def proximo_lote(self) -> dict[str, deque[Evento]]:
+        """Aguarda eventos e retorna tudo o que chegou desde o último lote, por sessão."""
+        await self._sinal.wait()
+        self._sinal.clear()
+        lote, self._pendentes = self._pendentes, {}
+        return lote
@@ -1,43 +1,71 @@
 """Módulo do Gerenciador do Jogo, o cérebro do back-end."""
 
 import threading
+import time
+from functools import partial
 import qi
-import queue
 
+from config.settings import SESSAO_PADRAO, TIMEOUT_RECONHECIMENTO_S
+from game.estado_jogo import MaquinaEstadoJogo, EstadoJogo, OCIOSO, ESCUTANDO, VERIFICANDO, FINALIZADO
+from game.eventos import BarramentoEventos, EventoLetra, EventoEscutaFinalizada, EventoErro
+from game.catalogo_palavras import CatalogoPalavras, normalizar_nivel
+from game.historico import HistoricoTentativas, Tentativa
 from game.gerenciador_palavras import GerenciadorPalavras
-from services.conexao_nao import ConexaoNAO, ReconhecimentoVozNAO, NOME_MODULO_AUDIO
+from services.conexao_nao import ConexaoNAO, ReconhecimentoVozNAO, nome_modulo_sessao
+from services.pool_nao import PoolConexoesNAO
 from services.comandos_nao import ComandosNAO
 from services.reconhecimento_voz import ReconhecimentoVozPC
 from services.processador_audio import ProcessadorAudioMultiCanal
+from services.metricas import DURACAO_ETAPAS
+
+# Falas do robô: as fixas e as de cada palavra são pré-renderizadas no NAO (ver ComandosNAO.aquecer_falas)
+FRASE_PALAVRA = "A palavra é: {palavra}"
+FRASE_ERRO = "Você errou! A palavra era '{palavra}'"
+FRASE_ACERTO = "Parabéns, você acertou!"
+FRASE_FIM_DE_JOGO = "Você completou todas as palavras!"
+FRASE_INICIO_NAO = "Pode começar a soletrar."
+FRASE_INICIO_HIBRIDO = "Modo de cancelamento de ruído ativado."
+FRASE_CONECTADO = "Olá! Estou pronto para soletrar."
+FRASE_DESPEDIDA = "Até mais!"
+FRASES_FIXAS = (FRASE_ACERTO, FRASE_INICIO_NAO, FRASE_INICIO_HIBRIDO, FRASE_FIM_DE_JOGO, FRASE_DESPEDIDA)
+
+DURACAO_ADICIONAR_LETRA = DURACAO_ETAPAS.rotulado(etapa="adicionar_letra")
+
+# Quanto parar a escuta espera as letras ainda em reconhecimento. Para verificar,
+# espera todas (cada reconhecimento termina ou é abandonado no seu timeout)
+ESPERA_PARAR_ESCUTA_S = 1.0
+ESPERA_VERIFICAR_S = TIMEOUT_RECONHECIMENTO_S + 1.0
+# Quantas das próximas palavras pré-renderizar a cada rodada. Cada uma já sai
+# do sorteio ponderado, que não a reavalia com os resultados seguintes
+PALAVRAS_AQUECIDAS = 1
 
 
 class GerenciadorJogo:
     """Orquestra a lógica do jogo e os serviços."""
 
-    def __init__(self):
-        self.gerenciador_palavras = GerenciadorPalavras()
+    def __init__(self, sessao_id: str = SESSAO_PADRAO, barramento: BarramentoEventos | None = None,
+                 pool_nao: PoolConexoesNAO | None = None, catalogo: CatalogoPalavras | None = None,
+                 historico: HistoricoTentativas | None = None):
+        self.sessao_id = sessao_id
+        # Sem histórico (None), as tentativas não são gravadas e o sorteio não se adapta ao aluno
+        self.historico = historico
+        self.gerenciador_palavras = GerenciadorPalavras(catalogo, historico)
 
         self.reconhecimento_pc: ReconhecimentoVozPC | None = None
         self.processador_audio: ProcessadorAudioMultiCanal | None = None
 
         # --- Lógica do NAO ---
-        self.conexao_nao = ConexaoNAO()
+        # A conexão vem do pool (compartilhado entre as sessões), que cuida do heartbeat e da reconexão
+        self.pool_nao = pool_nao if pool_nao is not None else PoolConexoesNAO()
+        self.conexao_nao: ConexaoNAO | None = None
         self.comandos_nao: ComandosNAO | None = None
         self.reconhecimento_nao: ReconhecimentoVozNAO | None = None
 
         # --- Estado do Jogo ---
-        self.palavra_atual = ""
-        self.soletracao_usuario = ""
-        self.nivel_atual = "1"
-        self.fonte_microfone = "pc"
-        self.saida_audio = "sistema"
-        self.escutando = False
+        # Mudado pelas rotas e pelas threads de reconhecimento: só por transições da máquina
+        self.estado = MaquinaEstadoJogo()
         self.thread_escuta = None
-        self.jogo_iniciado = False
-        self.erro = None
-        self.acertos = 0
-        self.erros = 0
-        self.queue = queue.Queue()
+        self.barramento = barramento if barramento is not None else BarramentoEventos()
 
     def iniciar_jogo(self):
         """
@@ -46,185 +74,273 @@ class GerenciadorJogo:
         """
         # Fallback para configurações padrão se o NAO não estiver conectado
         if not self.comandos_nao:
-            if self.fonte_microfone in ('nao', 'hibrido'):
-                self.fonte_microfone = 'pc'
-            if self.saida_audio == 'nao':
-                self.saida_audio = 'sistema'
-
-        self.acertos = 0
-        self.erros = 0
-        self.erro = None
-        self.soletracao_usuario = ""
-
-        if self.gerenciador_palavras.carregar_palavras(self.nivel_atual):
-            self.jogo_iniciado = True
+            estado = self.estado.atual
+            self.estado.transicionar(
+                fonte_microfone='pc' if estado.fonte_microfone in ('nao', 'hibrido') else estado.fonte_microfone,
+                saida_audio='sistema' if estado.saida_audio == 'nao' else estado.saida_audio
+            )
+
+        estado = self.estado.atual
+        nivel = estado.nivel
+        if self.gerenciador_palavras.carregar_palavras(nivel, aluno=estado.aluno or self.sessao_id,
+                                                       filtros=dict(estado.filtros_palavras)):
+            self.estado.transicionar(acertos=0, erros=0, erro=None, jogo_iniciado=True)
             return self.iniciar_nova_rodada()
         else:
-            self.erro = f"Não foi possível carregar palavras para o nível {self.nivel_atual}."
-            self.jogo_iniciado = False
-            return {"status": "erro", "mensagem": self.erro}
+            filtros = f" com os filtros {dict(estado.filtros_palavras)}" if estado.filtros_palavras else ""
+            erro = f"Não foi possível carregar palavras para o nível {nivel}{filtros}."
+            self.estado.transicionar(acertos=0, erros=0, erro=erro, jogo_iniciado=False)
+            return {"status": "erro", "mensagem": erro}
 
     def iniciar_nova_rodada(self):
         """Pede uma nova palavra e atualiza o estado."""
         self.parar_escuta_voz()
-        self.soletracao_usuario = ""
         nova_palavra = self.gerenciador_palavras.obter_nova_palavra()
 
         if not nova_palavra:
-            self.erro = "Todas as palavras do nível foram concluídas!"
+            erro = "Todas as palavras do nível foram concluídas!"
+            self.estado.transicionar(para=FINALIZADO, de=(OCIOSO, FINALIZADO), erro=erro, soletracao="", confiancas=(), tempos=())
             if self.comandos_nao:
-                self.comandos_nao.dizer("Você completou todas as palavras!")
-            return {"status": "fim_de_jogo", "mensagem": self.erro}
+                self.comandos_nao.dizer(FRASE_FIM_DE_JOGO)
+            return {"status": "fim_de_jogo", "mensagem": erro}
 
-        self.palavra_atual = nova_palavra
+        estado = self.estado.transicionar(
+            para=OCIOSO, de=(OCIOSO, FINALIZADO), palavra_atual=nova_palavra, inicio_rodada=time.monotonic(),
+            soletracao="", confiancas=(), tempos=()
+        )
+        if estado is None:
+            return {"status": "ocupado", "mensagem": "A soletração ainda está sendo verificada."}
 
-        if self.saida_audio == 'nao' and self.comandos_nao:
-            self.comandos_nao.dizer(f"A palavra é: {self.palavra_atual}")
+        if estado.saida_audio == 'nao' and self.comandos_nao:
+            # Uma nova palavra torna obsoleto o que o robô ainda estiver falando
+            self.comandos_nao.dizer(FRASE_PALAVRA.format(palavra=nova_palavra), preemptar=True)
+        self._aquecer_falas()
 
-        return {"palavra": self.palavra_atual}
+        return {"palavra": nova_palavra}
 
     def iniciar_soletracao(self, device: int | str | None = None):
         """Inicia o reconhecimento de voz em uma thread separada."""
-        if self.escutando:
-            return {"status": "ocupado", "mensagem": "Já estou escutando."}
-
-        self.escutando = True
+        # Verifica e entra na escuta numa transição só: dois pedidos simultâneos não abrem duas escutas
+        estado = self.estado.atualizar(lambda e: {"escuta": e.escuta + 1}, para=ESCUTANDO, de=(OCIOSO,))
+        if estado is None:
+            fase = self.estado.atual.fase
+            if fase == ESCUTANDO:
+                return {"status": "ocupado", "mensagem": "Já estou escutando."}
+            return {"status": "ocupado", "mensagem": f"Não é possível escutar agora (fase: {fase})."}
+
+        fonte = estado.fonte_microfone
+        # Callbacks desta escuta: o que chegar de uma escuta anterior é ignorado
+        adicionar_letra = partial(self._adicionar_letra, escuta=estado.escuta)
+        finalizar_escuta = partial(self._finalizar_escuta, escuta=estado.escuta)
 
         try:
-            if self.fonte_microfone == 'pc':
+            if fonte == 'pc':
                 self.reconhecimento_pc = ReconhecimentoVozPC(device_index=device)
                 self.thread_escuta = threading.Thread(
                     target=self.reconhecimento_pc.ouvir_soletracao,
-                    args=(self._adicionar_letra, self._finalizar_escuta),
+                    args=(adicionar_letra, finalizar_escuta, self._registrar_erro),
                     daemon=True
                 )
                 self.thread_escuta.start()
 
-            elif self.fonte_microfone == 'nao' and self.reconhecimento_nao:
+            elif fonte == 'nao' and self.reconhecimento_nao:
                 if self.comandos_nao:
-                    self.comandos_nao.dizer("Pode começar a soletrar.")
+                    self.comandos_nao.dizer(FRASE_INICIO_NAO)
+                self.reconhecimento_nao.callback_letra = adicionar_letra
+                self.reconhecimento_nao.callback_final = finalizar_escuta
                 self.reconhecimento_nao.iniciar_escuta()
 
-            elif self.fonte_microfone == 'hibrido' and self.reconhecimento_nao:
+            elif fonte == 'hibrido' and self.reconhecimento_nao:
                 if self.comandos_nao:
-                    self.comandos_nao.dizer("Modo de cancelamento de ruído ativado.")
+                    self.comandos_nao.dizer(FRASE_INICIO_HIBRIDO)
+                # O processador para o NAO antes de esvaziar sua fila: o fim da escuta é o dele
+                self.reconhecimento_nao.callback_final = None
                 self.processador_audio = ProcessadorAudioMultiCanal(
                     reconhecimento_nao=self.reconhecimento_nao,
-                    callback_letra=self._adicionar_letra,
-                    callback_final=self._finalizar_escuta,
+                    callback_letra=adicionar_letra,
+                    callback_final=finalizar_escuta,
+                    callback_erro=self._registrar_erro,
                     device_index=device
                 )
                 self.processador_audio.iniciar()
 
             else:
-                self.escutando = False
-                return {"status": "erro", "mensagem": f"Fonte de microfone '{self.fonte_microfone}' não está pronta."}
+                self.estado.transicionar(para=OCIOSO, de=(ESCUTANDO,))
+                return {"status": "erro", "mensagem": f"Fonte de microfone '{fonte}' não está pronta."}
 
-            return {"status": "sucesso", "mensagem": f"Ouvindo pelo {self.fonte_microfone.upper()}..."}
+            return {"status": "sucesso", "mensagem": f"Ouvindo pelo {fonte.upper()}..."}
 
         except Exception as e:
-            self.escutando = False
+            # Também no estado: um motor que não carrega precisa aparecer na interface
+            self.estado.transicionar(para=OCIOSO, de=(ESCUTANDO,))
+            self._registrar_erro(f"Falha ao iniciar escuta: {e}")
             return {"status": "erro", "mensagem": f"Falha ao iniciar escuta: {e}"}
 
-    def parar_escuta_voz(self):
-        """Sinaliza para a thread de escuta parar."""
-        if not self.escutando:
+    def parar_escuta_voz(self, espera_s: float = ESPERA_PARAR_ESCUTA_S):
+        """Para a escuta, esperando (até `espera_s`) as letras ainda em reconhecimento."""
+        if not self.estado.atual.escutando:
             return {"status": "parado"}
 
-        if self.fonte_microfone == 'pc' and self.reconhecimento_pc:
+        self._parar_servicos_escuta(espera_s)
+        self._finalizar_escuta()
+        return {"status": "parado"}
+
+    def _parar_servicos_escuta(self, espera_s: float = ESPERA_PARAR_ESCUTA_S):
+        """Para o que estiver capturando, seja qual for a fonte atual (ela pode ter mudado durante a escuta)."""
+        if self.reconhecimento_pc:
             self.reconhecimento_pc.parar_de_ouvir()
             if self.thread_escuta and self.thread_escuta.is_alive():
-                self.thread_escuta.join(timeout=1)
-
-        elif self.fonte_microfone == 'nao' and self.reconhecimento_nao:
-            self.reconhecimento_nao.parar_escuta()
+                self.thread_escuta.join(timeout=espera_s)
 
-        elif self.fonte_microfone == 'hibrido' and self.processador_audio:
-            self.processador_audio.parar()
+        if self.processador_audio:
+            self.processador_audio.parar(espera_s)
             self.processador_audio = None
 
-        self._finalizar_escuta()
-        return {"status": "parado"}
+        if self.reconhecimento_nao:
+            self.reconhecimento_nao.parar_escuta(espera_s)
+
+    def _adicionar_letra(self, letra: str, confianca: int = 100, escuta: int | None = None):
+        """Callback para adicionar uma letra à soletração (só durante a escuta que a reconheceu)."""
+        def acrescentar(estado: EstadoJogo):
+            if escuta is not None and escuta != estado.escuta:
+                return None
+            return {
+                "soletracao": estado.soletracao + letra,
+                "confiancas": estado.confiancas + (confianca,),
+                "tempos": estado.tempos + (round(time.monotonic() - estado.inicio_rodada, 3),)
+            }
 
-    def _adicionar_letra(self, letra: str):
-        """Callback para adicionar uma letra à soletração."""
-        self.soletracao_usuario += letra
-        self.queue.put(self.soletracao_usuario)
+        with DURACAO_ADICIONAR_LETRA.medir():
+            estado = self.estado.atualizar(acrescentar, de=(ESCUTANDO,))
+            if estado is None:
+                print(f"Letra '{letra}' ignorada: chegou fora da escuta.")
+                return
+            self.barramento.publicar(EventoLetra(self.sessao_id, letra, estado.soletracao, confianca))
 
-    def _finalizar_escuta(self):
+    def _finalizar_escuta(self, escuta: int | None = None):
         """Callback para quando a escuta termina."""
-        self.escutando = False
+        estado = self.estado.atualizar(
+            lambda e: {} if escuta is None or escuta == e.escuta else None, para=OCIOSO, de=(ESCUTANDO,)
+        )
+        if estado is not None:
+            self.barramento.publicar(EventoEscutaFinalizada(self.sessao_id))
+
+    def _registrar_erro(self, mensagem: str):
+        """Callback para falhas nos serviços de reconhecimento."""
+        self.estado.transicionar(erro=mensagem)
+        self.barramento.publicar(EventoErro(self.sessao_id, mensagem))
 
     def verificar_soletracao(self):
         """Para a escuta e verifica se a soletração está correta."""
-        self.parar_escuta_voz()
+        # Espera as letras que ainda estão no reconhecimento: a última costuma chegar depois do clique
+        self.parar_escuta_voz(ESPERA_VERIFICAR_S)
+
+        # A soletração verificada é a desta fotografia; uma segunda verificação simultânea não conta ponto
+        estado = self.estado.transicionar(para=VERIFICANDO, de=(OCIOSO,))
+        if estado is None:
+            return {"status": "ocupado", "mensagem": f"Não é possível verificar agora (fase: {self.estado.atual.fase})."}
 
-        soletracao_normalizada = self.soletracao_usuario.lower().replace(" ", "")
-        palavra_normalizada = self.palavra_atual.lower()
+        soletracao_normalizada = estado.soletracao.lower().replace(" ", "")
+        palavra_normalizada = estado.palavra_atual.lower()
 
         acertou = soletracao_normalizada == palavra_normalizada
 
         if acertou:
-            self.acertos += 1
-            resultado_texto = "Parabéns, você acertou!"
+            resultado_texto = FRASE_ACERTO
             if self.comandos_nao:
                 self.comandos_nao.piscar_olhos("green")
         else:
-            self.erros += 1
-            resultado_texto = f"Você errou! A palavra era '{self.palavra_atual.upper()}'"
+            resultado_texto = FRASE_ERRO.format(palavra=estado.palavra_atual.upper())
             if self.comandos_nao:
                 self.comandos_nao.piscar_olhos("red")
 
+        self.estado.atualizar(
+            lambda e: {"acertos": e.acertos + 1} if acertou else {"erros": e.erros + 1},
+            para=OCIOSO, de=(VERIFICANDO,)
+        )
+        segundos_por_letra = estado.tempos[-1] / len(estado.tempos) if estado.tempos else None
+        self.gerenciador_palavras.registrar_resultado(estado.palavra_atual, acertou, segundos_por_letra)
+        if self.historico:
+            # Só enfileira: a gravação em disco é da thread do histórico
+            self.historico.registrar(Tentativa(
+                sessao=self.sessao_id, aluno=estado.aluno or self.sessao_id, nivel=normalizar_nivel(estado.nivel),
+                palavra=estado.palavra_atual, soletracao=estado.soletracao,
+                tempos_letras=estado.tempos, confiancas=estado.confiancas, acertou=acertou
+            ))
+
         if self.comandos_nao:
             self.comandos_nao.dizer(resultado_texto)
 
         return {
             "resultado": "acertou" if acertou else "errou",
-            "palavra_correta": self.palavra_atual,
-            "sua_soletracao": self.soletracao_usuario
+            "palavra_correta": estado.palavra_atual,
+            "sua_soletracao": estado.soletracao
         }
 
     def apagar_ultima_letra(self):
         """Apaga a última letra da soletração."""
         self.parar_escuta_voz()
 
-        if self.soletracao_usuario:
-            self.soletracao_usuario = self.soletracao_usuario[:-1]
+        estado = self.estado.atualizar(
+            lambda e: {"soletracao": e.soletracao[:-1], "confiancas": e.confiancas[:-1], "tempos": e.tempos[:-1]}
+            if e.soletracao else None,
+            de=(OCIOSO,)
+        )
+        return {"soletracao_atual": (estado or self.estado.atual).soletracao}
 
-        return {"soletracao_atual": self.soletracao_usuario}
-
-    def definir_nivel(self, nivel: str):
-        """Define o nível atual e reinicia o jogo se necessário."""
-        self.nivel_atual = nivel
+    def definir_nivel(self, nivel: str, tamanho: int | None = None, silabas: int | None = None,
+                      digrafo: str | None = None):
+        """
+        Define o nível atual e reinicia o jogo se necessário. Os filtros opcionais
+        limitam o sorteio às palavras do nível com esse número de letras ou de
+        sílabas, ou com esse dígrafo (ex. "lh").
+        """
+        filtros = tuple((nome, valor) for nome, valor in
+                        (("tamanho", tamanho), ("silabas", silabas), ("digrafo", digrafo)) if valor is not None)
+        estado = self.estado.transicionar(nivel=nivel, filtros_palavras=filtros)
 
-        if self.jogo_iniciado:
+        if estado.jogo_iniciado:
             return self.iniciar_jogo()
 
         return {"status": "nível definido"}
 
+    def definir_aluno(self, aluno: str):
+        """Define quem está jogando nesta sessão (para o histórico de tentativas)."""
+        estado = self.estado.transicionar(aluno=aluno.strip())
+        return {"status": "aluno definido", "aluno": estado.aluno}
+
     def definir_fonte_microfone(self, fonte: str):
         """Define a fonte do microfone."""
-        self.fonte_microfone = fonte.lower()
-        return {"status": "fonte de microfone definida", "fonte": self.fonte_microfone}
+        estado = self.estado.transicionar(fonte_microfone=fonte.lower())
+        return {"status": "fonte de microfone definida", "fonte": estado.fonte_microfone}
 
     def definir_saida_audio(self, saida: str):
         """Define a saída de áudio."""
-        self.saida_audio = saida.lower()
-        return {"status": "saída de áudio definida", "saida": self.saida_audio}
+        estado = self.estado.transicionar(saida_audio=saida.lower())
+        return {"status": "saída de áudio definida", "saida": estado.saida_audio}
 
     def conectar_nao(self, ip: str, port: int = 9559):
         """Conecta ao NAO, inicializa o broker e o módulo de reconhecimento remoto."""
-        sucesso, mensagem = self.conexao_nao.conectar(ip, port)
-        if sucesso:
+        if self.conexao_nao:
+            if self.conexao_nao.ip == ip:
+                return {"status": "conectado", "ip": ip}
+            self.desconectar_nao()
+
+        self.conexao_nao, mensagem = self.pool_nao.obter(ip, port)
+        if self.conexao_nao:
             try:
                 self.reconhecimento_nao = ReconhecimentoVozNAO(
-                    self.conexao_nao.application,
+                    self.conexao_nao.session,
                     self._adicionar_letra,
-                    self._finalizar_escuta
+                    self._finalizar_escuta,
+                    self._registrar_erro,
+                    nome_modulo=nome_modulo_sessao(self.sessao_id)
                 )
-                self.conexao_nao.session.registerService(NOME_MODULO_AUDIO, self.reconhecimento_nao)
+                # Registrado pela conexão, que o registra de novo se precisar reconectar
+                self.conexao_nao.registrar_servico(self.reconhecimento_nao.module_name, self.reconhecimento_nao)
                 self.comandos_nao = ComandosNAO(self.conexao_nao)
-                self.comandos_nao.dizer("Olá! Estou pronto para soletrar.")
+                self.comandos_nao.dizer(FRASE_CONECTADO)
+                self._aquecer_falas()
                 return {"status": "conectado", "ip": ip}
             except Exception as e:
                 self.desconectar_nao()
@@ -234,47 +350,65 @@ class GerenciadorJogo:
 
 
 
+    def _aquecer_falas(self):
+        """
+        Pré-renderiza no NAO as falas fixas, o erro da palavra atual e as falas
+        da próxima palavra do sorteio (as já renderizadas são puladas).
+        """
+        if not self.comandos_nao:
+            return
+        textos = list(FRASES_FIXAS)
+        palavra_atual = self.estado.atual.palavra_atual
+        if palavra_atual:
+            textos.append(FRASE_ERRO.format(palavra=palavra_atual.upper()))
+        for palavra in self.gerenciador_palavras.proximas(PALAVRAS_AQUECIDAS):
+            textos += [FRASE_PALAVRA.format(palavra=palavra), FRASE_ERRO.format(palavra=palavra.upper())]
+        self.comandos_nao.aquecer_falas(textos)
+
     def desconectar_nao(self):
         """Desconecta do NAO e finaliza o broker e módulos."""
         self.parar_escuta_voz()
         if self.comandos_nao:
-            self.comandos_nao.dizer("Até mais!")
-        
-        self.conexao_nao.desconectar()
+            self.comandos_nao.dizer(FRASE_DESPEDIDA, preemptar=True)
+            self.comandos_nao.encerrar()
+
+        if self.conexao_nao:
+            if self.reconhecimento_nao:
+                self.conexao_nao.remover_servico(self.reconhecimento_nao.module_name, self.reconhecimento_nao)
+            self.pool_nao.liberar(self.conexao_nao.ip)
+        self.conexao_nao = None
         self.comandos_nao = None
         self.reconhecimento_nao = None
 
-        if self.fonte_microfone in ('nao', 'hibrido'): 
+        if self.estado.atual.fonte_microfone in ('nao', 'hibrido'):
             self.definir_fonte_microfone('pc')
         return {"status": "desconectado"}
 
 
 
     def obter_estado(self):
-
-        return {
-
-            "palavra_atual": self.palavra_atual,
-
-            "soletracao_usuario": self.soletracao_usuario,
-
-            "nivel_atual": self.nivel_atual,
-
-            "fonte_microfone": self.fonte_microfone,
-
-            "saida_audio": self.saida_audio,
-
-            "escutando": self.escutando,
-
-            "jogo_iniciado": self.jogo_iniciado,
-
-            "erro": self.erro,
-
-            "nao_conectado": self.comandos_nao is not None,
-
-            "pontuacao": {
-                "acertos": self.acertos,
-                "erros": self.erros
-            }
-
+        """O estado da sessão para a interface, a partir de uma fotografia (não espera nenhuma escrita)."""
+        return descrever_estado(self.estado.atual, nao_conectado=self.comandos_nao is not None)
+
+
+def descrever_estado(estado: EstadoJogo, nao_conectado: bool = False) -> dict:
+    """Uma fotografia do estado como a interface a recebe (também a de uma sessão que ainda não existe)."""
+    return {
+        "versao": estado.versao,
+        "fase": estado.fase,
+        "aluno": estado.aluno,
+        "palavra_atual": estado.palavra_atual,
+        "soletracao_usuario": estado.soletracao,
+        "nivel_atual": estado.nivel,
+        "filtros_palavras": dict(estado.filtros_palavras),
+        "fonte_microfone": estado.fonte_microfone,
+        "saida_audio": estado.saida_audio,
+        "escutando": estado.escutando,
+        "jogo_iniciado": estado.jogo_iniciado,
+        "erro": estado.erro,
+        "nao_conectado": nao_conectado,
+        "pontuacao": {
+            "acertos": estado.acertos,
+            "erros": estado.erros
         }
+    }
@@ -1,42 +1,137 @@
 """Módulo para gerenciar as palavras do jogo."""
-import os
-import random
-from config.settings import CAMINHO_LISTAS_PALAVRAS
+import threading
+from collections import deque
+import numpy as np
+
+from config.settings import SELECAO_ADAPTATIVA_PALAVRAS
+from game.catalogo_palavras import CatalogoPalavras, ListaNivel, PermutacaoAleatoria
+from game.historico import HistoricoTentativas
+from game.selecao_palavras import EstatisticasPalavras, SorteioPonderado
+
 
 class GerenciadorPalavras:
-    """Carrega e gerencia as listas de palavras para cada nível."""
-    def __init__(self):
-        self.palavras_do_nivel = []
-        self.palavras_disponiveis = []
-
-    def carregar_palavras(self, nivel: str):
-        """Carrega a lista de palavras para um nível específico."""
-        # Normaliza o nome do nível para corresponder ao nome do arquivo
-        # Ex: "1º Ano" -> "1_ano"
-        nome_arquivo = nivel.lower().replace('º ', '_')
-        caminho_arquivo = os.path.join(CAMINHO_LISTAS_PALAVRAS, f"{nome_arquivo}.txt")
-        try:
-            with open(caminho_arquivo, 'r', encoding='utf-8') as f:
-                self.palavras_do_nivel = [linha.strip().lower() for linha in f if linha.strip()]
-                self.reiniciar_rodada()
-                return True
-        except FileNotFoundError:
-            print(f"Arquivo de palavras não encontrado: {caminho_arquivo}")
-            self.palavras_do_nivel = []
-            self.palavras_disponiveis = []
-            return False
+    """
+    Sorteia as palavras de um nível para uma sessão, a partir do catálogo
+    compartilhado: sem reler o arquivo nem copiar a lista a cada jogo.
 
-    def obter_nova_palavra(self) -> str | None:
-        """Retorna uma nova palavra aleatória e a remove da lista de disponíveis."""
-        if not self.palavras_disponiveis:
-            # Se acabaram as palavras, reembaralha a lista original
+    Com um aluno e um histórico, o sorteio é ponderado pelo desempenho dele em
+    cada palavra (SorteioPonderado); as estatísticas vêm do histórico uma vez
+    por aluno e nível e depois são atualizadas por `registrar_resultado`, que
+    também muda o peso da palavra no sorteio em andamento.
+
+    Os `filtros` (tamanho, silabas, digrafo; ver ListaNivel.indices) restringem
+    o sorteio às palavras do nível que atendem a todos eles.
+
+    Os métodos rodam em threads de trabalho concorrentes (duas próximas
+    rodadas, um resultado durante um sorteio): uma trava reentrante protege a
+    fila de próximas palavras e o sorteio.
+    """
+    def __init__(self, catalogo: CatalogoPalavras | None = None, historico: HistoricoTentativas | None = None):
+        self.catalogo = catalogo if catalogo is not None else CatalogoPalavras()
+        self.historico = historico
+        self.lista: ListaNivel | None = None
+        self.estatisticas: EstatisticasPalavras | None = None
+        self.filtros: dict = {}
+        self._estatisticas: dict[tuple[str, str], EstatisticasPalavras] = {}
+        self._sorteio: PermutacaoAleatoria | SorteioPonderado | None = None
+        # As palavras do nível que atendem aos filtros (None: todas)
+        self._selecionadas: np.ndarray | None = None
+        self._proximas: deque[str] = deque()
+        self._trava = threading.RLock()
+
+    @property
+    def palavras_do_nivel(self) -> tuple[str, ...]:
+        return self.lista.palavras if self.lista else ()
+
+    def carregar_palavras(self, nivel: str, aluno: str | None = None, filtros: dict | None = None):
+        """Seleciona a lista atual de um nível no catálogo (e as estatísticas do aluno nele)."""
+        with self._trava:
+            lista = self.catalogo.nivel(nivel)
+            self.filtros = {chave: valor for chave, valor in (filtros or {}).items() if valor is not None}
+            if not lista:
+                print(f"Lista de palavras não encontrada para o nível: {nivel}")
+            elif self.filtros and not len(lista.indices(**self.filtros)):
+                print(f"Nenhuma palavra do nível {nivel} atende aos filtros {self.filtros}")
+                lista = None
+            if not lista:
+                self.lista = None
+                self.estatisticas = None
+                self._sorteio = None
+                self._proximas.clear()
+                return False
+            self.lista = lista
+            self.estatisticas = self._obter_estatisticas(aluno, lista.nivel) if aluno else None
             self.reiniciar_rodada()
-            if not self.palavras_disponiveis: # Ainda vazia? Então não há palavras.
-                return None
-        
-        return self.palavras_disponiveis.pop()
+            return True
+
+    def obter_nova_palavra(self) -> str | None:
+        """Retorna uma nova palavra aleatória, sem repetir até esgotar o nível."""
+        with self._trava:
+            if not self.proximas(1):
+                # Se acabaram as palavras, recomeça o sorteio
+                self.reiniciar_rodada()
+                if not self.proximas(1): # Ainda vazia? Então não há palavras.
+                    return None
+
+            return self._proximas.popleft()
+
+    def proximas(self, quantidade: int) -> list[str]:
+        """As próximas palavras que serão sorteadas (até `quantidade`), sem tirá-las do sorteio."""
+        with self._trava:
+            while self._sorteio and len(self._proximas) < quantidade:
+                indice = next(self._sorteio, None)
+                if indice is None:
+                    break
+                self._proximas.append(self.lista.palavras[indice])
+            return list(self._proximas)[:quantidade]
+
+    def registrar_resultado(self, palavra: str, acertou: bool, segundos_por_letra: float | None = None):
+        """
+        Atualiza as estatísticas do aluno e o sorteio em andamento: uma palavra
+        errada volta ao sorteio desta passada com o novo peso (as já sorteadas
+        em `proximas` não mudam).
+        """
+        with self._trava:
+            if self.estatisticas is None:
+                return
+            self.estatisticas.registrar(palavra, acertou, segundos_por_letra)
+            if isinstance(self._sorteio, SorteioPonderado):
+                indice = self.lista.posicoes.get(palavra)
+                if indice is not None and (self._selecionadas is None or self._selecionadas[indice]):
+                    self._sorteio.ajustar(indice, self.estatisticas.peso(palavra), reinserir=not acertou)
 
     def reiniciar_rodada(self):
-        """Reembaralha as palavras do nível atual."""
-        self.palavras_disponiveis = self.palavras_do_nivel.copy()
-        random.shuffle(self.palavras_disponiveis)
+        """Recomeça o sorteio das palavras do nível (com a lista mais recente do catálogo)."""
+        with self._trava:
+            if self.lista:
+                self.lista = self.catalogo.nivel(self.lista.nivel) or self.lista
+            indices = self.lista.indices(**self.filtros) if self.lista and self.filtros else None
+            self._selecionadas = None
+            if not self.lista:
+                self._sorteio = None
+            elif self.estatisticas is not None:
+                # Ponderado mesmo sem histórico (todos os pesos 1): os resultados desta passada já mudam os pesos
+                pesos = self.estatisticas.pesos(self.lista)
+                if indices is not None:
+                    # Peso zero: as palavras fora dos filtros nunca saem
+                    self._selecionadas = np.zeros(len(pesos), dtype=bool)
+                    self._selecionadas[indices] = True
+                    pesos[~self._selecionadas] = 0.0
+                self._sorteio = SorteioPonderado(pesos)
+            else:
+                # Sem seleção adaptativa, todas têm o mesmo peso: o sorteio uniforme é mais leve
+                self._sorteio = PermutacaoAleatoria(len(self.lista), indices=indices)
+            self._proximas.clear()
+
+    def _obter_estatisticas(self, aluno: str, nivel: str) -> EstatisticasPalavras | None:
+        if not SELECAO_ADAPTATIVA_PALAVRAS or self.historico is None:
+            return None
+        chave = (aluno, nivel)
+        if chave not in self._estatisticas:
+            try:
+                linhas = self.historico.estatisticas_palavras(aluno, nivel)
+            except Exception as e:
+                print(f"Falha ao ler o histórico de '{aluno}', sorteio sem ponderação: {e}")
+                linhas = []
+            self._estatisticas[chave] = EstatisticasPalavras(linhas)
+        return self._estatisticas[chave]
@@ -0,0 +1,273 @@
+"""
+Módulo do histórico de tentativas: cada verificação de soletração gravada num
+SQLite local (modo WAL), por uma thread que grava em lotes.
+
+Benchmark do registro e das consultas (a partir de backend/src):
+    python -m game.historico
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+
+from config.settings import (
+    ARQUIVO_HISTORICO, TAMANHO_LOTE_HISTORICO, INTERVALO_LOTE_HISTORICO_S, MAX_TENTATIVAS_PENDENTES
+)
+from game.catalogo_palavras import normalizar_nivel
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tentativas (
+    id INTEGER PRIMARY KEY,
+    momento REAL NOT NULL,
+    sessao TEXT NOT NULL,
+    aluno TEXT NOT NULL,
+    nivel TEXT NOT NULL,
+    palavra TEXT NOT NULL,
+    soletracao TEXT NOT NULL,
+    tempos_letras TEXT NOT NULL,
+    confiancas TEXT NOT NULL,
+    confianca_media REAL,
+    segundos_por_letra REAL,
+    acertou INTEGER NOT NULL
+);
+-- Índices de cobertura: as taxas de erro por aluno e por palavra são lidas só do índice
+CREATE INDEX IF NOT EXISTS idx_tentativas_aluno ON tentativas (aluno, nivel, palavra, acertou);
+CREATE INDEX IF NOT EXISTS idx_tentativas_nivel_aluno ON tentativas (nivel, aluno, acertou);
+CREATE INDEX IF NOT EXISTS idx_tentativas_palavra ON tentativas (nivel, palavra, acertou);
+"""
+
+
+@dataclass(frozen=True)
+class Tentativa:
+    """
+    Uma verificação de soletração. `nivel` como o nome do arquivo da lista ("1_ano");
+    `tempos_letras`: segundos desde o início da rodada até cada letra.
+    """
+    sessao: str
+    aluno: str
+    nivel: str
+    palavra: str
+    soletracao: str
+    tempos_letras: tuple[float, ...]
+    confiancas: tuple[int, ...]
+    acertou: bool
+    momento: float = field(default_factory=time.time)
+
+
+def _abrir(caminho: str) -> sqlite3.Connection:
+    conexao = sqlite3.connect(caminho, timeout=5.0)
+    conexao.row_factory = sqlite3.Row
+    conexao.execute("PRAGMA journal_mode=WAL")
+    # Com WAL, NORMAL só arrisca as últimas transações numa queda de energia, nunca a integridade
+    conexao.execute("PRAGMA synchronous=NORMAL")
+    # Cria o banco na primeira conexão de quem ler ou gravar (nada é criado só por instanciar o histórico)
+    conexao.executescript(ESQUEMA)
+    colunas = {linha["name"] for linha in conexao.execute("PRAGMA table_info(tentativas)")}
+    if "segundos_por_letra" not in colunas:
+        # Bancos criados antes da seleção adaptativa de palavras
+        with conexao:
+            conexao.execute("ALTER TABLE tentativas ADD COLUMN segundos_por_letra REAL")
+    return conexao
+
+
+def _taxas(linhas) -> list[dict]:
+    return [
+        {**dict(linha), "taxa_erros": linha["erros"] / linha["tentativas"] if linha["tentativas"] else 0.0}
+        for linha in linhas
+    ]
+
+
+class HistoricoTentativas:
+    """
+    Grava as tentativas de todas as sessões. `registrar` só põe a tentativa numa
+    fila (nunca espera o disco); uma thread a grava em lotes de até
+    `tamanho_lote`, uma transação por lote, juntando o que chegar em
+    `intervalo_s`. Com a fila cheia, a tentativa é descartada e contada.
+
+    As consultas usam uma conexão de leitura por thread: no modo WAL, ler não
+    espera a gravação em andamento.
+    """
+    def __init__(self, caminho: str = ARQUIVO_HISTORICO, tamanho_lote: int = TAMANHO_LOTE_HISTORICO,
+                 intervalo_s: float = INTERVALO_LOTE_HISTORICO_S, max_pendentes: int = MAX_TENTATIVAS_PENDENTES):
+        self.caminho = caminho
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.gravadas = 0
+        self.descartadas = 0
+        self._fila: queue.Queue[Tentativa | None] = queue.Queue(maxsize=max_pendentes)
+        self._leitura = threading.local()
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def registrar(self, tentativa: Tentativa) -> bool:
+        """Enfileira a tentativa para gravação; False se a fila estava cheia."""
+        with self._trava:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._gravar, name="HistoricoTentativas", daemon=True)
+                self._thread.start()
+        try:
+            self._fila.put_nowait(tentativa)
+            return True
+        except queue.Full:
+            with self._trava:
+                self.descartadas += 1
+            print(f"Histórico sobrecarregado: tentativa de '{tentativa.aluno}' ({tentativa.palavra}) descartada.")
+            return False
+
+    def encerrar(self):
+        """Grava o que ainda estiver na fila e para a thread."""
+        with self._trava:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._fila.put(None)
+            thread.join()
+
+    def taxa_erros_por_aluno(self, nivel: str | None = None) -> list[dict]:
+        """Tentativas, erros e taxa de erros de cada aluno (em um nível ou em todos)."""
+        filtro, parametros = ("WHERE nivel = ?", (normalizar_nivel(nivel),)) if nivel else ("", ())
+        return _taxas(self._consultar(
+            f"SELECT aluno, COUNT(*) AS tentativas, SUM(acertou = 0) AS erros "
+            f"FROM tentativas {filtro} GROUP BY aluno ORDER BY aluno", parametros
+        ))
+
+    def taxa_erros_por_palavra(self, nivel: str | None = None, aluno: str | None = None, limite: int = 20) -> list[dict]:
+        """As palavras mais erradas (em um nível e/ou por um aluno), da maior taxa de erros para a menor."""
+        condicoes, parametros = [], []
+        for coluna, valor in (("aluno", aluno), ("nivel", nivel and normalizar_nivel(nivel))):
+            if valor:
+                condicoes.append(f"{coluna} = ?")
+                parametros.append(valor)
+        filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        return _taxas(self._consultar(
+            f"SELECT palavra, COUNT(*) AS tentativas, SUM(acertou = 0) AS erros "
+            f"FROM tentativas {filtro} GROUP BY palavra "
+            f"ORDER BY CAST(SUM(acertou = 0) AS REAL) / COUNT(*) DESC, COUNT(*) DESC LIMIT ?",
+            (*parametros, limite)
+        ))
+
+    def tentativas_do_aluno(self, aluno: str, limite: int = 50) -> list[dict]:
+        """As últimas tentativas de um aluno, da mais recente para a mais antiga."""
+        linhas = self._consultar(
+            "SELECT momento, sessao, nivel, palavra, soletracao, tempos_letras, confiancas, confianca_media, "
+            "segundos_por_letra, acertou "
+            "FROM tentativas WHERE aluno = ? ORDER BY id DESC LIMIT ?", (aluno, limite)
+        )
+        return [
+            {**dict(linha), "tempos_letras": json.loads(linha["tempos_letras"]),
+             "confiancas": json.loads(linha["confiancas"]), "acertou": bool(linha["acertou"])}
+            for linha in linhas
+        ]
+
+    def estatisticas_palavras(self, aluno: str, nivel: str) -> list[dict]:
+        """
+        Por palavra de um nível: tentativas e erros do aluno e seus segundos médios
+        por letra (nas `com_tempo` tentativas em que houve letras).
+        """
+        return [dict(linha) for linha in self._consultar(
+            "SELECT palavra, COUNT(*) AS tentativas, SUM(acertou = 0) AS erros, "
+            "AVG(segundos_por_letra) AS segundos_por_letra, COUNT(segundos_por_letra) AS com_tempo "
+            "FROM tentativas WHERE aluno = ? AND nivel = ? GROUP BY palavra", (aluno, normalizar_nivel(nivel))
+        )]
+
+    def _consultar(self, sql: str, parametros: tuple) -> list[sqlite3.Row]:
+        conexao = getattr(self._leitura, "conexao", None)
+        if conexao is None:
+            conexao = self._leitura.conexao = _abrir(self.caminho)
+        return conexao.execute(sql, parametros).fetchall()
+
+    def _gravar(self):
+        conexao = _abrir(self.caminho)
+        try:
+            encerrar = False
+            while not encerrar:
+                lote = [self._fila.get()]
+                limite = time.monotonic() + self.intervalo_s
+                while lote[-1] is not None and len(lote) < self.tamanho_lote:
+                    restante = limite - time.monotonic()
+                    try:
+                        lote.append(self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                # None pede para encerrar, depois de gravar o que veio antes
+                if lote[-1] is None:
+                    encerrar = True
+                    lote.pop()
+                if lote:
+                    self._gravar_lote(conexao, lote)
+        finally:
+            conexao.close()
+
+    def _gravar_lote(self, conexao: sqlite3.Connection, lote: list[Tentativa]):
+        linhas = [
+            (t.momento, t.sessao, t.aluno, t.nivel, t.palavra, t.soletracao,
+             json.dumps(t.tempos_letras), json.dumps(t.confiancas),
+             sum(t.confiancas) / len(t.confiancas) if t.confiancas else None,
+             t.tempos_letras[-1] / len(t.tempos_letras) if t.tempos_letras else None, int(t.acertou))
+            for t in lote
+        ]
+        try:
+            with conexao:
+                conexao.executemany(
+                    "INSERT INTO tentativas (momento, sessao, aluno, nivel, palavra, soletracao, tempos_letras, "
+                    "confiancas, confianca_media, segundos_por_letra, acertou) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    linhas
+                )
+            with self._trava:
+                self.gravadas += len(lote)
+        except sqlite3.Error as e:
+            with self._trava:
+                self.descartadas += len(lote)
+            print(f"Falha ao gravar {len(lote)} tentativas no histórico: {e}")
+
+
+if __name__ == "__main__":
+    # Custo do registro no caminho da requisição e das consultas do painel, com 100k tentativas
+    import os
+    import random
+    import tempfile
+
+    rng = random.Random(0)
+    palavras = [f"palavra{i}" for i in range(500)]
+    alunos = [f"aluno{i}" for i in range(30)]
+    with tempfile.TemporaryDirectory() as diretorio:
+        historico = HistoricoTentativas(os.path.join(diretorio, "historico.db"), max_pendentes=200_000)
+        tentativas = [
+            Tentativa("sessao", rng.choice(alunos), rng.choice(["1_ano", "2_ano"]), palavra := rng.choice(palavras),
+                      palavra, tuple(0.5 * i for i in range(len(palavra))), (90,) * len(palavra), rng.random() < 0.7)
+            for _ in range(100_000)
+        ]
+
+        inicio = time.perf_counter()
+        for tentativa in tentativas:
+            historico.registrar(tentativa)
+        decorrido = time.perf_counter() - inicio
+        print(f"registrar: {decorrido / len(tentativas) * 1e6:.1f} µs por tentativa")
+        inicio = time.perf_counter()
+        historico.encerrar()
+        print(f"gravação de {historico.gravadas} tentativas em lotes: {time.perf_counter() - inicio:.2f} s")
+
+        conexao = sqlite3.connect(os.path.join(diretorio, "direto.db"))
+        conexao.executescript(ESQUEMA)
+        inicio = time.perf_counter()
+        for tentativa in tentativas[:200]:
+            with conexao:
+                conexao.execute("INSERT INTO tentativas (momento, sessao, aluno, nivel, palavra, soletracao, "
+                                "tempos_letras, confiancas, acertou) VALUES (?, '', ?, ?, ?, ?, '[]', '[]', ?)",
+                                (tentativa.momento, tentativa.aluno, tentativa.nivel, tentativa.palavra,
+                                 tentativa.soletracao, tentativa.acertou))
+        print(f"INSERT síncrono (journal padrão): {(time.perf_counter() - inicio) / 200 * 1e6:.0f} µs por tentativa")
+        conexao.close()
+
+        for nome, consulta in (
+            ("por aluno", lambda: historico.taxa_erros_por_aluno()),
+            ("por aluno, um nível", lambda: historico.taxa_erros_por_aluno("1_ano")),
+            ("palavras, um nível", lambda: historico.taxa_erros_por_palavra("1_ano")),
+            ("palavras de um aluno", lambda: historico.taxa_erros_por_palavra(aluno="aluno3")),
+            ("últimas de um aluno", lambda: historico.tentativas_do_aluno("aluno3")),
+        ):
+            consulta()
+            inicio = time.perf_counter()
+            consulta()
+            print(f"{nome:22s} {(time.perf_counter() - inicio) * 1000:7.2f} ms")
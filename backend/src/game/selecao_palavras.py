@@ -0,0 +1,194 @@
+"""
+Módulo da seleção adaptativa de palavras: o sorteio favorece as palavras em que
+o aluno mais erra ou demora, com pesos numa árvore de Fenwick (O(log n) por
+sorteio e por ajuste de peso).
+
+Benchmark e distribuição do sorteio (a partir de backend/src):
+    python -m game.selecao_palavras
+"""
+import random
+import numpy as np
+
+from config.settings import (
+    PESO_ERRO_PALAVRA, PESO_LENTIDAO_PALAVRA, SEGUNDOS_POR_LETRA_REFERENCIA, PESO_MINIMO_PALAVRA
+)
+from game.catalogo_palavras import ListaNivel
+
+
+class ArvoreFenwick:
+    """Pesos com soma de prefixos e atualização em O(log n); `buscar` acha o item de uma posição acumulada."""
+    def __init__(self, pesos):
+        pesos = np.asarray(pesos, dtype=np.float64)
+        self.n = len(pesos)
+        self.pesos: list[float] = pesos.tolist()
+        self.total = float(pesos.sum())
+        # Construção em O(n): o nó i (base 1) guarda a soma de (i - lowbit(i), i]
+        acumulado = np.concatenate(([0.0], np.cumsum(pesos)))
+        i = np.arange(1, self.n + 1)
+        self._arvore: list[float] = (acumulado[i] - acumulado[i - (i & -i)]).tolist()
+        self._passo_inicial = 1 << (self.n.bit_length() - 1) if self.n else 0
+
+    def atualizar(self, indice: int, peso: float):
+        delta = peso - self.pesos[indice]
+        self.pesos[indice] = peso
+        self.total += delta
+        j = indice + 1
+        while j <= self.n:
+            self._arvore[j - 1] += delta
+            j += j & -j
+
+    def buscar(self, alvo: float) -> int:
+        """O índice i com soma(pesos[:i]) <= alvo < soma(pesos[:i+1]); itens de peso zero nunca são achados."""
+        posicao, passo = 0, self._passo_inicial
+        while passo:
+            proxima = posicao + passo
+            if proxima <= self.n and self._arvore[proxima - 1] <= alvo:
+                posicao = proxima
+                alvo -= self._arvore[proxima - 1]
+            passo >>= 1
+        return min(posicao, self.n - 1)
+
+
+class SorteioPonderado:
+    """
+    Sorteio sem repetição com pesos: cada item sai com probabilidade
+    proporcional ao seu peso entre os que ainda não saíram. Mesma interface
+    de PermutacaoAleatoria (um iterador de índices).
+    """
+    def __init__(self, pesos, rng: random.Random | None = None):
+        self.arvore = ArvoreFenwick(pesos)
+        self.rng = rng or random.Random()
+        self.restantes = sum(1 for peso in self.arvore.pesos if peso > 0)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> int:
+        if self.restantes == 0:
+            raise StopIteration
+        indice = self.arvore.buscar(self.rng.random() * self.arvore.total)
+        if self.arvore.pesos[indice] <= 0:
+            # Erro de arredondamento acumulado nas somas: reconstrói a árvore com os pesos exatos
+            self.arvore = ArvoreFenwick(self.arvore.pesos)
+            indice = self.arvore.buscar(self.rng.random() * self.arvore.total)
+            if self.arvore.pesos[indice] <= 0:
+                # O alvo passou do último item com peso (arredondamento na soma): fica com o vizinho que tem peso
+                indice = self._vizinho_com_peso(indice)
+        self.arvore.atualizar(indice, 0.0)
+        self.restantes -= 1
+        return indice
+
+    def _vizinho_com_peso(self, indice: int) -> int:
+        """O item de peso positivo mais próximo antes de `indice` (ou depois, se não houver)."""
+        pesos = self.arvore.pesos
+        for i in range(indice, -1, -1):
+            if pesos[i] > 0:
+                return i
+        return next(i for i in range(indice + 1, len(pesos)) if pesos[i] > 0)
+
+    def ajustar(self, indice: int, peso: float, reinserir: bool = False):
+        """
+        Muda o peso de um item que ainda não saiu. Com `reinserir`, um item que
+        já saiu volta ao sorteio com esse peso.
+        """
+        if self.arvore.pesos[indice] <= 0:
+            if not reinserir:
+                return
+            self.restantes += 1
+        self.arvore.atualizar(indice, max(peso, PESO_MINIMO_PALAVRA))
+
+
+class EstatisticasPalavras:
+    """
+    Desempenho de um aluno nas palavras de um nível: carregado uma vez do
+    histórico e atualizado a cada tentativa, sem reler o histórico.
+    """
+    def __init__(self, linhas=()):
+        # palavra -> [tentativas, erros, soma dos segundos por letra, tentativas com tempo]
+        self._palavras: dict[str, list] = {}
+        for linha in linhas:
+            com_tempo = linha["com_tempo"]
+            self._palavras[linha["palavra"]] = [
+                linha["tentativas"], linha["erros"], (linha["segundos_por_letra"] or 0.0) * com_tempo, com_tempo
+            ]
+
+    def __len__(self):
+        return len(self._palavras)
+
+    def registrar(self, palavra: str, acertou: bool, segundos_por_letra: float | None = None):
+        estatistica = self._palavras.setdefault(palavra, [0, 0, 0.0, 0])
+        estatistica[0] += 1
+        estatistica[1] += not acertou
+        if segundos_por_letra is not None:
+            estatistica[2] += segundos_por_letra
+            estatistica[3] += 1
+
+    def peso(self, palavra: str) -> float:
+        """
+        1 para uma palavra nunca jogada; cada erro aumenta o peso e cada acerto o
+        divide (a palavra dominada quase não volta). Demorar mais que a
+        referência por letra também aumenta o peso.
+        """
+        estatistica = self._palavras.get(palavra)
+        if estatistica is None:
+            return 1.0
+        tentativas, erros, soma_segundos, com_tempo = estatistica
+        peso = (1 + PESO_ERRO_PALAVRA * erros) / (1 + tentativas - erros)
+        if com_tempo:
+            lentidao = soma_segundos / com_tempo / SEGUNDOS_POR_LETRA_REFERENCIA
+            peso *= 1 + PESO_LENTIDAO_PALAVRA * max(lentidao - 1, 0)
+        return max(peso, PESO_MINIMO_PALAVRA)
+
+    def pesos(self, lista: ListaNivel) -> np.ndarray:
+        """Os pesos de todas as palavras da lista: O(n) para preencher, mais as palavras com histórico."""
+        pesos = np.ones(len(lista), dtype=np.float64)
+        for palavra in self._palavras:
+            indice = lista.posicoes.get(palavra)
+            if indice is not None:
+                pesos[indice] = self.peso(palavra)
+        return pesos
+
+
+if __name__ == "__main__":
+    # Custo do sorteio ponderado (Fenwick x recalcular a distribuição a cada sorteio)
+    # e quanto as palavras difíceis aparecem antes no sorteio
+    import time
+
+    rng = random.Random(0)
+    for n in (1_000, 100_000):
+        pesos = [rng.uniform(0.05, 5) for _ in range(n)]
+        inicio = time.perf_counter()
+        sorteio = SorteioPonderado(pesos, random.Random(1))
+        construcao = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            next(sorteio)
+        fenwick = (time.perf_counter() - inicio) / 1000
+
+        restantes = list(pesos)
+        inicio = time.perf_counter()
+        for _ in range(20):
+            indice = rng.choices(range(n), weights=restantes)[0]
+            restantes[indice] = 0.0
+        ingenuo = (time.perf_counter() - inicio) / 20
+        print(f"n={n:7d}: construção {construcao * 1000:6.1f} ms, sorteio {fenwick * 1e6:6.1f} µs "
+              f"(recalculando os pesos: {ingenuo * 1e6:8.0f} µs)")
+
+    # 100 palavras, das quais 10 o aluno errou duas vezes e 10 acertou três vezes
+    palavras = [f"p{i}" for i in range(100)]
+    lista = ListaNivel("teste", tuple(palavras), (0, 0), {}, {}, {})
+    estatisticas = EstatisticasPalavras()
+    for palavra in palavras[:10]:
+        estatisticas.registrar(palavra, False, 3.0)
+        estatisticas.registrar(palavra, False, 3.0)
+    for palavra in palavras[10:20]:
+        for _ in range(3):
+            estatisticas.registrar(palavra, True, 1.0)
+    dificeis = faceis = 0
+    for semente in range(2000):
+        sorteio = SorteioPonderado(estatisticas.pesos(lista), random.Random(semente))
+        primeiras = [next(sorteio) for _ in range(10)]
+        dificeis += sum(indice < 10 for indice in primeiras)
+        faceis += sum(10 <= indice < 20 for indice in primeiras)
+    print(f"Nas 10 primeiras palavras: {dificeis / 2000:.1f} das difíceis, {faceis / 2000:.2f} das dominadas "
+          f"(sorteio uniforme: 1.0 de cada)")
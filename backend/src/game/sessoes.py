@@ -0,0 +1,147 @@
+"""Módulo do Gerenciador de Sessões, que isola o estado de cada partida."""
+import threading
+import time
+from collections import OrderedDict
+
+from config.settings import MAX_SESSOES, TTL_SESSAO_SEGUNDOS
+from game.eventos import BarramentoEventos
+from game.catalogo_palavras import CatalogoPalavras
+from game.estado_jogo import EstadoJogo
+from game.gerenciador_jogo import GerenciadorJogo, descrever_estado
+from game.historico import HistoricoTentativas
+from services.pool_nao import PoolConexoesNAO
+
+
+class LimiteSessoesAtingido(Exception):
+    """Não há vaga para uma nova sessão: todas as existentes estão em uso."""
+
+
+class GerenciadorSessoes:
+    """
+    Mantém um GerenciadorJogo por sessão. Sessões inativas expiram por TTL
+    e, ao atingir o limite, a menos usada recentemente é descartada (LRU).
+    Sessões em uso (com o NAO conectado ou com clientes, segundo `em_uso`)
+    nunca são descartadas: sem outra vaga, a nova sessão é recusada.
+
+    Só as rotas que mudam o jogo criam sessões (`obter`); as leituras usam
+    `procurar` ou `obter_estado`, para que um ?sessao= qualquer não ocupe vaga.
+    """
+
+    def __init__(self, max_sessoes: int = MAX_SESSOES, ttl_segundos: float = TTL_SESSAO_SEGUNDOS):
+        self.max_sessoes = max_sessoes
+        self.ttl_segundos = ttl_segundos
+        # Ordenado do menos para o mais recentemente usado: sessao_id -> (jogo, último acesso)
+        self.sessoes: OrderedDict[str, tuple[GerenciadorJogo, float]] = OrderedDict()
+        self.lock = threading.Lock()
+        # Barramento compartilhado: cada jogo publica seus eventos aqui
+        self.barramento = BarramentoEventos()
+        # Pool compartilhado: uma conexão por robô, mesmo que várias sessões o usem
+        self.pool_nao = PoolConexoesNAO()
+        # Catálogo compartilhado: as listas de palavras são lidas uma vez, no início
+        self.catalogo = CatalogoPalavras()
+        # Histórico compartilhado: uma fila e uma thread de gravação para todas as sessões
+        self.historico = HistoricoTentativas()
+        # em_uso(sessao_id) -> bool: se a sessão tem clientes conectados (definido pela API)
+        self.em_uso: callable = None
+
+    def obter(self, sessao_id: str) -> GerenciadorJogo:
+        """
+        Retorna o jogo da sessão, criando-o se ainda não existir. Levanta
+        LimiteSessoesAtingido se não houver vaga sem descartar um jogo em uso.
+        """
+        agora = time.monotonic()
+        descartados = []
+        with self.lock:
+            if sessao_id in self.sessoes:
+                jogo, _ = self.sessoes[sessao_id]
+                self.sessoes.move_to_end(sessao_id)
+            else:
+                if len(self.sessoes) >= self.max_sessoes:
+                    antigo_id = next((s for s, (j, _) in self.sessoes.items() if not self._em_uso(s, j)), None)
+                    if antigo_id is None:
+                        raise LimiteSessoesAtingido(f"Todas as {self.max_sessoes} sessões estão em uso.")
+                    descartados.append(self.sessoes.pop(antigo_id)[0])
+                jogo = GerenciadorJogo(sessao_id=sessao_id, barramento=self.barramento, pool_nao=self.pool_nao,
+                                       catalogo=self.catalogo, historico=self.historico)
+            self.sessoes[sessao_id] = (jogo, agora)
+
+        # Encerrar um jogo pode esperar o robô terminar de falar: não segura quem chamou
+        for antigo in descartados:
+            threading.Thread(target=self._encerrar, args=(antigo,), daemon=True).start()
+        return jogo
+
+    def procurar(self, sessao_id: str) -> GerenciadorJogo | None:
+        """Retorna o jogo da sessão (renovando seu último acesso), sem criá-lo."""
+        with self.lock:
+            item = self.sessoes.get(sessao_id)
+            if item is None:
+                return None
+            self.sessoes[sessao_id] = (item[0], time.monotonic())
+            self.sessoes.move_to_end(sessao_id)
+            return item[0]
+
+    def obter_estado(self, sessao_id: str) -> dict:
+        """O estado da sessão para a interface; o de um jogo novo se ela ainda não existe."""
+        jogo = self.procurar(sessao_id)
+        return jogo.obter_estado() if jogo else descrever_estado(EstadoJogo())
+
+    def existe(self, sessao_id: str) -> bool:
+        """Indica se a sessão está ativa, sem renovar seu último acesso."""
+        with self.lock:
+            return sessao_id in self.sessoes
+
+    def remover(self, sessao_id: str):
+        """Encerra e descarta uma sessão."""
+        with self.lock:
+            item = self.sessoes.pop(sessao_id, None)
+        if item:
+            self._encerrar(item[0])
+
+    def expirar_inativas(self) -> list[str]:
+        """Descarta as sessões sem acesso há mais de `ttl_segundos` (as em uso contam como acessadas)."""
+        agora = time.monotonic()
+        limite = agora - self.ttl_segundos
+        expiradas = []
+        with self.lock:
+            # As sessões estão em ordem de acesso, então basta olhar o início
+            while self.sessoes:
+                sessao_id, (jogo, ultimo_acesso) = next(iter(self.sessoes.items()))
+                if ultimo_acesso > limite:
+                    break
+                if self._em_uso(sessao_id, jogo):
+                    self.sessoes[sessao_id] = (jogo, agora)
+                    self.sessoes.move_to_end(sessao_id)
+                    continue
+                self.sessoes.popitem(last=False)
+                expiradas.append((sessao_id, jogo))
+
+        for _, jogo in expiradas:
+            self._encerrar(jogo)
+        return [sessao_id for sessao_id, _ in expiradas]
+
+    def encerrar_todas(self):
+        """Encerra todas as sessões (usado no desligamento do servidor)."""
+        with self.lock:
+            jogos = [jogo for jogo, _ in self.sessoes.values()]
+            self.sessoes.clear()
+        for jogo in jogos:
+            self._encerrar(jogo)
+        self.pool_nao.encerrar()
+        self.historico.encerrar()
+
+    def _em_uso(self, sessao_id: str, jogo: GerenciadorJogo) -> bool:
+        return jogo.comandos_nao is not None or (self.em_uso is not None and self.em_uso(sessao_id))
+
+    def _encerrar(self, jogo: GerenciadorJogo):
+        """Libera microfone e robô de um jogo descartado."""
+        try:
+            if jogo.comandos_nao:
+                jogo.desconectar_nao()
+            else:
+                jogo.parar_escuta_voz()
+        except Exception as e:
+            print(f"Erro ao encerrar a sessão '{jogo.sessao_id}': {e}")
+
+    def __len__(self):
+        with self.lock:
+            return len(self.sessoes)
@@ -0,0 +1,84 @@
+"""Módulo do buffer circular de áudio multicanal."""
+import threading
+import numpy as np
+
+
+class BufferCircular:
+    """
+    Buffer circular pré-alocado, com formato (canais, capacidade), para um
+    produtor (o callback de áudio) e um consumidor (a thread de processamento).
+
+    A escrita nunca bloqueia: se o consumidor atrasar mais que `capacidade`
+    amostras, o áudio mais antigo é sobrescrito e contado em `transbordos`.
+    """
+    def __init__(self, canais: int, capacidade: int, dtype=np.int16):
+        self.canais = canais
+        self.capacidade = capacidade
+        self.dados = np.zeros((canais, capacidade), dtype=dtype)
+        self.escritos = 0  # total de amostras (por canal) já escritas
+        self.lidos = 0     # total de amostras (por canal) já consumidas
+        self.transbordos = 0
+        self._condicao = threading.Condition()
+
+    def escrever(self, amostras: np.ndarray):
+        """Escreve um bloco com formato (canais, n)."""
+        n = amostras.shape[1]
+        if n > self.capacidade:
+            amostras = amostras[:, -self.capacidade:]
+            self.transbordos += n - self.capacidade
+            n = self.capacidade
+
+        with self._condicao:
+            inicio = self.escritos % self.capacidade
+            primeira_parte = min(n, self.capacidade - inicio)
+            self.dados[:, inicio:inicio + primeira_parte] = amostras[:, :primeira_parte]
+            self.dados[:, :n - primeira_parte] = amostras[:, primeira_parte:]
+            self.escritos += n
+
+            atraso = self.escritos - self.lidos
+            if atraso > self.capacidade:
+                self.transbordos += atraso - self.capacidade
+                self.lidos = self.escritos - self.capacidade
+            self._condicao.notify()
+
+    def escrever_intercalado(self, buffer_bruto: bytes, canais: int):
+        """Desintercala um buffer bruto (amostras intercaladas por canal) direto no anel."""
+        intercalado = np.frombuffer(buffer_bruto, dtype=self.dados.dtype)
+        self.escrever(intercalado.reshape(-1, canais).T)
+
+    def disponiveis(self) -> int:
+        with self._condicao:
+            return self.escritos - self.lidos
+
+    def ler(self, max_amostras: int | None = None, timeout: float | None = None,
+            min_amostras: int = 1, saida: np.ndarray | None = None) -> np.ndarray | None:
+        """
+        Consome e retorna as amostras ainda não lidas, com formato (canais, n).
+        Espera até `timeout` segundos por pelo menos `min_amostras`; retorna None
+        se não houver. Com `saida` (canais, m), copia para ela (n <= m) e retorna
+        uma view, sem alocar; sem ela, retorna uma cópia nova.
+        """
+        with self._condicao:
+            if self.escritos - self.lidos < min_amostras:
+                self._condicao.wait_for(lambda: self.escritos - self.lidos >= min_amostras, timeout)
+            n = self.escritos - self.lidos
+            if max_amostras is not None:
+                n = min(n, max_amostras)
+            if saida is not None:
+                n = min(n, saida.shape[1])
+            if n < min_amostras or n <= 0:
+                return None
+
+            inicio = self.lidos % self.capacidade
+            primeira_parte = min(n, self.capacidade - inicio)
+            if saida is None:
+                saida = np.empty((self.canais, n), dtype=self.dados.dtype)
+            saida[:, :primeira_parte] = self.dados[:, inicio:inicio + primeira_parte]
+            saida[:, primeira_parte:n] = self.dados[:, :n - primeira_parte]
+            self.lidos += n
+            return saida[:, :n]
+
+    def limpar(self):
+        with self._condicao:
+            self.lidos = self.escritos
+            self.transbordos = 0
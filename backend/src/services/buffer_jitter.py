@@ -0,0 +1,153 @@
+"""Módulo do buffer de jitter indexado por tempo, para alinhar fontes de áudio distintas."""
+import threading
+import time
+import numpy as np
+
+CAPACIDADE_S = 2.0
+TOLERANCIA_S = 0.004
+
+
+class BufferJitter:
+    """
+    Buffer circular pré-alocado em que cada amostra tem um índice absoluto numa
+    linha do tempo local (amostras desde a época do `time.monotonic`).
+
+    O timestamp de cada bloco, no relógio da própria fonte, é convertido para
+    essa linha do tempo com um deslocamento fixado no primeiro bloco. Assim,
+    blocos perdidos viram lacunas (preenchidas com zeros) e blocos repetidos
+    são descartados, em vez de desalinharem todo o resto do stream.
+
+    Contadores (em amostras):
+        lacunas       -- buracos entre blocos, preenchidos com silêncio
+        sobreposicoes -- amostras recebidas de novo e descartadas
+        transbordos   -- amostras sobrescritas antes de serem lidas
+        subfluxos     -- amostras pedidas que ainda não tinham chegado
+    """
+    def __init__(self, taxa_amostragem: int, canais: int = 1, capacidade_s: float = CAPACIDADE_S,
+                 tolerancia_s: float = TOLERANCIA_S, dtype=np.int16):
+        self.taxa_amostragem = taxa_amostragem
+        self.canais = canais
+        self.capacidade = int(taxa_amostragem * capacidade_s)
+        self.tolerancia = int(taxa_amostragem * tolerancia_s)
+        self.dados = np.zeros((canais, self.capacidade), dtype=dtype)
+        self._condicao = threading.Condition()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._condicao:
+            self._deslocamento: float | None = None
+            self.inicio: int | None = None  # índice absoluto da amostra mais antiga retida
+            self.fim: int | None = None     # índice absoluto logo após a última amostra escrita
+            self.lido_ate: int | None = None
+            self.lacunas = 0
+            self.sobreposicoes = 0
+            self.transbordos = 0
+            self.subfluxos = 0
+
+    @property
+    def iniciado(self) -> bool:
+        return self.fim is not None
+
+    def escrever(self, amostras: np.ndarray, timestamp_s: float | None = None):
+        """
+        Escreve um bloco (canais, n) ou (n,) cuja primeira amostra foi capturada em
+        `timestamp_s` no relógio da fonte (None: usa a hora de chegada).
+        """
+        amostras = amostras.reshape(self.canais, -1)
+        n = amostras.shape[1]
+        if n == 0:
+            return
+        agora = time.monotonic() * self.taxa_amostragem
+
+        with self._condicao:
+            if timestamp_s is None:
+                posicao = agora - n
+            else:
+                if self._deslocamento is None:
+                    # O fim do primeiro bloco corresponde ao instante de chegada
+                    self._deslocamento = agora - n - timestamp_s * self.taxa_amostragem
+                posicao = timestamp_s * self.taxa_amostragem + self._deslocamento
+            posicao = int(round(posicao))
+
+            if self.fim is None:
+                self.inicio = self.fim = self.lido_ate = posicao
+
+            desvio = posicao - self.fim
+            if abs(desvio) <= self.tolerancia:
+                desvio = 0
+            if desvio < 0:
+                descarte = min(-desvio, n)
+                self.sobreposicoes += descarte
+                amostras = amostras[:, descarte:]
+                n -= descarte
+                if n == 0:
+                    return
+            elif desvio > 0:
+                self.lacunas += desvio
+                self._escrever_continuo(None, desvio)
+
+            self._escrever_continuo(amostras, n)
+            self._condicao.notify_all()
+
+    def _escrever_continuo(self, amostras: np.ndarray | None, n: int):
+        """Escreve `n` amostras no fim do anel; `amostras` None escreve silêncio (lacunas)."""
+        k = min(n, self.capacidade)
+        pos = (self.fim + n - k) % self.capacidade
+        primeira = min(k, self.capacidade - pos)
+        if amostras is None:
+            self.dados[:, pos:pos + primeira] = 0
+            self.dados[:, :k - primeira] = 0
+        else:
+            amostras = amostras[:, amostras.shape[1] - k:]
+            self.dados[:, pos:pos + primeira] = amostras[:, :primeira]
+            self.dados[:, :k - primeira] = amostras[:, primeira:]
+
+        self.fim += n
+        novo_inicio = max(self.inicio, self.fim - self.capacidade)
+        if novo_inicio > self.lido_ate:
+            self.transbordos += novo_inicio - self.lido_ate
+            self.lido_ate = novo_inicio
+        self.inicio = novo_inicio
+
+    def ler(self, inicio: int, n: int, saida: np.ndarray | None = None) -> np.ndarray:
+        """
+        Retorna as amostras [inicio, inicio + n) com formato (canais, n). Trechos
+        que ainda não chegaram (ou já foram sobrescritos) saem como zeros. Com
+        `saida` (canais, n), escreve nela em vez de alocar uma cópia nova.
+        """
+        if saida is None:
+            saida = np.empty((self.canais, n), dtype=self.dados.dtype)
+        with self._condicao:
+            if self.fim is None:
+                self.subfluxos += n
+                saida[:] = 0
+                return saida
+            de, ate = max(inicio, self.inicio), min(inicio + n, self.fim)
+            if ate > de:
+                pos = de % self.capacidade
+                k = ate - de
+                primeira = min(k, self.capacidade - pos)
+                saida[:, :de - inicio] = 0
+                saida[:, de - inicio:de - inicio + primeira] = self.dados[:, pos:pos + primeira]
+                saida[:, de - inicio + primeira:ate - inicio] = self.dados[:, :k - primeira]
+                saida[:, ate - inicio:] = 0
+            else:
+                saida[:] = 0
+            faltando = max(0, inicio + n - self.fim)
+            self.subfluxos += faltando
+            self.lido_ate = max(self.lido_ate, min(inicio + n, self.fim))
+        return saida
+
+    def esperar_ate(self, indice: int, timeout: float) -> bool:
+        """Espera até que as amostras anteriores a `indice` tenham chegado."""
+        with self._condicao:
+            return self._condicao.wait_for(lambda: self.fim is not None and self.fim >= indice, timeout)
+
+    def contadores(self) -> dict[str, int]:
+        with self._condicao:
+            return {
+                "lacunas": self.lacunas,
+                "sobreposicoes": self.sobreposicoes,
+                "transbordos": self.transbordos,
+                "subfluxos": self.subfluxos,
+            }
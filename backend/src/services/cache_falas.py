@@ -0,0 +1,156 @@
+"""
+Módulo do cache de falas pré-renderizadas no NAO: o texto é sintetizado uma vez
+(ALTextToSpeech.sayToFile) e depois só tocado (ALAudioPlayer.playFile), sem
+esperar a síntese a cada rodada.
+
+Benchmark do tempo até o primeiro áudio, com o NAO simulado (a partir de backend/src):
+    python -m services.cache_falas
+"""
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from config.settings import DIRETORIO_CACHE_FALAS_NAO
+from services.conexao_nao import ConexaoNAO
+from services.despachante_nao import DespachanteNAO
+
+# Índice das falas já renderizadas, no ALMemory do robô: sobrevive ao reinício do
+# backend (e some no reinício do robô, quando o cache é refeito)
+CHAVE_MEMORIA_CACHE = "Soletrando/CacheFalas"
+MAX_RENDERIZACOES_PENDENTES = 512
+
+
+def chave_fala(texto: str, idioma: str) -> str:
+    """Endereço de uma fala: o hash do idioma e do texto."""
+    return hashlib.sha256(f"{idioma}\0{texto}".encode("utf-8")).hexdigest()[:32]
+
+
+class CacheFalasNAO:
+    """
+    Falas pré-renderizadas no disco do robô, endereçadas pelo conteúdo: a fala de
+    um texto fica em `<diretorio>/<chave_fala(texto)>.wav`, então várias sessões
+    podem renderizar o mesmo texto sem conflito e textos diferentes nunca colidem.
+
+    `aquecer` renderiza, em segundo plano, o que ainda não está no cache; `tocar`
+    toca uma fala renderizada ou retorna False, e o chamador fala ao vivo.
+    """
+    def __init__(self, conexao: ConexaoNAO, idioma: str = "Brazilian", diretorio: str = DIRETORIO_CACHE_FALAS_NAO):
+        self.conexao = conexao
+        self.idioma = idioma
+        self.diretorio = diretorio
+        self.acertos = 0
+        self.faltas = 0
+        # Renderizar usa o sintetizador do robô: uma fala por vez, fora do caminho da fala ao vivo
+        self.despachante = DespachanteNAO("cache-falas", max_pendentes=MAX_RENDERIZACOES_PENDENTES)
+        self._renderizadas: set[str] = set()
+        self._pendentes: dict[str, Future] = {}
+        self._geracao = None
+        self._trava = threading.Lock()
+
+    def caminho(self, texto: str) -> str:
+        return f"{self.diretorio}/{chave_fala(texto, self.idioma)}.wav"
+
+    def aquecer(self, textos) -> list[Future]:
+        """Enfileira a renderização dos textos que ainda não estão no cache, na ordem dada."""
+        self._carregar_indice()
+        futuros = []
+        with self._trava:
+            for texto in textos:
+                chave = chave_fala(texto, self.idioma)
+                if chave in self._renderizadas:
+                    continue
+                futuro = self._pendentes.get(chave)
+                if futuro is None or futuro.done():
+                    futuro = self._pendentes[chave] = self.despachante.enviar(self._renderizar, texto, chave)
+                futuros.append(futuro)
+        return futuros
+
+    def tocar(self, texto: str) -> bool:
+        """Toca a fala, se já renderizada (bloqueia até o fim, como o say). False: falta no cache."""
+        self._carregar_indice()
+        chave = chave_fala(texto, self.idioma)
+        player = self.conexao.obter_servico("ALAudioPlayer")
+        with self._trava:
+            renderizada = chave in self._renderizadas
+        if not renderizada or player is None:
+            self.faltas += 1
+            self.aquecer([texto])
+            return False
+        try:
+            player.playFile(self.caminho(texto))
+        except Exception as e:
+            # O arquivo sumiu do robô (ou o player falhou): renderiza de novo para a próxima vez
+            print(f"Falha ao tocar a fala em cache, falando ao vivo: {e}")
+            with self._trava:
+                self._renderizadas.discard(chave)
+            self.faltas += 1
+            self.aquecer([texto])
+            return False
+        self.acertos += 1
+        return True
+
+    def interromper(self):
+        player = self.conexao.obter_servico("ALAudioPlayer")
+        if player:
+            player.stopAll()
+
+    def encerrar(self):
+        """Descarta as renderizações pendentes; as já feitas continuam no robô."""
+        self.despachante.encerrar(esperar=False)
+
+    def _renderizar(self, texto: str, chave: str):
+        tts = self.conexao.obter_servico("ALTextToSpeech")
+        memoria = self.conexao.obter_servico("ALMemory")
+        if tts is None:
+            raise RuntimeError("Sem conexão com o NAO para renderizar a fala.")
+        tts.sayToFile(texto, self.caminho(texto))
+        with self._trava:
+            self._renderizadas.add(chave)
+            self._pendentes.pop(chave, None)
+            indice = sorted(self._renderizadas)
+        if memoria:
+            memoria.insertData(CHAVE_MEMORIA_CACHE, indice)
+
+    def _carregar_indice(self):
+        """Relê o índice do ALMemory a cada conexão nova (o robô pode ter reiniciado)."""
+        if self._geracao == self.conexao.geracao:
+            return
+        self._geracao = self.conexao.geracao
+        memoria = self.conexao.obter_servico("ALMemory")
+        try:
+            indice = memoria.getData(CHAVE_MEMORIA_CACHE) if memoria else []
+        except Exception:
+            # Chave ainda não existe: cache vazio neste robô
+            indice = []
+        with self._trava:
+            self._renderizadas = set(indice or [])
+
+
+if __name__ == "__main__":
+    # Tempo do dizer() até o robô começar a falar, ao vivo e pelo cache
+    import time
+    from services.comandos_nao import ComandosNAO
+    from services.simulador_nao import SessaoSimulada, SimuladorNAO
+
+    simulador = SimuladorNAO(latencia_s=0.02, palavra="")
+    conexao = ConexaoNAO(lambda: SessaoSimulada(simulador))
+    conexao.conectar("10.0.0.1")
+    comandos = ComandosNAO(conexao)
+    palavras = ["casa", "bola", "janela", "elefante", "borboleta"]
+    textos = [f"A palavra é: {palavra}" for palavra in palavras]
+
+    def primeiro_audio(texto: str) -> float:
+        antes = len(simulador.inicios_audio)
+        inicio = time.perf_counter()
+        comandos.dizer(texto).result()
+        return (simulador.inicios_audio[antes][0] - inicio) * 1000
+
+    ao_vivo = [primeiro_audio(texto) for texto in textos]
+    for futuro in comandos.aquecer_falas(textos):
+        futuro.result()
+    em_cache = [primeiro_audio(texto) for texto in textos]
+    print(f"Tempo até o primeiro áudio: ao vivo {sum(ao_vivo) / len(ao_vivo):6.1f} ms, "
+          f"em cache {sum(em_cache) / len(em_cache):6.1f} ms "
+          f"(acertos {comandos.cache_falas.acertos}, faltas {comandos.cache_falas.faltas})")
+    comandos.encerrar()
+    conexao.desconectar()
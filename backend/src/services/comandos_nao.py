@@ -1,74 +1,171 @@
 """Módulo que define os comandos de interação com o robô NAO."""
 import time
+import threading
+from concurrent.futures import Future
+from config.settings import CACHE_FALAS_NAO
+from services.cache_falas import CacheFalasNAO
 from services.conexao_nao import ConexaoNAO
-from services.reconhecimento_voz import VOCABULARIO_LETRAS, MAPA_LETRAS_REVERSO
-from thefuzz import process
+from services.despachante_nao import DespachanteNAO
+from services.metricas import DURACAO_COMANDOS_NAO
+from services.reconhecimento_voz import VOCABULARIO_LETRAS
+
+DURACAO_DIZER = DURACAO_COMANDOS_NAO.rotulado(comando="dizer")
+DURACAO_PISCAR_OLHOS = DURACAO_COMANDOS_NAO.rotulado(comando="piscar_olhos")
 
 class ComandosNAO:
-    """Encapsula os comandos para o robô NAO."""
+    """
+    Encapsula os comandos para o robô NAO.
+
+    Os comandos não bloqueiam quem os chama: cada recurso do robô (fala, LEDs,
+    movimento) tem seu próprio despachante, e os métodos retornam um Future.
+    Se a conexão for refeita, a configuração do robô é refeita no próximo comando.
+    As falas já renderizadas no robô (ver `aquecer_falas`) tocam sem esperar a síntese.
+    """
     def __init__(self, conexao: ConexaoNAO):
             self.conexao = conexao
-            self.tts = self.conexao.obter_servico("ALTextToSpeech")
-            self.asr = self.conexao.obter_servico("ALSpeechRecognition")
-            self.memory = self.conexao.obter_servico("ALMemory")
-            self.leds = self.conexao.obter_servico("ALLeds")
-            self.motion = self.conexao.obter_servico("ALMotion")
-            self.audio_device = self.conexao.obter_servico("ALAudioDevice")
-    
+            self.despachante_fala = DespachanteNAO("fala")
+            self.despachante_leds = DespachanteNAO("leds")
+            self.despachante_movimento = DespachanteNAO("movimento")
+            self.cache_falas = CacheFalasNAO(conexao) if CACHE_FALAS_NAO else None
             self.escutando = False
-    
-            if self.tts:
+            self._geracao = None
+            self._trava_configuracao = threading.Lock()
+            self._configurar()
+
+    # Os proxies vêm do cache da conexão a cada uso: depois de uma reconexão já são os novos
+    @property
+    def tts(self):
+        return self.conexao.obter_servico("ALTextToSpeech")
+
+    @property
+    def asr(self):
+        return self.conexao.obter_servico("ALSpeechRecognition")
+
+    @property
+    def memory(self):
+        return self.conexao.obter_servico("ALMemory")
+
+    @property
+    def leds(self):
+        return self.conexao.obter_servico("ALLeds")
+
+    @property
+    def motion(self):
+        return self.conexao.obter_servico("ALMotion")
+
+    @property
+    def audio_device(self):
+        return self.conexao.obter_servico("ALAudioDevice")
+
+    def _configurar(self):
+        """Configura idioma e microfones do robô; refeito quando a conexão é refeita."""
+        with self._trava_configuracao:
+            if self._geracao == self.conexao.geracao:
+                return
+            self._geracao = self.conexao.geracao
+
+            tts = self.tts
+            if tts:
                 try:
-                    self.tts.setLanguage("Brazilian")
+                    tts.setLanguage("Brazilian")
                 except Exception:
                     pass
-            
-            if self.audio_device:
+
+            audio_device = self.audio_device
+            if audio_device:
                 try:
                     # Seleciona os microfones frontais (melhor para reconhecimento de voz)
                     # O 3 significa (1+2), que são os microfones da esquerda e direita.
-                    self.audio_device.setClientPreferences(self.__class__.__name__, 4, 3, 0)
+                    audio_device.setClientPreferences(self.__class__.__name__, 4, 3, 0)
                 except Exception:
                     pass
-    
-            if self.asr:
+
+            asr = self.asr
+            if asr:
                 try:
-                    self.asr.setLanguage("Brazilian")
+                    asr.setLanguage("Brazilian")
                     # Ajustes para ambientes ruidosos
-                    self.asr.setParameter("EnergyThreshold", 3000) 
-                    self.asr.setParameter("Sensitivity", 0.6)
-                    self.asr.setVocabulary(VOCABULARIO_LETRAS, False)
+                    asr.setParameter("EnergyThreshold", 3000)
+                    asr.setParameter("Sensitivity", 0.6)
+                    asr.setVocabulary(VOCABULARIO_LETRAS, False)
                 except Exception:
                     pass
-    
-    def dizer(self, texto: str):
-            """Faz o robô NAO falar um texto."""
-            if self.tts:
+
+    def dizer(self, texto: str, preemptar: bool = False) -> Future:
+        """
+        Faz o robô NAO falar um texto. Com `preemptar`, as falas pendentes são
+        descartadas e a fala em andamento é interrompida.
+        """
+        return self.despachante_fala.enviar(
+            self._dizer, str(texto),
+            tipo="fala", preemptar=preemptar, interromper=self._interromper_fala
+        )
+
+    def piscar_olhos(self, cor: str, duracao: float = 1.0) -> Future:
+        """Pisca os LEDs dos olhos do NAO com uma cor específica."""
+        return self.despachante_leds.enviar(self._piscar_olhos, cor, duracao, tipo="leds")
+
+    def acenar(self) -> Future:
+        """Faz o NAO executar uma animação de aceno."""
+        return self.despachante_movimento.enviar(self._acenar, tipo="movimento")
+
+    def aquecer_falas(self, textos) -> list[Future]:
+        """Renderiza no robô, em segundo plano e na ordem dada, as falas que ainda não estão em cache."""
+        if not self.cache_falas:
+            return []
+        return self.cache_falas.aquecer(textos)
+
+    def encerrar(self, timeout: float = 5.0):
+        """Executa os comandos pendentes (até `timeout` por recurso) e para os despachantes."""
+        if self.cache_falas:
+            self.cache_falas.encerrar()
+        for despachante in (self.despachante_fala, self.despachante_leds, self.despachante_movimento):
+            despachante.encerrar(esperar=True, timeout=timeout)
+
+    def _dizer(self, texto: str):
+        self._configurar()
+        with DURACAO_DIZER.medir():
+            if self.cache_falas and self.cache_falas.tocar(texto):
+                return
+            tts = self.tts
+            if tts:
                 try:
-                    self.tts.say(str(texto))
+                    tts.say(texto)
                 except Exception:
                     pass
 
-    def piscar_olhos(self, cor: str, duracao: float = 1.0):
-        """Pisca os LEDs dos olhos do NAO com uma cor específica."""
-        if self.leds:
+    def _interromper_fala(self):
+        if self.cache_falas:
+            self.cache_falas.interromper()
+        tts = self.tts
+        if tts:
+            tts.stopAll()
+
+    def _piscar_olhos(self, cor: str, duracao: float):
+        self._configurar()
+        leds = self.leds
+        if leds:
             try:
-                self.leds.fadeRGB("FaceLeds", cor, 0.1)
+                # Mede só as chamadas ao robô, não a pausa com os olhos acesos
+                with DURACAO_PISCAR_OLHOS.medir():
+                    leds.fadeRGB("FaceLeds", cor, 0.1)
                 time.sleep(duracao)
-                self.leds.fadeRGB("FaceLeds", "white", 0.1)
+                with DURACAO_PISCAR_OLHOS.medir():
+                    leds.fadeRGB("FaceLeds", "white", 0.1)
             except Exception as e:
                 print(f"Erro ao piscar os olhos do NAO: {e}")
 
-    def acenar(self):
-        """Faz o NAO executar uma animação de aceno."""
-        if self.motion:
+    def _acenar(self):
+        self._configurar()
+        motion = self.motion
+        if motion:
             try:
-                self.motion.wakeUp()
-                self.motion.setStiffnesses("RArm", 1.0)
+                motion.wakeUp()
+                motion.setStiffnesses("RArm", 1.0)
                 names = ["RShoulderPitch", "RShoulderRoll", "RElbowYaw", "RElbowRoll"]
                 angles = [0.5, -0.5, 0.0, 1.5]
-                self.motion.setAngles(names, angles, 0.2)
+                motion.setAngles(names, angles, 0.2)
                 time.sleep(2)
-                self.motion.setStiffnesses("RArm", 0.0)
+                motion.setStiffnesses("RArm", 0.0)
             except Exception as e:
                 print(f"Erro ao tentar fazer o NAO acenar: {e}")
@@ -1,137 +1,321 @@
 """Módulo para reconhecimento de voz remoto usando o NAO a."""
 import qi
+import re
 import sys
 import time
-import speech_recognition as sr
+import threading
 import numpy as np
 
 # Importa as mesmas dependências do seu reconhecedor local
-from thefuzz import process
-from config.settings import ARQUIVO_MAPA_LETRAS
-from services.reconhecimento_voz import carregar_mapa_letras, MAPA_LETRAS_REVERSO, VOCABULARIO_LETRAS
+from config.settings import (
+    ARQUIVO_MAPA_LETRAS, IP_NAO_SIMULADO, PORTA_NAO, TIMEOUT_HEARTBEAT_NAO_S
+)
+from services.reconhecimento_voz import (
+    carregar_mapa_letras, MAPA_LETRAS_REVERSO, VOCABULARIO_LETRAS,
+    abrir_fluxo_letras
+)
+from services.motores_reconhecimento import obter_motor
+from services.buffer_circular import BufferCircular
+from services.vad import DetectorVoz
+from services.beamforming import Beamformer
+from services.gravacao_audio import abrir_gravacao
 
 # --- Variáveis Globais para o Módulo de Áudio ---
 
 NOME_MODULO_AUDIO = "ReconhecedorRemoto"
 
+
+def nome_modulo_sessao(sessao_id: str) -> str:
+    """Nome do módulo de áudio de uma sessão de jogo (os nomes de serviço do qi só aceitam [A-Za-z0-9_])."""
+    return f"{NOME_MODULO_AUDIO}_{re.sub(r'[^A-Za-z0-9_]', '_', sessao_id)}"
+
+
+def converter_timestamp_nao(timeStamp) -> float | None:
+    """Converte o timestamp do ALAudioDevice ([segundos, microssegundos]) em segundos."""
+    try:
+        if isinstance(timeStamp, (list, tuple)):
+            return timeStamp[0] + timeStamp[1] / 1e6
+        return float(timeStamp)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
 class ConexaoNAO:
-    """Gerencia a conexão com o robô NAO."""
-    def __init__(self):
-        self.application = None
+    """
+    Gerencia a conexão com um robô NAO: uma qi.Session, com os proxies dos
+    serviços em cache.
+
+    `verificar` é o heartbeat e `reconectar` abre uma sessão nova com o mesmo
+    robô, registra de novo os módulos do PC (o ReconhecedorRemoto) e os avisa
+    chamando seu `reconectar(session)`, se tiverem. Os proxies em cache são
+    descartados a cada reconexão; `geracao` conta as sessões abertas, para quem
+    configurou algo no robô saber quando refazer.
+
+    O IP "simulado" (IP_NAO_SIMULADO) conecta ao NAO simulado em processo
+    (services.simulador_nao); `fabrica_sessao`, se passada, cria a sessão no
+    lugar da qi.Session para qualquer IP (testes de carga).
+    """
+    def __init__(self, fabrica_sessao: callable = None):
+        self.fabrica_sessao = fabrica_sessao
         self.session = None
         self.ip = None
         self.port = None
+        self.ativa = False
+        self.geracao = 0
+        self._servicos: dict[str, object] = {}
+        self._registrados: dict[str, object] = {}
+        self._ids_registrados: dict[str, int] = {}
+        self._trava = threading.RLock()
 
-    def conectar(self, ip: str, port: int = 9559) -> tuple[bool, str]:
+    def conectar(self, ip: str, port: int = PORTA_NAO) -> tuple[bool, str]:
         """Conecta-se ao NAO."""
-        if self.session:
-            return True, "Já conectado"
-        try:
-            connection_url = f"tcp://{ip}:{port}"
-            self.application = qi.Application([NOME_MODULO_AUDIO, "--qi-url=" + connection_url])
-            self.application.start()
-            self.session = self.application.session
-            self.ip = ip
-            self.port = port
-            return True, "Conectado com sucesso"
-        except Exception as e:
-            print(f"Falha ao conectar ao NAO: {e}")
-            self.application = None
-            self.session = None
-            return False, str(e)
+        with self._trava:
+            if self.session:
+                return True, "Já conectado"
+            try:
+                self._abrir_sessao(ip, port)
+                return True, "Conectado com sucesso"
+            except Exception as e:
+                print(f"Falha ao conectar ao NAO: {e}")
+                self.session = None
+                return False, str(e)
 
     def desconectar(self):
         """Desconecta-se do NAO."""
-        if self.application:
-            self.application.stop()
-            self.application = None
-            self.session = None
+        with self._trava:
+            if self.session:
+                self._fechar_sessao()
+            self._registrados.clear()
+            self.ip = None
 
     def obter_servico(self, nome_servico: str):
-        """Obtém um serviço do NAO."""
-        if not self.session:
-            return None
+        """Obtém o proxy de um serviço do NAO, do cache se já resolvido (None se a conexão caiu)."""
+        with self._trava:
+            if not self.session or not self.ativa:
+                return None
+            proxy = self._servicos.get(nome_servico)
+            if proxy is None:
+                try:
+                    proxy = self.session.service(nome_servico)
+                except Exception as e:
+                    print(f"Falha ao obter o serviço '{nome_servico}': {e}")
+                    return None
+                self._servicos[nome_servico] = proxy
+            return proxy
+
+    def registrar_servico(self, nome: str, objeto):
+        """Registra um módulo do PC na sessão; ele é registrado de novo a cada reconexão."""
+        with self._trava:
+            self.remover_servico(nome)
+            self._ids_registrados[nome] = self.session.registerService(nome, objeto)
+            self._registrados[nome] = objeto
+
+    def remover_servico(self, nome: str, objeto=None):
+        """Desfaz o registro de um módulo (com `objeto`, só se ainda for ele o registrado)."""
+        with self._trava:
+            if nome not in self._registrados or (objeto is not None and self._registrados[nome] is not objeto):
+                return
+            del self._registrados[nome]
+            identificador = self._ids_registrados.pop(nome, None)
+            if identificador is not None and self.ativa:
+                try:
+                    self.session.unregisterService(identificador)
+                except Exception as e:
+                    print(f"Falha ao remover o serviço '{nome}': {e}")
+
+    def verificar(self, timeout_s: float = TIMEOUT_HEARTBEAT_NAO_S) -> bool:
+        """Heartbeat: a sessão está conectada e o robô responde a um ping dentro do timeout."""
+        with self._trava:
+            sessao = self.session if self.ativa else None
+        if sessao is None:
+            return False
         try:
-            return self.session.service(nome_servico)
+            if not sessao.isConnected():
+                raise RuntimeError("sessão desconectada")
+            # Num link Wi-Fi morto a sessão ainda parece conectada e uma chamada
+            # síncrona pode ficar presa: o ping é assíncrono, com timeout
+            self.obter_servico("ALMemory").ping(_async=True).value(int(timeout_s * 1000))
+            return True
         except Exception as e:
-            print(f"Falha ao obter o serviço '{nome_servico}': {e}")
-            return None
+            print(f"Heartbeat do NAO {self.ip} falhou: {e}")
+            with self._trava:
+                if self.session is sessao:
+                    self.ativa = False
+                    self._servicos.clear()
+            return False
+
+    def reconectar(self) -> bool:
+        """Abre uma sessão nova com o mesmo robô e registra de novo os módulos do PC."""
+        with self._trava:
+            if self.ip is None:
+                return False
+            if self.session:
+                self._fechar_sessao()
+            try:
+                self._abrir_sessao(self.ip, self.port)
+                for nome, objeto in self._registrados.items():
+                    self._ids_registrados[nome] = self.session.registerService(nome, objeto)
+            except Exception as e:
+                print(f"Falha ao reconectar ao NAO {self.ip}: {e}")
+                if self.session:
+                    self._fechar_sessao()
+                return False
+            session, registrados = self.session, list(self._registrados.values())
+
+        for objeto in registrados:
+            if hasattr(objeto, "reconectar"):
+                try:
+                    objeto.reconectar(session)
+                except Exception as e:
+                    print(f"Falha ao religar o módulo {objeto.__class__.__name__}: {e}")
+        print(f"Reconectado ao NAO {self.ip}.")
+        return True
+
+    def _abrir_sessao(self, ip: str, port: int):
+        if self.fabrica_sessao:
+            sessao = self.fabrica_sessao()
+        elif ip == IP_NAO_SIMULADO:
+            # Importado só aqui: o simulador não faz parte do caminho do robô de verdade
+            from services.simulador_nao import SessaoSimulada, SimuladorNAO
+            sessao = SessaoSimulada(SimuladorNAO())
+        else:
+            sessao = qi.Session()
+        sessao.connect(f"tcp://{ip}:{port}")
+        self.session = sessao
+        self.ip = ip
+        self.port = port
+        self._servicos.clear()
+        self.ativa = True
+        self.geracao += 1
+
+    def _fechar_sessao(self):
+        self.ativa = False
+        self._servicos.clear()
+        self._ids_registrados.clear()
+        try:
+            self.session.close()
+        except Exception as e:
+            print(f"Falha ao fechar a sessão com o NAO: {e}")
+        self.session = None
+
 
 class ReconhecimentoVozNAO(object):
     """
     Módulo remoto que se inscreve no ALAudioDevice do NAO para receber o stream 
     de áudio e processá-lo no PC.
     """
-    def __init__(self, app, callback_letra, callback_final):
+    def __init__(self, session, callback_letra, callback_final, callback_erro=None, motor=None,
+                 nome_modulo: str = NOME_MODULO_AUDIO):
         super(ReconhecimentoVozNAO, self).__init__()
-        app.start()
-        session = app.session
         self.audio_service = session.service("ALAudioDevice")
         self.isProcessingDone = False
-        self.reconhecedor = sr.Recognizer()
-        self.reconhecedor.pause_threshold = 1.5
+        self.motor = motor or obter_motor()
         
         self.escutando = False
         
         # Callbacks para interagir com a interface ou lógica do jogo
         self.callback_letra = callback_letra
         self.callback_final = callback_final
+        self.callback_erro = callback_erro
 
         # Configurações do áudio do NAO
         self.taxa_amostragem = 16000
         self.canais = 4
-        self.largura_amostra = 2
-        self.module_name = NOME_MODULO_AUDIO
+        # Cada sessão de jogo que usa o mesmo robô registra o seu módulo, com nome próprio
+        self.module_name = nome_modulo
+
+        # O callback do qi só copia o áudio para o buffer; a detecção de fala e o
+        # reconhecimento rodam na thread de processamento e no pool de workers
+        self.buffer = BufferCircular(self.canais, self.taxa_amostragem * 10)
+        self.tamanho_bloco = 1024
+        self.detector = DetectorVoz(self.taxa_amostragem)
+        self.beamformer = Beamformer(self.taxa_amostragem)
+        self.gravador = None
+        self.thread_processamento = None
 
-    def iniciar_escuta(self):
-        """Inicia o processo de escuta e reconhecimento."""
+    def iniciar_escuta(self, reconhecer: bool = True):
+        """
+        Inicia o processo de escuta e reconhecimento. Com `reconhecer=False`,
+        apenas assina o áudio (quem substituiu o processRemote faz o resto).
+        """
         if self.escutando:
             return
             
         print("Iniciando escuta remota no NAO...")
         self.escutando = True
+        if reconhecer:
+            self.buffer.limpar()
+            self.detector.reiniciar()
+            self.beamformer.reiniciar()
+            self.gravador = abrir_gravacao("nao", self.taxa_amostragem)
+            self.thread_processamento = threading.Thread(target=self._processar_buffer, daemon=True)
+            self.thread_processamento.start()
         self.audio_service.setClientPreferences(self.module_name, self.taxa_amostragem, self.canais, 0)
         self.audio_service.subscribe(self.module_name)
 
-    def parar_escuta(self):
-        """Para o processo de escuta."""
+    def reconectar(self, session):
+        """Chamado pela ConexaoNAO depois de uma reconexão: troca o proxy e volta a assinar o áudio."""
+        self.audio_service = session.service("ALAudioDevice")
+        if self.escutando:
+            self.audio_service.setClientPreferences(self.module_name, self.taxa_amostragem, self.canais, 0)
+            self.audio_service.subscribe(self.module_name)
+
+    def parar_escuta(self, timeout_s: float = 1.0):
+        """Para o processo de escuta, esperando até `timeout_s` as letras ainda em reconhecimento."""
         if not self.escutando:
             return
 
         print("Parando escuta remota...")
         self.escutando = False
-        self.audio_service.unsubscribe(self.module_name)
+        try:
+            self.audio_service.unsubscribe(self.module_name)
+        except Exception as e:
+            # Com a conexão caída não há assinatura a cancelar; a reconexão não a refaz
+            print(f"Falha ao cancelar a assinatura do áudio do NAO: {e}")
+        if self.thread_processamento and self.thread_processamento is not threading.current_thread():
+            self.thread_processamento.join(timeout=timeout_s)
+        if self.gravador:
+            self.gravador.fechar()
+            self.gravador = None
         if self.callback_final:
             self.callback_final()
 
     def processRemote(self, nbOfChannels, nbrOfSamplesByChannel, timeStamp, inputBuffer):
         """
-        Este é o método callback que o NAO chama remotamente.
-        Ele recebe os dados do áudio e os processa.
+        Este é o método callback que o NAO chama remotamente. Ele apenas
+        desintercala o áudio no buffer circular e retorna imediatamente.
         """
         if not self.escutando:
             return
+        try:
+            self.buffer.escrever_intercalado(inputBuffer, nbOfChannels)
+            if self.gravador:
+                intercalado = np.frombuffer(inputBuffer, dtype=np.int16).reshape(-1, nbOfChannels)
+                self.gravador.gravar("nao", intercalado.T, converter_timestamp_nao(timeStamp))
+        except Exception as e:
+            print(f"Buffer de áudio do NAO inválido: {e}")
 
+    def _processar_buffer(self):
+        """Detecta segmentos de fala no buffer e os reconhece sem bloquear a captura."""
+        fluxo = abrir_fluxo_letras(self.motor, self.taxa_amostragem, self.callback_letra, "NAO")
+        # Blocos de tamanho fixo num array reaproveitado: o beamformer e o VAD não alocam por bloco
+        bloco = np.zeros((self.canais, self.tamanho_bloco), dtype=np.int16)
         try:
-            audio_data = sr.AudioData(
-                frame_data=inputBuffer,
-                sample_rate=self.taxa_amostragem,
-                sample_width=self.largura_amostra
-            )
+            while self.escutando:
+                lido = self.buffer.ler(self.tamanho_bloco, timeout=0.1, min_amostras=self.tamanho_bloco, saida=bloco)
+                if lido is not None:
+                    # Feixe dos quatro microfones apontado para a frente do robô
+                    mono, _ = self.beamformer.processar(lido)
+                    for segmento in self.detector.processar(mono):
+                        fluxo.submeter(segmento)
+                fluxo.entregar_prontos()
 
-            texto = self.reconhecedor.recognize_google(audio_data, language='pt-BR').lower()
-            print(f"Texto bruto reconhecido: '{texto}'")
+            for segmento in self.detector.finalizar():
+                fluxo.submeter(segmento)
+            fluxo.finalizar()
 
-            melhor_correspondencia, pontuacao = process.extractOne(texto, VOCABULARIO_LETRAS)
-            
-            if pontuacao >= 75:
-                letra = MAPA_LETRAS_REVERSO[melhor_correspondencia]
-                print(f"Letra reconhecida: '{letra}' (Confiança: {pontuacao}%)")
-                if self.callback_letra:
-                    self.callback_letra(letra)
-
-        except (sr.UnknownValueError, sr.RequestError) as e:
-            pass
         except Exception as e:
             print(f"Ocorreu um erro inesperado no processamento de áudio: {e}")
-            self.parar_escuta()
\ No newline at end of file
+            if self.callback_erro:
+                self.callback_erro(f"Erro no processamento de áudio do NAO: {e}")
+            self.parar_escuta()
@@ -0,0 +1,124 @@
+"""Módulo que gerencia as conexões WebSocket de cada sessão de jogo."""
+import asyncio
+from fastapi import WebSocket
+
+from config.settings import TAMANHO_FILA_WS, TIMEOUT_ENVIO_WS
+from services.fluxo_estado import FluxoEstado
+from services.metricas import DURACAO_ETAPAS
+
+DURACAO_ENVIO_WS = DURACAO_ETAPAS.rotulado(etapa="envio_ws")
+
+
+class ClienteWS:
+    """
+    Um cliente conectado, com fila de saída limitada e tarefa de envio própria,
+    para que um cliente lento não atrase os demais.
+    """
+    def __init__(self, websocket: WebSocket, sessao: str, tamanho_fila: int = TAMANHO_FILA_WS):
+        self.websocket = websocket
+        self.sessao = sessao
+        self.fila: asyncio.Queue[str] = asyncio.Queue(maxsize=tamanho_fila)
+        self.tarefa_envio: asyncio.Task | None = None
+        self.descartadas = 0
+
+    def enfileirar(self, mensagem: str, snapshot: str | None = None):
+        """
+        Enfileira sem bloquear. Se a fila estiver cheia, as mensagens pendentes
+        são trocadas pelo `snapshot` (quando houver) ou a mais antiga é descartada.
+        """
+        if not self.fila.full():
+            self.fila.put_nowait(mensagem)
+            return
+
+        if snapshot is not None:
+            # O snapshot já contém o efeito de todos os deltas pendentes
+            while not self.fila.empty():
+                self.fila.get_nowait()
+                self.descartadas += 1
+            self.fila.put_nowait(snapshot)
+        else:
+            self.fila.get_nowait()
+            self.descartadas += 1
+            self.fila.put_nowait(mensagem)
+
+
+class ConnectionManager:
+    def __init__(self):
+        # Conexões e fluxo de estado agrupados por sessão de jogo
+        self.active_connections: dict[str, dict[WebSocket, ClienteWS]] = {}
+        self.fluxos: dict[str, FluxoEstado] = {}
+
+    async def connect(self, websocket: WebSocket, sessao: str, estado: dict) -> ClienteWS:
+        """Aceita o cliente e envia a ele um snapshot do estado atual."""
+        await websocket.accept()
+        cliente = ClienteWS(websocket, sessao)
+
+        if sessao in self.fluxos:
+            await self.publicar_estado(sessao, estado)
+        else:
+            self.fluxos[sessao] = FluxoEstado(estado)
+        cliente.enfileirar(self.fluxos[sessao].snapshot())
+
+        self.active_connections.setdefault(sessao, {})[websocket] = cliente
+        cliente.tarefa_envio = asyncio.create_task(self._enviar_fila(cliente))
+        return cliente
+
+    def disconnect(self, websocket: WebSocket, sessao: str):
+        clientes = self.active_connections.get(sessao)
+        if not clientes:
+            return
+        cliente = clientes.pop(websocket, None)
+        if not clientes:
+            # Sem ninguém assistindo, o próximo cliente começa por um snapshot
+            self.active_connections.pop(sessao, None)
+            self.fluxos.pop(sessao, None)
+        if cliente and cliente.tarefa_envio and cliente.tarefa_envio is not asyncio.current_task():
+            cliente.tarefa_envio.cancel()
+
+    def tem_clientes(self, sessao: str) -> bool:
+        return bool(self.active_connections.get(sessao))
+
+    async def publicar_estado(self, sessao: str, estado: dict):
+        """Envia aos clientes da sessão apenas os campos que mudaram desde o último estado."""
+        fluxo = self.fluxos.get(sessao)
+        if fluxo is None:
+            return
+        delta = fluxo.publicar(estado)
+        if delta is None:
+            return
+        for cliente in list(self.active_connections.get(sessao, {}).values()):
+            if cliente.fila.full():
+                cliente.enfileirar(delta, snapshot=fluxo.snapshot())
+            else:
+                cliente.enfileirar(delta)
+
+    def ressincronizar(self, cliente: ClienteWS, desde_seq: int):
+        """Reenvia a um cliente o que ele perdeu depois de `desde_seq`."""
+        fluxo = self.fluxos.get(cliente.sessao)
+        if fluxo is None:
+            return
+        mensagens = fluxo.ressincronizar(desde_seq)
+        if len(mensagens) > cliente.fila.maxsize - cliente.fila.qsize():
+            mensagens = [fluxo.snapshot()]
+        for mensagem in mensagens:
+            cliente.enfileirar(mensagem, snapshot=fluxo.snapshot())
+
+    def total_conexoes(self) -> int:
+        return sum(len(clientes) for clientes in self.active_connections.values())
+
+    async def _enviar_fila(self, cliente: ClienteWS):
+        """Esvazia a fila de um cliente; remove o socket ao primeiro envio com falha."""
+        try:
+            while True:
+                mensagem = await cliente.fila.get()
+                with DURACAO_ENVIO_WS.medir():
+                    await asyncio.wait_for(cliente.websocket.send_text(mensagem), TIMEOUT_ENVIO_WS)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"Removendo cliente WebSocket da sessão '{cliente.sessao}': {e!r}")
+            self.disconnect(cliente.websocket, cliente.sessao)
+            try:
+                await cliente.websocket.close()
+            except Exception:
+                pass
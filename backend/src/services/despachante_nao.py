@@ -0,0 +1,104 @@
+"""Módulo do despachante de comandos do NAO, que tira as chamadas bloqueantes do event loop."""
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+MAX_COMANDOS_PENDENTES = 32
+
+
+class _Comando:
+    def __init__(self, funcao: callable, args: tuple, tipo: str | None):
+        self.funcao = funcao
+        self.args = args
+        self.tipo = tipo
+        self.future = Future()
+
+
+class DespachanteNAO:
+    """
+    Executa comandos do robô, em ordem, numa thread dedicada.
+
+    `enviar` retorna imediatamente um `concurrent.futures.Future`: quem não
+    precisa do resultado pode ignorá-lo, e código assíncrono pode aguardá-lo
+    com `asyncio.wrap_future`.
+    """
+    def __init__(self, nome: str, max_pendentes: int = MAX_COMANDOS_PENDENTES):
+        self.nome = nome
+        self.max_pendentes = max_pendentes
+        self._pendentes: deque[_Comando] = deque()
+        self._atual: _Comando | None = None
+        self._condicao = threading.Condition()
+        self._rodando = True
+        self._thread = threading.Thread(target=self._executar, name=f"DespachanteNAO-{nome}", daemon=True)
+        self._thread.start()
+
+    def enviar(self, funcao: callable, *args, tipo: str | None = None,
+               preemptar: bool = False, interromper: callable = None) -> Future:
+        """
+        Enfileira `funcao(*args)`. Com `preemptar`, os comandos pendentes do mesmo
+        `tipo` são cancelados e, se um deles estiver em execução, `interromper` é chamado.
+        """
+        comando = _Comando(funcao, args, tipo)
+        if preemptar:
+            with self._condicao:
+                self._cancelar_pendentes(tipo)
+                interromper_atual = self._atual is not None and self._atual.tipo == tipo
+            # Interrompe antes de enfileirar: se o comando atual terminar agora, a thread
+            # não pode começar o novo e ser calada pela interrupção atrasada
+            if interromper_atual and interromper:
+                try:
+                    interromper()
+                except Exception as e:
+                    print(f"Erro ao interromper comando do NAO ({self.nome}): {e}")
+
+        with self._condicao:
+            if not self._rodando:
+                comando.future.cancel()
+                return comando.future
+
+            if preemptar:
+                # Algum comando do mesmo tipo enfileirado durante a interrupção também perde a vez
+                self._cancelar_pendentes(tipo)
+
+            if len(self._pendentes) >= self.max_pendentes:
+                # Fila cheia: o comando mais antigo já perdeu a relevância
+                self._pendentes.popleft().future.cancel()
+
+            self._pendentes.append(comando)
+            self._condicao.notify()
+        return comando.future
+
+    def encerrar(self, esperar: bool = True, timeout: float | None = None):
+        """Para a thread; com `esperar`, os comandos já enfileirados ainda são executados."""
+        with self._condicao:
+            self._rodando = False
+            if not esperar:
+                while self._pendentes:
+                    self._pendentes.popleft().future.cancel()
+            self._condicao.notify()
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+    def _cancelar_pendentes(self, tipo: str | None):
+        for pendente in [c for c in self._pendentes if c.tipo == tipo]:
+            self._pendentes.remove(pendente)
+            pendente.future.cancel()
+
+    def _executar(self):
+        while True:
+            with self._condicao:
+                while self._rodando and not self._pendentes:
+                    self._condicao.wait()
+                if not self._pendentes:
+                    return
+                comando = self._atual = self._pendentes.popleft()
+
+            if comando.future.set_running_or_notify_cancel():
+                try:
+                    comando.future.set_result(comando.funcao(*comando.args))
+                except Exception as e:
+                    print(f"Erro ao executar comando do NAO ({self.nome}): {e}")
+                    comando.future.set_exception(e)
+
+            with self._condicao:
+                self._atual = None
@@ -0,0 +1,183 @@
+"""
+Módulo do executor de reconhecimento compartilhado: os segmentos de fala de
+todas as capturas são reconhecidos em paralelo num único pool, e as letras de
+cada captura são entregues na ordem em que foram faladas.
+
+Benchmark de vazão e ordem (a partir de backend/src):
+    python -m services.executor_reconhecimento
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+
+from config.settings import WORKERS_RECONHECIMENTO, MAX_RECONHECIMENTOS_EM_VOO, TIMEOUT_RECONHECIMENTO_S
+from services.metricas import DURACAO_ETAPAS
+
+# Do fim de um segmento de fala (submeter) até suas letras serem entregues
+DURACAO_SEGMENTO_ATE_LETRA = DURACAO_ETAPAS.rotulado(etapa="segmento_ate_letra")
+
+
+class _Pendente:
+    def __init__(self, sequencia: int, future: Future, enviado: float):
+        self.sequencia = sequencia
+        self.future = future
+        self.enviado = enviado
+
+
+class FluxoReconhecimento:
+    """
+    Os reconhecimentos de uma captura. Cada segmento recebe um número de
+    sequência em `submeter`; os resultados são entregues a `entregar(texto)`
+    em ordem de sequência assim que o primeiro da fila fica pronto (pela thread
+    que o concluiu, ou por `entregar_prontos`).
+
+    Com `max_em_voo` segmentos esperando, um novo é descartado (e contado): é
+    melhor perder uma letra que atrasar todas as seguintes. Um segmento sem
+    resposta em `timeout_s` é abandonado, para não segurar os que vêm depois.
+    """
+    def __init__(self, executor: "ExecutorReconhecimento", transcrever: callable, entregar: callable, origem: str,
+                 max_em_voo: int = MAX_RECONHECIMENTOS_EM_VOO, timeout_s: float = TIMEOUT_RECONHECIMENTO_S):
+        self.executor = executor
+        self.transcrever = transcrever
+        self.entregar = entregar
+        self.origem = origem
+        self.max_em_voo = max_em_voo
+        self.timeout_s = timeout_s
+        self.descartados = 0
+        self.expirados = 0
+        self._pendentes: deque[_Pendente] = deque()
+        self._proxima_sequencia = 0
+        self._trava = threading.Lock()
+
+    def submeter(self, segmento) -> int | None:
+        """Envia um segmento para reconhecimento; retorna sua sequência (None se descartado)."""
+        self.entregar_prontos()
+        with self._trava:
+            if len(self._pendentes) >= self.max_em_voo:
+                self.descartados += 1
+                self.executor._contar_descarte()
+                print(f"Reconhecimento ({self.origem}) sobrecarregado: segmento de fala descartado.")
+                return None
+            sequencia = self._proxima_sequencia
+            self._proxima_sequencia += 1
+            pendente = _Pendente(sequencia, self.executor._submeter(self.transcrever, segmento), time.monotonic())
+            self._pendentes.append(pendente)
+        pendente.future.add_done_callback(lambda _: self.entregar_prontos())
+        return sequencia
+
+    def entregar_prontos(self):
+        """Entrega, em ordem, os resultados prontos no início da fila e abandona os que passaram do timeout."""
+        # A trava garante a ordem: só uma thread entrega por vez (e nunca esperando um reconhecimento,
+        # pois os workers que o concluiriam podem estar aqui na fila)
+        with self._trava:
+            while self._pendentes:
+                cabeca = self._pendentes[0]
+                if not cabeca.future.done():
+                    if time.monotonic() < cabeca.enviado + self.timeout_s:
+                        break
+                    self._pendentes.popleft()
+                    cabeca.future.cancel()
+                    self.expirados += 1
+                    self.executor._contar_expiracao()
+                    print(f"Reconhecimento ({self.origem}) do segmento {cabeca.sequencia} passou de {self.timeout_s:g} s; ignorado.")
+                    continue
+
+                self._pendentes.popleft()
+                try:
+                    texto = cabeca.future.result()
+                except Exception as e:
+                    print(f"Erro no reconhecimento ({self.origem}) do segmento {cabeca.sequencia}: {e}")
+                    texto = None
+                if texto:
+                    self.entregar(texto)
+                    DURACAO_SEGMENTO_ATE_LETRA.observar(time.monotonic() - cabeca.enviado)
+
+    def finalizar(self):
+        """Espera e entrega os reconhecimentos restantes (cada um até o timeout)."""
+        while True:
+            with self._trava:
+                if not self._pendentes:
+                    return
+                cabeca = self._pendentes[0]
+            wait([cabeca.future], timeout=max(cabeca.enviado + self.timeout_s - time.monotonic(), 0))
+            self.entregar_prontos()
+
+    @property
+    def em_voo(self) -> int:
+        return len(self._pendentes)
+
+
+class ExecutorReconhecimento:
+    """
+    Pool de threads único para os reconhecimentos de todas as capturas (PC, NAO,
+    híbrido, de todas as sessões): a vazão cresce com `workers` em vez de cada
+    pipeline ter o seu pool. As threads são criadas sob demanda.
+    """
+    def __init__(self, workers: int = WORKERS_RECONHECIMENTO):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="Reconhecimento")
+        self._trava = threading.Lock()
+        self._contadores = {"submetidos": 0, "em_voo": 0, "concluidos": 0, "descartados": 0, "expirados": 0}
+
+    def abrir_fluxo(self, transcrever: callable, entregar: callable, origem: str, **opcoes) -> FluxoReconhecimento:
+        """Um fluxo ordenado para uma captura: `transcrever(segmento) -> texto | None`, `entregar(texto)`."""
+        return FluxoReconhecimento(self, transcrever, entregar, origem, **opcoes)
+
+    def contadores(self) -> dict[str, int]:
+        with self._trava:
+            return dict(self._contadores)
+
+    def encerrar(self, esperar: bool = True):
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+    def _submeter(self, funcao: callable, segmento) -> Future:
+        with self._trava:
+            self._contadores["submetidos"] += 1
+            self._contadores["em_voo"] += 1
+        future = self._pool.submit(funcao, segmento)
+        future.add_done_callback(self._concluido)
+        return future
+
+    def _concluido(self, future: Future):
+        with self._trava:
+            self._contadores["em_voo"] -= 1
+            if not future.cancelled():
+                self._contadores["concluidos"] += 1
+
+    def _contar_descarte(self):
+        with self._trava:
+            self._contadores["descartados"] += 1
+
+    def _contar_expiracao(self):
+        with self._trava:
+            self._contadores["expirados"] += 1
+
+
+# Compartilhado pelo processo inteiro
+EXECUTOR_RECONHECIMENTO = ExecutorReconhecimento()
+
+
+if __name__ == "__main__":
+    # Vazão com um motor de latência variável (como uma API remota) para vários
+    # números de workers, conferindo que as letras saem na ordem de captura.
+    import random
+
+    segmentos, latencia_media = 40, 0.2
+
+    def transcrever_lento(segmento: int) -> str:
+        time.sleep(random.uniform(0.5, 1.5) * latencia_media)
+        return str(segmento)
+
+    for workers in (1, 2, 4, 8, 16):
+        executor = ExecutorReconhecimento(workers)
+        entregues = []
+        fluxo = executor.abrir_fluxo(transcrever_lento, entregues.append, "benchmark", max_em_voo=segmentos)
+        inicio = time.perf_counter()
+        for i in range(segmentos):
+            fluxo.submeter(i)
+        fluxo.finalizar()
+        decorrido = time.perf_counter() - inicio
+        em_ordem = entregues == [str(i) for i in range(segmentos)]
+        print(f"{workers:3d} workers: {segmentos / decorrido:6.1f} segmentos/s  (em ordem: {'sim' if em_ordem else 'NÃO'})")
+        executor.encerrar()
@@ -0,0 +1,52 @@
+"""Módulo do fluxo versionado de estado: um snapshot inicial seguido de deltas."""
+import json
+from collections import deque
+
+from config.settings import HISTORICO_DELTAS_WS
+
+
+class FluxoEstado:
+    """
+    Guarda o último estado publicado de uma sessão e os deltas mais recentes,
+    numerados por `seq`, para que clientes atrasados possam se ressincronizar.
+
+    Mensagens geradas:
+        {"tipo": "snapshot", "seq": n, "estado": {...}}
+        {"tipo": "delta", "seq": n, "mudancas": {...}}
+    """
+    def __init__(self, estado_inicial: dict, tamanho_historico: int = HISTORICO_DELTAS_WS):
+        self.seq = 0
+        self.estado = dict(estado_inicial)
+        self.historico: deque[tuple[int, str]] = deque(maxlen=tamanho_historico)
+        self._snapshot_cache: tuple[int, str] | None = None
+
+    def publicar(self, estado: dict) -> str | None:
+        """Registra um novo estado e retorna o delta serializado, ou None se nada mudou."""
+        mudancas = {chave: valor for chave, valor in estado.items() if self.estado.get(chave) != valor}
+        if not mudancas:
+            return None
+
+        self.seq += 1
+        self.estado.update(mudancas)
+        mensagem = json.dumps({"tipo": "delta", "seq": self.seq, "mudancas": mudancas})
+        self.historico.append((self.seq, mensagem))
+        return mensagem
+
+    def snapshot(self) -> str:
+        """Retorna o estado completo serializado (reaproveitado enquanto `seq` não mudar)."""
+        if self._snapshot_cache is None or self._snapshot_cache[0] != self.seq:
+            mensagem = json.dumps({"tipo": "snapshot", "seq": self.seq, "estado": self.estado})
+            self._snapshot_cache = (self.seq, mensagem)
+        return self._snapshot_cache[1]
+
+    def ressincronizar(self, desde_seq: int) -> list[str]:
+        """
+        Retorna as mensagens que levam um cliente de `desde_seq` até o estado atual:
+        os deltas guardados, ou um snapshot se eles já saíram do histórico.
+        """
+        if desde_seq == self.seq:
+            return []
+        primeiro_seq = self.historico[0][0] if self.historico else self.seq + 1
+        if desde_seq > self.seq or desde_seq + 1 < primeiro_seq:
+            return [self.snapshot()]
+        return [mensagem for seq, mensagem in self.historico if seq > desde_seq]
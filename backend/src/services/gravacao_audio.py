@@ -0,0 +1,134 @@
+"""Módulo de gravação e leitura de sessões de áudio brutas (PC e NAO), para replay offline."""
+import os
+import csv
+import time
+import queue
+import wave
+import threading
+from dataclasses import dataclass
+import numpy as np
+
+from config.settings import DIRETORIO_GRAVACAO_AUDIO
+
+ARQUIVO_ROTULOS = "rotulos.csv"
+TAMANHO_FILA_GRAVACAO = 500
+
+
+@dataclass(frozen=True)
+class FluxoGravado:
+    """
+    Um stream gravado: as amostras (canais, n) e, por bloco entregue pelo
+    callback, [amostra inicial, timestamp da fonte, chegada em time.monotonic].
+    """
+    taxa_amostragem: int
+    amostras: np.ndarray
+    blocos: np.ndarray
+
+
+class GravadorAudio:
+    """
+    Grava os blocos brutos de cada fonte ("pc", "nao") em `<fonte>.wav`, com os
+    tempos de cada bloco em `<fonte>_blocos.npy`.
+
+    `gravar` só copia o bloco para uma fila e retorna; o disco é escrito por uma
+    thread própria, para não atrasar os callbacks de áudio. Se a fila encher,
+    o bloco é descartado e contado em `descartados` (`tamanho_fila=0`: sem limite).
+    """
+    def __init__(self, diretorio: str, taxa_amostragem: int = 16000, tamanho_fila: int = TAMANHO_FILA_GRAVACAO):
+        self.diretorio = diretorio
+        self.taxa_amostragem = taxa_amostragem
+        self.descartados = 0
+        os.makedirs(diretorio, exist_ok=True)
+
+        self._fila: queue.Queue = queue.Queue(maxsize=tamanho_fila)
+        self._arquivos: dict[str, wave.Wave_write] = {}
+        self._blocos: dict[str, list[tuple[int, float, float]]] = {}
+        self._escritas: dict[str, int] = {}
+        self._thread = threading.Thread(target=self._escrever, daemon=True)
+        self._thread.start()
+
+    def gravar(self, fonte: str, amostras: np.ndarray, timestamp_s: float | None = None, chegada: float | None = None):
+        """
+        Enfileira um bloco (canais, n) int16. Sem timestamp da fonte, usa a chegada;
+        `chegada` (time.monotonic) só é passada ao gerar sessões sintéticas.
+        """
+        if chegada is None:
+            chegada = time.monotonic()
+        try:
+            self._fila.put_nowait((fonte, np.array(amostras, dtype=np.int16), timestamp_s if timestamp_s is not None else chegada, chegada))
+        except queue.Full:
+            self.descartados += 1
+
+    def fechar(self):
+        """Grava o que falta na fila e fecha os arquivos."""
+        self._fila.put(None)
+        self._thread.join()
+        for fonte, arquivo in self._arquivos.items():
+            arquivo.close()
+            np.save(os.path.join(self.diretorio, f"{fonte}_blocos.npy"), np.array(self._blocos[fonte], dtype=np.float64))
+        if self.descartados:
+            print(f"Gravação de áudio: {self.descartados} blocos descartados (disco lento).")
+        print(f"Sessão de áudio gravada em {self.diretorio}")
+
+    def _escrever(self):
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            fonte, amostras, timestamp, chegada = item
+            arquivo = self._arquivos.get(fonte)
+            if arquivo is None:
+                arquivo = wave.open(os.path.join(self.diretorio, f"{fonte}.wav"), "wb")
+                arquivo.setnchannels(amostras.shape[0])
+                arquivo.setsampwidth(2)
+                arquivo.setframerate(self.taxa_amostragem)
+                self._arquivos[fonte] = arquivo
+                self._blocos[fonte] = []
+                self._escritas[fonte] = 0
+            self._blocos[fonte].append((self._escritas[fonte], timestamp, chegada))
+            arquivo.writeframes(amostras.T.tobytes())
+            self._escritas[fonte] += amostras.shape[1]
+
+
+def abrir_gravacao(nome: str, taxa_amostragem: int = 16000) -> GravadorAudio | None:
+    """
+    Abre uma gravação em `DIRETORIO_GRAVACAO_AUDIO/<data-hora>-<nome>` se a
+    gravação estiver ativada nas configurações; senão retorna None.
+    """
+    if not DIRETORIO_GRAVACAO_AUDIO:
+        return None
+    diretorio = os.path.join(DIRETORIO_GRAVACAO_AUDIO, f"{time.strftime('%Y%m%d-%H%M%S')}-{nome}")
+    return GravadorAudio(diretorio, taxa_amostragem)
+
+
+def carregar_gravacao(diretorio: str) -> dict[str, FluxoGravado]:
+    """Lê todos os streams gravados num diretório, indexados pela fonte."""
+    fluxos = {}
+    for nome in sorted(os.listdir(diretorio)):
+        if not nome.endswith(".wav"):
+            continue
+        fonte = nome[:-len(".wav")]
+        with wave.open(os.path.join(diretorio, nome), "rb") as arquivo:
+            canais = arquivo.getnchannels()
+            taxa = arquivo.getframerate()
+            dados = np.frombuffer(arquivo.readframes(arquivo.getnframes()), dtype=np.int16)
+        blocos = np.load(os.path.join(diretorio, f"{fonte}_blocos.npy"))
+        fluxos[fonte] = FluxoGravado(taxa, dados.reshape(-1, canais).T.copy(), blocos)
+    return fluxos
+
+
+def carregar_rotulos(diretorio: str) -> list[tuple[float, float, str]]:
+    """
+    Lê a transcrição rotulada (`rotulos.csv`: inicio_s,fim_s,letra por linha, em
+    segundos desde o início da gravação); lista vazia se não houver.
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_ROTULOS)
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, newline="", encoding="utf-8") as arquivo:
+        return [(float(inicio), float(fim), letra.strip().upper()) for inicio, fim, letra in csv.reader(arquivo)]
+
+
+def salvar_rotulos(diretorio: str, rotulos: list[tuple[float, float, str]]):
+    with open(os.path.join(diretorio, ARQUIVO_ROTULOS), "w", newline="", encoding="utf-8") as arquivo:
+        csv.writer(arquivo).writerows((f"{inicio:.3f}", f"{fim:.3f}", letra) for inicio, fim, letra in rotulos)
@@ -0,0 +1,201 @@
+"""Módulo que converte o texto reconhecido em letras do alfabeto."""
+import re
+import unicodedata
+from collections import Counter
+from thefuzz import fuzz, process
+
+LIMIAR_CONFIANCA = 75
+# Numa transcrição com várias palavras, cada palavra que não é uma forma exata
+# só vira letra se for quase igual a uma forma (ex. "ipsilone"); senão a
+# transcrição inteira é pontuada como uma fala só, como no `process.extractOne`
+LIMIAR_PALAVRA = 90
+MAX_DIFERENCA_TAMANHO = 1
+MAX_CANDIDATOS = 8
+MAX_CACHE_APROXIMADO = 2048
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos nem pontuação e com espaços simples."""
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", texto).split())
+
+
+class MatcherLetras:
+    """
+    Índice pré-calculado do vocabulário de letras.
+
+    Correspondências exatas (após normalização) são resolvidas com uma consulta
+    ao dicionário. Para o restante, um índice invertido de bigramas seleciona
+    poucos candidatos, que são então pontuados com `fuzz.WRatio` (a mesma
+    pontuação do `process.extractOne`). Entre pontuações iguais vence a forma
+    que vem antes no mapa de letras.
+    """
+    def __init__(self, mapa_letras: dict[str, list[str]], limiar: int = LIMIAR_CONFIANCA):
+        self.limiar = limiar
+        self.exatos: dict[str, str] = {}
+        # O vocabulário como está no mapa, para pontuar falas inteiras como o `process.extractOne`
+        self.vocabulario: dict[str, str] = {}
+        for letra, formas_faladas in mapa_letras.items():
+            for forma in formas_faladas:
+                self.exatos.setdefault(normalizar(forma), letra)
+                self.vocabulario.setdefault(forma, letra)
+        self.formas_vocabulario = list(self.vocabulario)
+
+        self.formas = list(self.exatos)
+        self.max_palavras = max((len(f.split()) for f in self.formas), default=1)
+        # Palavras que só aparecem dentro de frases ("letra" de "letra b")
+        self.palavras_de_frase = {
+            palavra for forma in self.formas if " " in forma for palavra in forma.split()
+        } - set(self.exatos)
+        self.indice_bigramas: dict[str, list[int]] = {}
+        for i, forma in enumerate(self.formas):
+            for bigrama in self._bigramas(forma):
+                self.indice_bigramas.setdefault(bigrama, []).append(i)
+
+        self._cache_aproximado: dict[str, tuple[str, int] | None] = {}
+        self._cache_palavras: dict[str, tuple[str, int] | None] = {}
+        self._cache_frases: dict[str, tuple[str, int] | None] = {}
+
+    @staticmethod
+    def _bigramas(texto: str) -> set[str]:
+        texto = f" {texto} "
+        return {texto[i:i + 2] for i in range(len(texto) - 1)}
+
+    def corresponder(self, texto: str) -> tuple[str, int] | None:
+        """Retorna (letra, pontuação) para o texto inteiro, ou None abaixo do limiar."""
+        normalizado = normalizar(texto)
+        if not normalizado:
+            return None
+        letra = self.exatos.get(normalizado)
+        if letra:
+            return letra, 100
+        return self._corresponder_aproximado(normalizado)
+
+    def segmentar(self, texto: str) -> list[tuple[str, int]]:
+        """
+        Divide uma transcrição com várias letras ("b a n a n a", "bê a ene")
+        em uma lista de (letra, pontuação), em uma única passada. Em cada posição
+        tenta primeiro a maior frase exata ("letra b"), depois a palavra isolada
+        quase igual a uma forma. Se alguma palavra não corresponder ("eu não sei",
+        "professora, é bê"), a transcrição não é uma soletração: ela é pontuada
+        inteira e dá no máximo uma letra, acima do limiar.
+        """
+        normalizado = normalizar(texto)
+        palavras = normalizado.split()
+        if len(palavras) <= 1:
+            correspondencia = self.corresponder(normalizado)
+            return [correspondencia] if correspondencia else []
+
+        letras = self._segmentar_palavras(palavras)
+        if letras is None:
+            correspondencia = self._corresponder_frase(texto.lower())
+            return [correspondencia] if correspondencia else []
+        return letras
+
+    def _segmentar_palavras(self, palavras: list[str]) -> list[tuple[str, int]] | None:
+        """As letras de cada palavra ou frase, ou None se alguma palavra não corresponder."""
+        # Quem fala "letra" soletra com frases: "a letra é b" não é "a", "e", "b"
+        so_frases = any(palavra in self.palavras_de_frase for palavra in palavras)
+        menor_frase = 2 if so_frases else 1
+        letras = []
+        i = 0
+        while i < len(palavras):
+            for n in range(min(self.max_palavras, len(palavras) - i), menor_frase - 1, -1):
+                letra = self.exatos.get(" ".join(palavras[i:i + n]))
+                if letra:
+                    letras.append((letra, 100))
+                    i += n
+                    break
+            else:
+                correspondencia = None if so_frases else self._corresponder_palavra(palavras[i])
+                if correspondencia is None:
+                    return None
+                letras.append(correspondencia)
+                i += 1
+        return letras
+
+    def _candidatos(self, normalizado: str) -> list[int]:
+        """As formas com mais bigramas em comum, em ordem de votos e depois do mapa de letras."""
+        votos = Counter()
+        for bigrama in self._bigramas(normalizado):
+            votos.update(self.indice_bigramas.get(bigrama, ()))
+        return [i for i, _ in sorted(votos.items(), key=lambda item: (-item[1], item[0]))[:MAX_CANDIDATOS]]
+
+    def _corresponder_palavra(self, palavra: str) -> tuple[str, int] | None:
+        """Uma palavra de uma soletração: só formas de tamanho parecido e quase iguais."""
+        if palavra in self._cache_palavras:
+            return self._cache_palavras[palavra]
+
+        melhor = None
+        melhor_pontuacao = LIMIAR_PALAVRA - 1
+        if len(palavra) >= 2:
+            for i in sorted(self._candidatos(palavra)):
+                forma = self.formas[i]
+                if abs(len(forma) - len(palavra)) > MAX_DIFERENCA_TAMANHO:
+                    continue
+                pontuacao = fuzz.ratio(palavra, forma)
+                if pontuacao > melhor_pontuacao:
+                    melhor, melhor_pontuacao = forma, pontuacao
+
+        resultado = (self.exatos[melhor], melhor_pontuacao) if melhor else None
+        if len(self._cache_palavras) >= MAX_CACHE_APROXIMADO:
+            self._cache_palavras.clear()
+        self._cache_palavras[palavra] = resultado
+        return resultado
+
+    def _corresponder_frase(self, texto: str) -> tuple[str, int] | None:
+        """A transcrição inteira contra todo o vocabulário, como o `process.extractOne` original."""
+        if texto in self._cache_frases:
+            return self._cache_frases[texto]
+        forma, pontuacao = process.extractOne(texto, self.formas_vocabulario)
+        resultado = (self.vocabulario[forma], pontuacao) if pontuacao >= self.limiar else None
+        if len(self._cache_frases) >= MAX_CACHE_APROXIMADO:
+            self._cache_frases.clear()
+        self._cache_frases[texto] = resultado
+        return resultado
+
+    def _corresponder_aproximado(self, normalizado: str) -> tuple[str, int] | None:
+        if normalizado in self._cache_aproximado:
+            return self._cache_aproximado[normalizado]
+
+        melhor = None
+        melhor_pontuacao = -1
+        # Em ordem do mapa de letras, para que um empate tenha sempre o mesmo vencedor
+        for i in sorted(self._candidatos(normalizado)):
+            pontuacao = fuzz.WRatio(normalizado, self.formas[i], full_process=False)
+            if pontuacao > melhor_pontuacao:
+                melhor, melhor_pontuacao = self.formas[i], pontuacao
+
+        resultado = (self.exatos[melhor], melhor_pontuacao) if melhor and melhor_pontuacao >= self.limiar else None
+        if len(self._cache_aproximado) >= MAX_CACHE_APROXIMADO:
+            self._cache_aproximado.clear()
+        self._cache_aproximado[normalizado] = resultado
+        return resultado
+
+
+if __name__ == "__main__":
+    # Microbenchmark: MatcherLetras x process.extractOne sobre o mesmo vocabulário
+    import timeit
+    from thefuzz import process
+    from config.settings import ARQUIVO_MAPA_LETRAS
+    from services.reconhecimento_voz import carregar_mapa_letras
+
+    mapa, mapa_reverso, vocabulario = carregar_mapa_letras(ARQUIVO_MAPA_LETRAS)
+    matcher = MatcherLetras(mapa)
+    amostras = ["bê", "letra b", "efi", "dablio", "ipsilone", "xis", "jóta", "erre", "agá", "quê"]
+    repeticoes = 2000
+
+    t_extract = timeit.timeit(lambda: [process.extractOne(t, vocabulario) for t in amostras], number=repeticoes)
+    t_matcher = timeit.timeit(lambda: [matcher.corresponder(t) for t in amostras], number=repeticoes)
+    matcher._cache_aproximado.clear()
+    t_frio = timeit.timeit(lambda: [matcher.corresponder(t) for t in amostras], number=1)
+    t_segmentar = timeit.timeit(lambda: matcher.segmentar("b a n a n a"), number=repeticoes)
+
+    por_chamada = lambda t, n: t / (n * len(amostras)) * 1e6
+    print(f"process.extractOne:        {por_chamada(t_extract, repeticoes):8.1f} µs/texto")
+    print(f"MatcherLetras (sem cache): {por_chamada(t_frio, 1):8.1f} µs/texto")
+    print(f"MatcherLetras:             {por_chamada(t_matcher, repeticoes):8.1f} µs/texto")
+    print(f"segmentar('b a n a n a'):  {t_segmentar / repeticoes * 1e6:8.1f} µs")
+    for t in amostras:
+        print(f"  {t!r:12} extractOne={process.extractOne(t, vocabulario)}  matcher={matcher.corresponder(t)}")
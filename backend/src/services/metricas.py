@@ -0,0 +1,166 @@
+"""
+Módulo das métricas do servidor, no formato de texto do Prometheus (/metrics):
+histogramas da duração de cada etapa entre a fala da criança e a letra na tela
+e dos comandos do NAO, e medidores lidos na hora da coleta.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (em segundos) dos baldes: do processamento de um bloco de áudio a uma fala do robô
+LIMITES_PADRAO = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(rotulos: dict[str, str]) -> str:
+    if not rotulos:
+        return ""
+    return "{" + ",".join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos.items()) + "}"
+
+
+def _formatar_numero(valor: float) -> str:
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class SerieHistograma:
+    """Os baldes de um histograma para uma combinação de rótulos. `observar` não aloca nem faz I/O."""
+    def __init__(self, limites: tuple[float, ...], rotulos: dict[str, str]):
+        self.limites = limites
+        self.rotulos = rotulos
+        self.contagens = [0] * (len(limites) + 1)
+        self.soma = 0.0
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float):
+        balde = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[balde] += 1
+            self.soma += valor
+
+    @contextmanager
+    def medir(self):
+        """Observa a duração do bloco `with` (também quando ele levanta exceção)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio)
+
+    def copiar(self) -> tuple[list[int], float]:
+        with self._trava:
+            return list(self.contagens), self.soma
+
+
+class Histograma:
+    """
+    Um histograma com rótulos. No caminho quente, pegue a série uma vez com
+    `rotulado(...)` e chame `observar` nela, sem montar rótulos a cada medida.
+    """
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, nomes_rotulos: tuple[str, ...] = (),
+                 limites: tuple[float, ...] = LIMITES_PADRAO):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.nomes_rotulos = nomes_rotulos
+        self.limites = tuple(sorted(limites))
+        self._series: dict[tuple[str, ...], SerieHistograma] = {}
+        self._trava = threading.Lock()
+
+    def rotulado(self, **rotulos) -> SerieHistograma:
+        chave = tuple(str(rotulos[nome]) for nome in self.nomes_rotulos)
+        serie = self._series.get(chave)
+        if serie is None:
+            with self._trava:
+                serie = self._series.setdefault(chave, SerieHistograma(self.limites, dict(zip(self.nomes_rotulos, chave))))
+        return serie
+
+    def exportar(self) -> list[str]:
+        linhas = []
+        with self._trava:
+            series = list(self._series.values())
+        for serie in series:
+            contagens, soma = serie.copiar()
+            acumulado = 0
+            for limite, contagem in zip((*self.limites, math.inf), contagens):
+                acumulado += contagem
+                rotulos = _formatar_rotulos({**serie.rotulos, "le": _formatar_numero(float(limite))})
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _formatar_rotulos(serie.rotulos)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {acumulado}")
+        return linhas
+
+
+class Medidor:
+    """
+    Um valor lido na hora da coleta: `funcao()` retorna um número ou uma lista
+    de (rótulos, número). Serve também para contadores mantidos em outro lugar
+    (tipo "counter").
+    """
+    def __init__(self, nome: str, ajuda: str, funcao: callable, tipo: str = "gauge"):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.funcao = funcao
+        self.tipo = tipo
+
+    def exportar(self) -> list[str]:
+        valores = self.funcao()
+        if not isinstance(valores, list):
+            valores = [({}, valores)]
+        return [f"{self.nome}{_formatar_rotulos(rotulos)} {_formatar_numero(valor)}" for rotulos, valor in valores]
+
+
+class RegistroMetricas:
+    """As métricas do processo, exportadas juntas por `exportar`."""
+    def __init__(self):
+        self._metricas: dict[str, Histograma | Medidor] = {}
+        self._trava = threading.Lock()
+
+    def histograma(self, nome: str, ajuda: str, nomes_rotulos: tuple[str, ...] = (),
+                   limites: tuple[float, ...] = LIMITES_PADRAO) -> Histograma:
+        return self._registrar(Histograma(nome, ajuda, nomes_rotulos, limites))
+
+    def medidor(self, nome: str, ajuda: str, funcao: callable, tipo: str = "gauge") -> Medidor:
+        return self._registrar(Medidor(nome, ajuda, funcao, tipo))
+
+    def exportar(self) -> str:
+        with self._trava:
+            metricas = list(self._metricas.values())
+        linhas = []
+        for metrica in metricas:
+            try:
+                valores = metrica.exportar()
+            except Exception as e:
+                # Um medidor com defeito não derruba a coleta das outras métricas
+                print(f"Falha ao coletar a métrica {metrica.nome}: {e}")
+                continue
+            linhas += [f"# HELP {metrica.nome} {metrica.ajuda}", f"# TYPE {metrica.nome} {metrica.tipo}", *valores]
+        return "\n".join(linhas) + "\n"
+
+    def _registrar(self, metrica):
+        with self._trava:
+            # Registrar de novo (ex. o reload do uvicorn) substitui a anterior
+            self._metricas[metrica.nome] = metrica
+        return metrica
+
+
+REGISTRO_METRICAS = RegistroMetricas()
+
+DURACAO_ETAPAS = REGISTRO_METRICAS.histograma(
+    "soletrando_etapa_segundos",
+    "Duração de cada etapa entre a fala da criança e a letra na tela.",
+    ("etapa",)
+)
+DURACAO_COMANDOS_NAO = REGISTRO_METRICAS.histograma(
+    "soletrando_nao_comando_segundos",
+    "Duração dos comandos executados no NAO (chamadas RPC, incluindo a fala até o fim).",
+    ("comando",)
+)
@@ -0,0 +1,98 @@
+"""Módulo com os motores de reconhecimento de voz (transcrição de áudio em texto)."""
+import json
+import threading
+from abc import ABC, abstractmethod
+import speech_recognition as sr
+
+from config.settings import MOTOR_RECONHECIMENTO, IDIOMA_RECONHECIMENTO, CAMINHO_MODELO_VOSK
+
+
+class MotorReconhecimento(ABC):
+    """
+    Interface dos motores de reconhecimento.
+
+    `transcrever` recebe um `sr.AudioData` e retorna o texto em minúsculas,
+    levantando `sr.UnknownValueError` quando nada foi entendido e
+    `sr.RequestError` quando o serviço falha, como o speech_recognition.
+    """
+    nome = "base"
+
+    @abstractmethod
+    def transcrever(self, audio: sr.AudioData) -> str:
+        ...
+
+
+class MotorGoogle(MotorReconhecimento):
+    """Reconhecimento online pela API do Google (uma requisição por trecho de áudio)."""
+    nome = "google"
+
+    def __init__(self, idioma: str = IDIOMA_RECONHECIMENTO):
+        self.idioma = idioma
+        self.reconhecedor = sr.Recognizer()
+
+    def transcrever(self, audio: sr.AudioData) -> str:
+        return self.reconhecedor.recognize_google(audio, language=self.idioma).lower()
+
+
+class MotorVosk(MotorReconhecimento):
+    """
+    Reconhecimento offline com Vosk, usando uma gramática restrita às formas
+    faladas das letras. Roda só na CPU e não depende de rede.
+    """
+    nome = "vosk"
+    taxa_amostragem = 16000
+
+    def __init__(self, caminho_modelo: str = CAMINHO_MODELO_VOSK, vocabulario: list[str] | None = None):
+        if vocabulario is None:
+            # Importado aqui porque reconhecimento_voz também depende deste módulo
+            from services.reconhecimento_voz import VOCABULARIO_LETRAS
+            vocabulario = VOCABULARIO_LETRAS
+        try:
+            import vosk
+        except ImportError as e:
+            raise RuntimeError("O pacote 'vosk' não está instalado.") from e
+
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.modelo = vosk.Model(caminho_modelo)
+        # "[unk]" absorve o que estiver fora do vocabulário em vez de forçar uma letra
+        self.gramatica = json.dumps(sorted(set(vocabulario)) + ["[unk]"], ensure_ascii=False)
+
+    def transcrever(self, audio: sr.AudioData) -> str:
+        dados = audio.get_raw_data(convert_rate=self.taxa_amostragem, convert_width=2)
+        reconhecedor = self._vosk.KaldiRecognizer(self.modelo, self.taxa_amostragem, self.gramatica)
+        reconhecedor.AcceptWaveform(dados)
+        resultado = json.loads(reconhecedor.FinalResult())
+
+        texto = " ".join(p for p in resultado.get("text", "").split() if p != "[unk]")
+        if not texto:
+            raise sr.UnknownValueError()
+        return texto.lower()
+
+
+MOTORES = {
+    MotorGoogle.nome: MotorGoogle,
+    MotorVosk.nome: MotorVosk,
+}
+
+_motores_criados: dict[str, MotorReconhecimento] = {}
+_lock_motores = threading.Lock()
+
+
+def obter_motor(nome: str | None = None) -> MotorReconhecimento:
+    """
+    Retorna o motor pedido (ou o configurado em MOTOR_RECONHECIMENTO). As instâncias
+    são compartilhadas, pois carregar um modelo offline é caro. Se o motor não
+    puder ser criado, levanta RuntimeError e nada fica em cache: o próximo
+    pedido tenta de novo, sem trocar de motor às escondidas.
+    """
+    nome = (nome or MOTOR_RECONHECIMENTO).lower()
+    with _lock_motores:
+        if nome not in _motores_criados:
+            if nome not in MOTORES:
+                raise RuntimeError(f"Motor de reconhecimento '{nome}' desconhecido (opções: {', '.join(MOTORES)}).")
+            try:
+                _motores_criados[nome] = MOTORES[nome]()
+            except Exception as e:
+                raise RuntimeError(f"Motor de reconhecimento '{nome}' indisponível: {e}") from e
+        return _motores_criados[nome]
@@ -0,0 +1,126 @@
+"""Módulo do pool de conexões com os robôs NAO: uma conexão por IP, com heartbeat e reconexão."""
+import random
+import threading
+import time
+
+from config.settings import (
+    PORTA_NAO, INTERVALO_HEARTBEAT_NAO_S, TIMEOUT_HEARTBEAT_NAO_S, BACKOFF_INICIAL_NAO_S, BACKOFF_MAXIMO_NAO_S
+)
+from services.conexao_nao import ConexaoNAO
+
+
+class _EntradaPool:
+    def __init__(self, conexao: ConexaoNAO, backoff_s: float):
+        self.conexao = conexao
+        self.referencias = 1
+        self.backoff_s = backoff_s
+        self.proxima_tentativa = 0.0
+        self.reconexoes = 0
+        self.falhas = 0
+
+
+class PoolConexoesNAO:
+    """
+    Mantém uma ConexaoNAO por IP, compartilhada (por contagem de referências)
+    pelas sessões de jogo que usam o mesmo robô.
+
+    Uma thread de heartbeat verifica cada conexão a cada `intervalo_s`; a que
+    não responde é reconectada, e as tentativas que falham se espaçam com
+    backoff exponencial (com um pouco de aleatoriedade) até `backoff_maximo_s`.
+    O módulo ReconhecedorRemoto é registrado de novo pela própria ConexaoNAO.
+    """
+    def __init__(self, intervalo_s: float = INTERVALO_HEARTBEAT_NAO_S, timeout_s: float = TIMEOUT_HEARTBEAT_NAO_S,
+                 backoff_inicial_s: float = BACKOFF_INICIAL_NAO_S, backoff_maximo_s: float = BACKOFF_MAXIMO_NAO_S,
+                 fabrica_sessao: callable = None):
+        self.intervalo_s = intervalo_s
+        self.timeout_s = timeout_s
+        self.backoff_inicial_s = backoff_inicial_s
+        self.backoff_maximo_s = backoff_maximo_s
+        self.fabrica_sessao = fabrica_sessao
+        self._conexoes: dict[str, _EntradaPool] = {}
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def obter(self, ip: str, port: int = PORTA_NAO) -> tuple[ConexaoNAO | None, str]:
+        """Retorna a conexão com o robô (abrindo-a se preciso) e uma mensagem; None se falhar."""
+        with self._trava:
+            entrada = self._conexoes.get(ip)
+            if entrada:
+                entrada.referencias += 1
+                return entrada.conexao, "Já conectado"
+
+        # Conectar pode demorar: fora da trava, para não segurar os outros robôs
+        conexao = ConexaoNAO(self.fabrica_sessao)
+        sucesso, mensagem = conexao.conectar(ip, port)
+        if not sucesso:
+            return None, mensagem
+
+        with self._trava:
+            entrada = self._conexoes.get(ip)
+            if entrada:
+                # Outra sessão conectou ao mesmo robô enquanto isso
+                entrada.referencias += 1
+                excedente, conexao = conexao, entrada.conexao
+            else:
+                self._conexoes[ip] = _EntradaPool(conexao, self.backoff_inicial_s)
+                excedente = None
+                if self._thread is None:
+                    self._parar.clear()
+                    self._thread = threading.Thread(target=self._heartbeat, name="HeartbeatNAO", daemon=True)
+                    self._thread.start()
+        if excedente:
+            excedente.desconectar()
+        return conexao, mensagem
+
+    def liberar(self, ip: str):
+        """Devolve uma referência à conexão; a última a devolver a fecha."""
+        with self._trava:
+            entrada = self._conexoes.get(ip)
+            if not entrada:
+                return
+            entrada.referencias -= 1
+            if entrada.referencias > 0:
+                return
+            del self._conexoes[ip]
+        entrada.conexao.desconectar()
+
+    def estado(self) -> dict[str, dict]:
+        """Por IP: se a conexão está ativa, quantas sessões a usam, reconexões e tentativas falhas."""
+        with self._trava:
+            return {
+                ip: {"ativa": entrada.conexao.ativa, "referencias": entrada.referencias,
+                     "reconexoes": entrada.reconexoes, "falhas": entrada.falhas}
+                for ip, entrada in self._conexoes.items()
+            }
+
+    def encerrar(self):
+        """Para o heartbeat e fecha todas as conexões."""
+        with self._trava:
+            entradas = list(self._conexoes.values())
+            self._conexoes.clear()
+            thread, self._thread = self._thread, None
+        self._parar.set()
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=self.intervalo_s + self.timeout_s)
+        for entrada in entradas:
+            entrada.conexao.desconectar()
+
+    def _heartbeat(self):
+        while not self._parar.wait(self.intervalo_s):
+            with self._trava:
+                entradas = list(self._conexoes.values())
+            for entrada in entradas:
+                if self._parar.is_set():
+                    return
+                if time.monotonic() < entrada.proxima_tentativa:
+                    continue
+                if entrada.conexao.verificar(self.timeout_s):
+                    entrada.backoff_s = self.backoff_inicial_s
+                elif entrada.conexao.reconectar():
+                    entrada.reconexoes += 1
+                    entrada.backoff_s = self.backoff_inicial_s
+                else:
+                    entrada.falhas += 1
+                    entrada.proxima_tentativa = time.monotonic() + entrada.backoff_s * random.uniform(0.8, 1.2)
+                    entrada.backoff_s = min(entrada.backoff_s * 2, self.backoff_maximo_s)
@@ -1,43 +1,68 @@
 """Módulo para processamento de áudio multicanal e cancelamento de ruído."""
 import threading
-import queue
 import sys
 import numpy as np
 import sounddevice as sd
-import speech_recognition as sr
-from scipy.signal import correlate, stft, istft
-from thefuzz import process
 
-from services.conexao_nao import ReconhecimentoVozNAO
-from services.reconhecimento_voz import MAPA_LETRAS_REVERSO, VOCABULARIO_LETRAS
+from config.settings import MODO_BEAMFORMING_NAO
+from services.conexao_nao import ReconhecimentoVozNAO, converter_timestamp_nao
+from services.gravacao_audio import abrir_gravacao
+from services.reconhecimento_voz import abrir_fluxo_letras
+from services.motores_reconhecimento import obter_motor
+from services.subtracao_espectral import SubtratorEspectral
+from services.sincronizacao import EstimadorAtraso
+from services.buffer_jitter import BufferJitter
+from services.beamforming import Beamformer
+from services.vad import DetectorVoz
+
+TAMANHO_JANELA = 1024
+# Quanto uma fonte pode se adiantar à outra antes de seguirmos com silêncio na atrasada
+MAX_ESPERA_S = 0.25
+
 
 class ProcessadorAudioMultiCanal:
     """Gerencia a captura de múltiplas fontes de áudio e aplica filtros."""
-    def __init__(self, reconhecimento_nao: ReconhecimentoVozNAO, callback_letra: callable, callback_final: callable, device_index: int | None = None):
+    def __init__(self, reconhecimento_nao: ReconhecimentoVozNAO, callback_letra: callable, callback_final: callable, callback_erro: callable = None, device_index: int | None = None, motor=None, fabrica_stream=None):
         self.reconhecimento_nao = reconhecimento_nao
         self.device_index = device_index
+        # Construtor do stream do microfone (sd.InputStream; o replay injeta o seu)
+        self.fabrica_stream = fabrica_stream or sd.InputStream
 
         self.callback_letra = callback_letra
         self.callback_final = callback_final
+        self.callback_erro = callback_erro
 
-        self.reconhecedor_sr = sr.Recognizer()
+        self.motor = motor or obter_motor()
 
         self.taxa_amostragem = 16000
         self.canais_pc = 1
+        self.canais_nao = 4
         self.dtype = 'int16'
-        self.largura_amostra = 2
 
-        self.fila_audio_pc = queue.Queue()
-        self.fila_audio_nao = queue.Queue()
+        # Um buffer de jitter por fonte, indexado pelo tempo de captura de cada amostra
+        self.buffer_pc = BufferJitter(self.taxa_amostragem, self.canais_pc)
+        self.buffer_nao = BufferJitter(self.taxa_amostragem, self.canais_nao)
+        self.tamanho_janela = TAMANHO_JANELA
+        self.max_espera = int(self.taxa_amostragem * MAX_ESPERA_S)
+        self.indice_leitura: int | None = None
+        # Janelas pré-alocadas: o loop de processamento não aloca memória por bloco
+        self._janela_pc = np.zeros((self.canais_pc, self.tamanho_janela), dtype=self.dtype)
+        self._janela_nao = np.zeros((self.canais_nao, self.tamanho_janela), dtype=self.dtype)
 
         self.rodando = False
         self.thread_processamento = None
+        self.gravador = None
 
         # --- Parâmetros de DSP ---
         self.atraso_calculado = 0
         self.sincronizado = False
-        self.buffer_sinc_pc = np.array([], dtype=self.dtype)
-        self.buffer_sinc_nao = np.array([], dtype=self.dtype)
+        # Quantas amostras o stream do NAO é lido à frente do PC para compensar o atraso
+        self.deslocamento_nao = 0
+        self.estimador_atraso = EstimadorAtraso(self.taxa_amostragem)
+        self.subtrator = SubtratorEspectral()
+        self.beamformer = Beamformer(self.taxa_amostragem)
+        self.modo_beamforming = MODO_BEAMFORMING_NAO
+        self.detector = DetectorVoz(self.taxa_amostragem)
 
         if self.reconhecimento_nao:
             self.reconhecimento_nao.processRemote = self._callback_nao
@@ -45,20 +70,43 @@ class ProcessadorAudioMultiCanal:
     def _callback_pc(self, indata, frames, time, status):
         if status:
             print(f"Status do stream do PC: {status}", file=sys.stderr)
-        self.fila_audio_pc.put(indata.copy())
+        # indata.T é uma view (1, frames): a única cópia é a escrita no anel pré-alocado.
+        # Em algumas APIs de áudio o tempo do ADC vem zerado; nesse caso usa a chegada
+        timestamp = (time.inputBufferAdcTime or None) if time is not None else None
+        self.buffer_pc.escrever(indata.T, timestamp)
+        if self.gravador:
+            self.gravador.gravar("pc", indata.T, timestamp)
 
     def _callback_nao(self, nbOfChannels, nbrOfSamplesByChannel, timeStamp, inputBuffer):
         if not self.rodando:
             return
+        # View sobre o buffer do qi; a desintercalação acontece na cópia para o anel
         audio_nao_raw = np.frombuffer(inputBuffer, dtype=self.dtype)
         audio_nao_deinterleaved = audio_nao_raw.reshape(-1, nbOfChannels).T
-        self.fila_audio_nao.put(audio_nao_deinterleaved)
+        timestamp = converter_timestamp_nao(timeStamp)
+        self.buffer_nao.escrever(audio_nao_deinterleaved[:self.canais_nao], timestamp)
+        if self.gravador:
+            self.gravador.gravar("nao", audio_nao_deinterleaved, timestamp)
+
+    def obter_contadores(self) -> dict[str, dict[str, int]]:
+        """Contadores de lacunas, sobreposições, transbordos e subfluxos de cada fonte."""
+        return {"pc": self.buffer_pc.contadores(), "nao": self.buffer_nao.contadores()}
 
     def iniciar(self):
         print("Iniciando processador de áudio multicanal...")
         self.rodando = True
 
-        self.stream_pc = sd.InputStream(
+        self.buffer_pc.reiniciar()
+        self.buffer_nao.reiniciar()
+        self.indice_leitura = None
+        self.deslocamento_nao = 0
+        self.subtrator.reiniciar()
+        self.beamformer.reiniciar()
+        self.estimador_atraso.reiniciar()
+        self.detector.reiniciar()
+        self.gravador = abrir_gravacao("hibrido", self.taxa_amostragem)
+
+        self.stream_pc = self.fabrica_stream(
             samplerate=self.taxa_amostragem,
             device=self.device_index,
             channels=self.canais_pc,
@@ -68,13 +116,14 @@ class ProcessadorAudioMultiCanal:
         self.stream_pc.start()
 
         if self.reconhecimento_nao:
-            self.reconhecimento_nao.iniciar_escuta()
+            self.reconhecimento_nao.iniciar_escuta(reconhecer=False)
 
         self.thread_processamento = threading.Thread(target=self._processar_filas, daemon=True)
         self.thread_processamento.start()
         print("Processador de áudio iniciado.")
 
-    def parar(self):
+    def parar(self, timeout_s: float = 1.0):
+        """Para a captura, esperando até `timeout_s` as letras ainda em reconhecimento."""
         if not self.rodando:
             return
         print("Parando processador de áudio multicanal...")
@@ -88,91 +137,162 @@ class ProcessadorAudioMultiCanal:
             self.stream_pc.close()
 
         if self.thread_processamento and self.thread_processamento.is_alive():
-            self.thread_processamento.join(timeout=1)
-        
+            self.thread_processamento.join(timeout=timeout_s)
+
+        if self.gravador:
+            self.gravador.fechar()
+            self.gravador = None
+
         if self.callback_final:
             self.callback_final()
         print("Processador de áudio parado.")
 
     def _sincronizar_streams(self, sig, ref):
-        """Calcula o atraso entre dois sinais usando correlação cruzada."""
-        print("Calculando sincronização dos microfones...")
-        # Normaliza os sinais para evitar problemas com amplitude
-        sig = sig / np.max(np.abs(sig))
-        ref = ref / np.max(np.abs(ref))
-        correlation = correlate(sig, ref, mode='full')
-        atraso = np.argmax(correlation) - (len(ref) - 1)
-        print(f"Atraso calculado: {atraso} amostras.")
-        self.atraso_calculado = atraso
-        self.sincronizado = True
+        """
+        Alimenta o estimador de atraso (GCC-PHAT) com janelas já alinhadas e, quando
+        ele detecta um desvio, ajusta o deslocamento de leitura do stream do NAO.
+        """
+        correcao = self.estimador_atraso.adicionar(ref, sig)
+        if correcao:
+            # correcao > 0: o NAO está atrasado em relação ao PC
+            self.deslocamento_nao += correcao
+            self.atraso_calculado = self.estimador_atraso.atraso_total
+            self.sincronizado = True
+            print(f"Atraso calculado: {self.atraso_calculado} amostras.")
+
+    def _proxima_janela(self) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Retorna a próxima janela alinhada de `tamanho_janela` amostras das duas
+        fontes, como (pc, nao[canais]), ou None se ainda não há dados suficientes.
+        As janelas são views de buffers reaproveitados na chamada seguinte.
+        """
+        if not (self.buffer_pc.iniciado and self.buffer_nao.iniciado):
+            atrasado = self.buffer_nao if self.buffer_pc.iniciado else self.buffer_pc
+            atrasado.esperar_ate(0, 0.05)
+            return None
+        if self.indice_leitura is None:
+            self.indice_leitura = max(self.buffer_pc.inicio, self.buffer_nao.inicio - self.deslocamento_nao)
+
+        inicio_pc = self.indice_leitura
+        inicio_nao = inicio_pc + self.deslocamento_nao
+        fim_pc, fim_nao = inicio_pc + self.tamanho_janela, inicio_nao + self.tamanho_janela
+
+        self.buffer_pc.esperar_ate(fim_pc, 0.05)
+        self.buffer_nao.esperar_ate(fim_nao, 0.05)
+        if self.buffer_pc.fim < fim_pc or self.buffer_nao.fim < fim_nao:
+            adiantamento = max(self.buffer_pc.fim - fim_pc, self.buffer_nao.fim - fim_nao)
+            if adiantamento < self.max_espera:
+                return None
+            # Uma das fontes travou: segue com silêncio nela (contado como subfluxo)
+
+        if inicio_pc < self.buffer_pc.inicio or inicio_nao < self.buffer_nao.inicio:
+            # O processamento ficou para trás e o áudio foi sobrescrito: volta ao presente
+            self.indice_leitura = max(self.buffer_pc.inicio, self.buffer_nao.inicio - self.deslocamento_nao)
+            return None
+
+        self.buffer_pc.ler(inicio_pc, self.tamanho_janela, self._janela_pc)
+        self.buffer_nao.ler(inicio_nao, self.tamanho_janela, self._janela_nao)
+        self.indice_leitura = fim_pc
+        return self._janela_pc[0], self._janela_nao
+
+    def _selecionar_sinais(self, dados_pc, dados_nao) -> tuple[np.ndarray, np.ndarray]:
+        """Escolhe (sinal, referência de ruído) conforme o modo de beamforming."""
+        if self.modo_beamforming == "desligado":
+            return dados_pc, dados_nao[0]
+        principal, referencia = self.beamformer.processar(dados_nao)
+        if self.modo_beamforming == "principal":
+            return principal, referencia
+        return dados_pc, referencia
 
     def _subtracao_espectral(self, sinal_ruidoso, ref_ruido):
-        """Aplica a subtração espectral para remover ruído."""
-        # TODO: O tamanho da janela (nperseg) pode ser ajustado para melhores resultados.
-        f_sinal, t_sinal, Zxx_sinal = stft(sinal_ruidoso, fs=self.taxa_amostragem, nperseg=256)
-        f_ruido, t_ruido, Zxx_ruido = stft(ref_ruido, fs=self.taxa_amostragem, nperseg=256)
+        """Aplica a subtração espectral para remover ruído (com estado entre blocos)."""
+        return self.subtrator.processar(sinal_ruidoso, ref_ruido)
 
-        mag_sinal = np.abs(Zxx_sinal)
-        fase_sinal = np.angle(Zxx_sinal)
-        mag_ruido = np.abs(Zxx_ruido)
+    def _processar_janela(self, dados_pc, dados_nao) -> list[np.ndarray]:
+        """Filtra uma janela alinhada e retorna os segmentos de fala que terminaram nela."""
+        # O alinhamento PC x NAO é estimado com um canal bruto do NAO
+        self._sincronizar_streams(dados_pc, dados_nao[0])
+        sinal, ref_ruido = self._selecionar_sinais(dados_pc, dados_nao)
 
-        # TODO: Usar uma média do ruído ao longo do tempo em vez de uma estimativa instantânea.
-        mag_ruido_medio = np.mean(mag_ruido, axis=1, keepdims=True)
-
-        # A subtração em si
-        mag_limpa = mag_sinal - mag_ruido_medio
-        mag_limpa = np.maximum(mag_limpa, 0) # Garante que não há valores negativos
-
-        # Reconstroi o sinal limpo
-        Zxx_limpo = mag_limpa * np.exp(1j * fase_sinal)
-        _, sinal_limpo = istft(Zxx_limpo, fs=self.taxa_amostragem)
-
-        return sinal_limpo.astype(self.dtype)
+        # Aplica a subtração espectral e separa os trechos de fala
+        audio_filtrado_np = self._subtracao_espectral(sinal, ref_ruido)
+        return self.detector.processar(audio_filtrado_np)
 
     def _processar_filas(self):
+        fluxo = abrir_fluxo_letras(self.motor, self.taxa_amostragem, self.callback_letra, "híbrido")
         while self.rodando:
             try:
-                # Pega os dados de áudio das filas
-                dados_pc = self.fila_audio_pc.get(timeout=1).flatten()
-                dados_nao = self.fila_audio_nao.get(timeout=1)
-                
-                # Usa o primeiro canal do NAO como referência de ruído
-                ref_ruido_nao = dados_nao[0]
-
-                # Garante que os arrays tenham o mesmo tamanho
-                tamanho_min = min(len(dados_pc), len(ref_ruido_nao))
-                dados_pc = dados_pc[:tamanho_min]
-                ref_ruido_nao = ref_ruido_nao[:tamanho_min]
-
-                # Aplica a subtração espectral
-                audio_filtrado_np = self._subtracao_espectral(dados_pc, ref_ruido_nao)
-
-                # Converte o áudio filtrado para bytes
-                audio_bytes = audio_filtrado_np.tobytes()
-                if not audio_bytes:
-                    continue
-
-                # Cria um objeto AudioData para o speech_recognition
-                audio_data = sr.AudioData(audio_bytes, self.taxa_amostragem, self.largura_amostra)
-
-                # Reconhece a fala do áudio filtrado
-                texto = self.reconhecedor_sr.recognize_google(audio_data, language='pt-BR').lower()
-                print(f"Texto filtrado: '{texto}'")
-
-                # Encontra a melhor correspondência da letra no vocabulário
-                melhor_correspondencia, pontuacao = process.extractOne(texto, VOCABULARIO_LETRAS)
-                
-                if pontuacao >= 75:
-                    letra = MAPA_LETRAS_REVERSO[melhor_correspondencia]
-                    print(f"Letra (híbrido): '{letra}'")
-                    if self.callback_letra:
-                        self.callback_letra(letra)
-
-            except queue.Empty:
-                # Fila vazia, continua esperando
-                continue
-            except (sr.UnknownValueError, sr.RequestError):
-                # Erros do speech_recognition, ignora e continua
-                continue
+                janela = self._proxima_janela()
+                if janela is not None:
+                    for segmento in self._processar_janela(*janela):
+                        fluxo.submeter(segmento)
+
+                fluxo.entregar_prontos()
+
             except Exception as e:
                 print(f"Erro no processamento das filas de áudio: {e}")
+                if self.callback_erro:
+                    self.callback_erro(f"Erro no processamento de áudio híbrido: {e}")
+
+        for segmento in self.detector.finalizar():
+            fluxo.submeter(segmento)
+        fluxo.finalizar()
+
+if __name__ == "__main__":
+    # Verifica com tracemalloc que o caminho callbacks -> DSP não aloca memória por
+    # bloco em regime: só segmentos de fala concluídos (e a estimativa de atraso,
+    # a cada INTERVALO_S) podem alocar. Alimenta os callbacks com ruído sintético.
+    import tracemalloc
+    from types import SimpleNamespace
+
+    processador = ProcessadorAudioMultiCanal(None, None, None, motor=object())
+    processador.rodando = True
+    taxa, bloco_pc, bloco_nao = processador.taxa_amostragem, 320, 1365
+    rng = np.random.default_rng(0)
+    # Ruídos independentes e longos: a estimativa de atraso não acha correlação espúria
+    ruido_pc = rng.normal(0, 300, (taxa * 20, 1)).astype(np.int16)
+    ruido_nao = memoryview(rng.normal(0, 300, taxa * 20 * 4).astype(np.int16).tobytes())
+    tempo_pc = SimpleNamespace(inputBufferAdcTime=0.0)
+    capturado = {"pc": 0, "nao": 0}
+
+    def passo():
+        """Entrega os callbacks até ter uma janela e a processa, como o loop real."""
+        while True:
+            janela = processador._proxima_janela()
+            if janela is not None:
+                return processador._processar_janela(*janela)
+            if capturado["pc"] <= capturado["nao"]:
+                tempo_pc.inputBufferAdcTime = capturado["pc"] / taxa
+                i = capturado["pc"] % (taxa * 19)
+                processador._callback_pc(ruido_pc[i:i + bloco_pc], bloco_pc, tempo_pc, None)
+                capturado["pc"] += bloco_pc
+            else:
+                t = capturado["nao"] / taxa
+                i = capturado["nao"] % (taxa * 19) * 8
+                processador._callback_nao(4, bloco_nao, [int(t), int(t % 1 * 1e6)], ruido_nao[i:i + bloco_nao * 8])
+                capturado["nao"] += bloco_nao
+
+    # Aquecimento: buffers crescem até o tamanho de regime e a calibração do VAD termina
+    for _ in range(50):
+        passo()
+    intervalo_gcc = processador.estimador_atraso.intervalo // processador.tamanho_janela + 1
+    janelas = 20 * intervalo_gcc
+
+    tracemalloc.start()
+    antes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(janelas):
+        passo()
+    depois, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{janelas} janelas de {processador.tamanho_janela} amostras "
+          f"({janelas * processador.tamanho_janela / taxa:.1f} s de áudio)")
+    print(f"Memória retida: {depois - antes} bytes; pico transitório: {pico - antes} bytes")
+    # Sobram só objetos pequenos do interpretador (views, escalares, iteradores do
+    # NumPy); qualquer cópia de uma janela em float64 (8 KB) passaria do limite
+    limite = processador.tamanho_janela * 8
+    if pico - antes >= limite:
+        # Código de saída 1: a verificação pode barrar um build
+        sys.exit(f"FALHA: pico acima de {limite} bytes")
+    print("OK: sem alocações por bloco")
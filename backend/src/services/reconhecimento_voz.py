@@ -3,8 +3,17 @@ import speech_recognition as sr
 import json
 import sys
 import asyncio
-from thefuzz import process
-from config.settings import ARQUIVO_MAPA_LETRAS
+import time
+import numpy as np
+import sounddevice as sd
+from config.settings import ARQUIVO_MAPA_LETRAS, CAPTURA_STREAMING_PC
+from services.executor_reconhecimento import EXECUTOR_RECONHECIMENTO, FluxoReconhecimento
+from services.matcher_letras import MatcherLetras
+from services.motores_reconhecimento import obter_motor
+from services.vad import DetectorVoz
+from services.buffer_circular import BufferCircular
+from services.gravacao_audio import abrir_gravacao
+from services.metricas import DURACAO_ETAPAS
 
 def carregar_mapa_letras(caminho_arquivo: str) -> tuple[dict, dict, list]:
     """Carrega o mapa de letras de um arquivo JSON."""
@@ -23,58 +32,161 @@ def carregar_mapa_letras(caminho_arquivo: str) -> tuple[dict, dict, list]:
         return {}, {}, []
 
 MAPA_LETRAS, MAPA_LETRAS_REVERSO, VOCABULARIO_LETRAS = carregar_mapa_letras(ARQUIVO_MAPA_LETRAS)
+MATCHER_LETRAS = MatcherLetras(MAPA_LETRAS)
+
+# Séries das etapas medidas aqui, pegas uma vez para não montar rótulos a cada medida
+DURACAO_VAD = DURACAO_ETAPAS.rotulado(etapa="vad")
+DURACAO_RECONHECIMENTO = DURACAO_ETAPAS.rotulado(etapa="reconhecimento")
+DURACAO_CORRESPONDENCIA = DURACAO_ETAPAS.rotulado(etapa="correspondencia")
+
+def emitir_letras(texto: str, callback_letra: callable, origem: str) -> list[tuple[str, int]]:
+    """
+    Segmenta uma transcrição em letras (uma criança rápida pode dizer "bê a ene"
+    de uma vez) e as entrega, em ordem, a callback_letra(letra, confianca).
+    """
+    with DURACAO_CORRESPONDENCIA.medir():
+        letras = MATCHER_LETRAS.segmentar(texto)
+    for letra, confianca in letras:
+        print(f"Letra reconhecida ({origem}): '{letra}' (Confiança: {confianca}%)")
+        if callback_letra:
+            callback_letra(letra, confianca)
+    return letras
+
+def transcrever_segmento(motor, segmento: np.ndarray, taxa_amostragem: int) -> str | None:
+    """Transcreve um segmento de fala int16 mono; retorna None se nada foi entendido."""
+    audio = sr.AudioData(segmento.tobytes(), taxa_amostragem, 2)
+    try:
+        with DURACAO_RECONHECIMENTO.medir():
+            texto = motor.transcrever(audio)
+        print(f"Texto bruto reconhecido: '{texto}'")
+        return texto
+    except (sr.UnknownValueError, sr.RequestError) as e:
+        print(f"Erro no reconhecimento: {e}")
+        return None
+
+def abrir_fluxo_letras(motor, taxa_amostragem: int, callback_letra: callable, origem: str) -> FluxoReconhecimento:
+    """
+    Fluxo no executor compartilhado para uma captura: os segmentos são
+    transcritos em paralelo e as letras chegam a callback_letra na ordem de captura.
+    """
+    return EXECUTOR_RECONHECIMENTO.abrir_fluxo(
+        lambda segmento: transcrever_segmento(motor, segmento, taxa_amostragem),
+        lambda texto: emitir_letras(texto, callback_letra, origem),
+        origem
+    )
 
 class ReconhecimentoVozPC:
     """Gerencia o reconhecimento de voz usando o microfone do PC."""
-    def __init__(self, device_index: int | None = None):
+    def __init__(self, device_index: int | None = None, motor=None, streaming: bool = CAPTURA_STREAMING_PC,
+                 fabrica_stream=None):
         self.reconhecedor = sr.Recognizer()
+        self.motor = motor or obter_motor()
         self.reconhecedor.pause_threshold = 1.5
         self.escutando = False
         self.device_index = device_index
+        self.streaming = streaming
+
+        # --- Captura em streaming ---
+        self.taxa_amostragem = 16000
+        self.tamanho_bloco = 320  # 20 ms
+        # Construtor do stream do microfone (sd.InputStream; o replay injeta o seu)
+        self.fabrica_stream = fabrica_stream or sd.InputStream
 
-    def ouvir_soletracao(self, callback_letra: callable, callback_final: callable):
+    def ouvir_soletracao(self, callback_letra: callable, callback_final: callable, callback_erro: callable = None):
         """Inicia o reconhecimento contínuo de letras a partir de um estado inicial."""
         asyncio.set_event_loop(asyncio.new_event_loop())
         self.escutando = True
 
-        print("Microfones disponíveis:")
-        for index, name in enumerate(sr.Microphone.list_microphone_names()):
-            print(f'  - [{index}] {name}')
-
         try:
-            with sr.Microphone(device_index=self.device_index) as source:
-                print(f"Usando microfone: {sr.Microphone.list_microphone_names()[self.device_index or 0]}")
-                self.reconhecedor.adjust_for_ambient_noise(source, duration=0.5)
-
-                while self.escutando:
-                    try:
-                        print("Ouvindo...")
-                        audio = self.reconhecedor.listen(source, timeout=5, phrase_time_limit=3)
-                        print("Processando áudio...")
-                        texto = self.reconhecedor.recognize_google(audio, language='pt-BR').lower()
-                        print(f"Texto bruto reconhecido: '{texto}'")
-
-                        melhor_correspondecia, pontuacao = process.extractOne(texto, VOCABULARIO_LETRAS)
-                        print(f"Melhor correspondência: '{melhor_correspondecia}' com pontuação {pontuacao}")
-                        
-                        if pontuacao >= 75:
-                            letra = MAPA_LETRAS_REVERSO[melhor_correspondecia]
-                            print(f"Letra reconhecida: {letra}")
-                            callback_letra(letra) 
-
-                    except sr.WaitTimeoutError:
-                        print("Nenhuma fala detectada.")
-                        continue
-                    except (sr.UnknownValueError, sr.RequestError) as e:
-                        print(f"Erro no reconhecimento: {e}")
-                        continue
+            if self.streaming:
+                self._ouvir_streaming(callback_letra)
+            else:
+                self._ouvir_com_listen(callback_letra)
         except Exception as e:
             print(f"Erro inesperado no reconhecimento de voz: {e}")
+            if callback_erro:
+                callback_erro(f"Erro no reconhecimento de voz: {e}")
         finally:
             print("Finalizando o reconhecimento de voz.")
             self.escutando = False
             callback_final()
 
+    def _ouvir_com_listen(self, callback_letra: callable):
+        """Captura uma frase por vez com Recognizer.listen (modo original)."""
+        print("Microfones disponíveis:")
+        for index, name in enumerate(sr.Microphone.list_microphone_names()):
+            print(f'  - [{index}] {name}')
+
+        with sr.Microphone(device_index=self.device_index) as source:
+            print(f"Usando microfone: {sr.Microphone.list_microphone_names()[self.device_index or 0]}")
+            self.reconhecedor.adjust_for_ambient_noise(source, duration=0.5)
+
+            while self.escutando:
+                try:
+                    print("Ouvindo...")
+                    audio = self.reconhecedor.listen(source, timeout=5, phrase_time_limit=3)
+                    print("Processando áudio...")
+                    texto = self.motor.transcrever(audio)
+                    print(f"Texto bruto reconhecido: '{texto}'")
+
+                    emitir_letras(texto, callback_letra, "PC")
+
+                except sr.WaitTimeoutError:
+                    print("Nenhuma fala detectada.")
+                    continue
+                except (sr.UnknownValueError, sr.RequestError) as e:
+                    print(f"Erro no reconhecimento: {e}")
+                    continue
+
+    def _ouvir_streaming(self, callback_letra: callable):
+        """
+        Captura contínua com callbacks do sounddevice e VAD por energia. Cada
+        segmento de fala vai para o executor de reconhecimento compartilhado
+        enquanto a captura continua; as letras são entregues na ordem em que foram faladas.
+        """
+        detector = DetectorVoz(self.taxa_amostragem)
+        # ~2 s de áudio; o callback escreve direto no anel e a leitura reaproveita
+        # `bloco`, sem alocações por bloco. Se o processamento atrasar, o mais antigo se perde
+        buffer = BufferCircular(1, self.taxa_amostragem * 2)
+        bloco = np.zeros((1, self.tamanho_bloco * 4), dtype=np.int16)
+        fluxo = abrir_fluxo_letras(self.motor, self.taxa_amostragem, callback_letra, "PC")
+        gravador = abrir_gravacao("pc", self.taxa_amostragem)
+
+        def callback(indata, frames, time, status):
+            if status:
+                print(f"Status do stream do PC: {status}", file=sys.stderr)
+            buffer.escrever(indata.T)
+            if gravador:
+                gravador.gravar("pc", indata.T, (time.inputBufferAdcTime or None) if time is not None else None)
+
+        try:
+            with self.fabrica_stream(
+                samplerate=self.taxa_amostragem,
+                device=self.device_index,
+                channels=1,
+                dtype='int16',
+                blocksize=self.tamanho_bloco,
+                callback=callback
+            ):
+                print("Ouvindo (streaming)...")
+                while self.escutando:
+                    lido = buffer.ler(timeout=0.1, saida=bloco)
+                    if lido is not None:
+                        inicio = time.perf_counter()
+                        segmentos = detector.processar(lido[0])
+                        DURACAO_VAD.observar(time.perf_counter() - inicio)
+                        for segmento in segmentos:
+                            fluxo.submeter(segmento)
+                    # Abandona os reconhecimentos que passaram do timeout
+                    fluxo.entregar_prontos()
+
+            for segmento in detector.finalizar():
+                fluxo.submeter(segmento)
+            fluxo.finalizar()
+        finally:
+            if gravador:
+                gravador.fechar()
+
     def parar_de_ouvir(self):
         """Para o loop de reconhecimento de voz."""
-        self.escutando = False
\ No newline at end of file
+        self.escutando = False
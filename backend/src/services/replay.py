@@ -0,0 +1,298 @@
+"""
+Replay de sessões de áudio gravadas (ver services.gravacao_audio) pelos pipelines
+de reconhecimento, mais rápido que o tempo real, para medir o reconhecimento
+sem microfone nem robô.
+
+Uso (a partir de backend/src):
+    python -m services.replay --sintetico CASA /tmp/sessao   # gera uma sessão de teste
+    python -m services.replay /tmp/sessao --pipeline pc --velocidade 10
+    python -m services.replay /tmp/sessao --pipeline hibrido --motor vosk
+"""
+import argparse
+import bisect
+import threading
+import time
+from types import SimpleNamespace
+import numpy as np
+import speech_recognition as sr
+
+from services.gravacao_audio import FluxoGravado, GravadorAudio, carregar_gravacao, carregar_rotulos, salvar_rotulos
+from services.motores_reconhecimento import MotorReconhecimento, obter_motor
+from services.reconhecimento_voz import MAPA_LETRAS, ReconhecimentoVozPC
+from services.conexao_nao import ReconhecimentoVozNAO, NOME_MODULO_AUDIO
+from services.processador_audio import ProcessadorAudioMultiCanal
+from services.simulador_nao import (
+    LETRAS, FREQUENCIA_BASE, PASSO_FREQUENCIA, SessaoSimulada, SimuladorNAO, sintetizar_soletracao
+)
+
+PIPELINES = ("pc", "nao", "hibrido")
+VELOCIDADE_PADRAO = 10.0
+
+
+class RelogioReplay:
+    """Converte a chegada gravada de cada bloco (time.monotonic da captura) no instante do replay."""
+    def __init__(self, inicio_gravado: float, velocidade: float = VELOCIDADE_PADRAO):
+        if velocidade <= 0:
+            raise ValueError("A velocidade do replay deve ser positiva.")
+        self.inicio_gravado = inicio_gravado
+        self.velocidade = velocidade
+        self.inicio = time.perf_counter()
+
+    def esperar(self, chegada: float):
+        atraso = self.inicio + (chegada - self.inicio_gravado) / self.velocidade - time.perf_counter()
+        if atraso > 0:
+            time.sleep(atraso)
+
+
+class AlimentadorReplay:
+    """
+    Entrega os blocos de um FluxoGravado, no ritmo do relógio, a
+    `entregar(bloco (canais, n), timestamp)`, numa thread própria, e registra
+    quando cada trecho foi entregue (para medir a latência até a letra).
+    """
+    def __init__(self, fluxo: FluxoGravado, relogio: RelogioReplay):
+        self.fluxo = fluxo
+        self.relogio = relogio
+        self.entregues: list[int] = []       # amostra final de cada bloco entregue
+        self.instantes: list[float] = []     # time.perf_counter() da entrega
+        self.terminado = threading.Event()
+        self._rodando = False
+        self._thread = None
+
+    def iniciar(self, entregar: callable):
+        self._rodando = True
+        self._thread = threading.Thread(target=self._alimentar, args=(entregar,), daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._rodando = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def _alimentar(self, entregar: callable):
+        blocos, total = self.fluxo.blocos, self.fluxo.amostras.shape[1]
+        for k, (inicio, timestamp, chegada) in enumerate(blocos):
+            if not self._rodando:
+                break
+            fim = int(blocos[k + 1][0]) if k + 1 < len(blocos) else total
+            self.relogio.esperar(chegada)
+            entregar(self.fluxo.amostras[:, int(inicio):fim], float(timestamp))
+            self.entregues.append(fim)
+            self.instantes.append(time.perf_counter())
+        self.terminado.set()
+
+    def instante_entrega(self, amostra: int) -> float | None:
+        """Quando a amostra `amostra` foi entregue ao pipeline (None: nunca foi)."""
+        k = bisect.bisect_left(self.entregues, amostra)
+        return self.instantes[k] if k < len(self.instantes) else None
+
+
+class StreamReplay:
+    """Substituto do sd.InputStream que chama o callback com os blocos de um AlimentadorReplay."""
+    def __init__(self, alimentador: AlimentadorReplay, callback: callable):
+        self.alimentador = alimentador
+        self.callback = callback
+
+    def _entregar(self, bloco: np.ndarray, timestamp: float):
+        # O sounddevice entrega (frames, canais)
+        self.callback(bloco.T, bloco.shape[1], SimpleNamespace(inputBufferAdcTime=timestamp), None)
+
+    def start(self):
+        self.alimentador.iniciar(self._entregar)
+
+    def stop(self):
+        self.alimentador.parar()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        self.close()
+
+
+def fabrica_stream_replay(alimentador: AlimentadorReplay) -> callable:
+    """Construtor com a assinatura do sd.InputStream, para os pipelines do PC."""
+    return lambda callback, **_: StreamReplay(alimentador, callback)
+
+
+class MotorTons(MotorReconhecimento):
+    """
+    Reconhecedor de mentira para sessões sintéticas: a letra é o tom dominante
+    do segmento. Com `latencia_s`, simula o tempo de resposta de um motor real.
+    """
+    nome = "tons"
+
+    def __init__(self, latencia_s: float = 0.0):
+        self.latencia_s = latencia_s
+
+    def transcrever(self, audio: sr.AudioData) -> str:
+        amostras = np.frombuffer(audio.get_raw_data(), dtype=np.int16).astype(np.float64)
+        espectro = np.abs(np.fft.rfft(amostras * np.hanning(amostras.size)))
+        frequencia = np.argmax(espectro) * audio.sample_rate / amostras.size
+        indice = int(round((frequencia - FREQUENCIA_BASE) / PASSO_FREQUENCIA))
+        if self.latencia_s:
+            time.sleep(self.latencia_s)
+        if not 0 <= indice < len(LETRAS) or LETRAS[indice] not in MAPA_LETRAS:
+            raise sr.UnknownValueError()
+        return MAPA_LETRAS[LETRAS[indice]][0]
+
+
+def gerar_sessao_sintetica(diretorio: str, palavra: str, taxa_amostragem: int = 16000, bloco: int = 320):
+    """
+    Grava uma sessão de teste com a soletração sintética da palavra (ver
+    simulador_nao.sintetizar_soletracao) no microfone do PC (mono) e nos quatro
+    do NAO, mais ruído.
+    """
+    rng = np.random.default_rng(0)
+    fala, nao, rotulos = sintetizar_soletracao(palavra, taxa_amostragem)
+    total = fala.size
+    fluxos = {
+        "pc": (fala[None, :] + rng.normal(0, 100, (1, total))).astype(np.int16),
+        "nao": (nao + rng.normal(0, 100, nao.shape)).astype(np.int16),
+    }
+
+    # Os blocos chegam no fim de cada trecho; o NAO entrega blocos maiores que o PC
+    gravador = GravadorAudio(diretorio, taxa_amostragem, tamanho_fila=0)
+    inicio_relogio = 1000.0
+    for fonte, tamanho_bloco in (("pc", bloco), ("nao", 1365)):
+        for i in range(0, total, tamanho_bloco):
+            trecho = fluxos[fonte][:, i:i + tamanho_bloco]
+            gravador.gravar(fonte, trecho, inicio_relogio + i / taxa_amostragem,
+                            chegada=inicio_relogio + (i + trecho.shape[1]) / taxa_amostragem)
+    gravador.fechar()
+    salvar_rotulos(diretorio, rotulos)
+
+
+def _alinhar(entregues: list[str], esperadas: list[str]) -> tuple[int, list[tuple[int, int]]]:
+    """Distância de edição entre as letras e os pares (entregue, esperada) que coincidem."""
+    n, m = len(entregues), len(esperadas)
+    custo = np.zeros((n + 1, m + 1), dtype=int)
+    custo[:, 0] = np.arange(n + 1)
+    custo[0, :] = np.arange(m + 1)
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            custo[i, j] = min(custo[i - 1, j] + 1, custo[i, j - 1] + 1,
+                              custo[i - 1, j - 1] + (entregues[i - 1] != esperadas[j - 1]))
+    pares, i, j = [], n, m
+    while i and j:
+        if entregues[i - 1] == esperadas[j - 1] and custo[i, j] == custo[i - 1, j - 1]:
+            pares.append((i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif custo[i, j] == custo[i - 1, j] + 1:
+            i -= 1
+        elif custo[i, j] == custo[i, j - 1] + 1:
+            j -= 1
+        else:
+            i, j = i - 1, j - 1
+    return int(custo[n, m]), pares[::-1]
+
+
+def executar_replay(diretorio: str, pipeline: str = "pc", velocidade: float = VELOCIDADE_PADRAO,
+                    motor: MotorReconhecimento | None = None) -> dict:
+    """Roda uma sessão gravada por um pipeline e retorna as métricas do reconhecimento."""
+    fluxos = carregar_gravacao(diretorio)
+    rotulos = carregar_rotulos(diretorio)
+    motor = motor or MotorTons()
+    fonte_principal = "nao" if pipeline == "nao" else "pc"
+    if fonte_principal not in fluxos or (pipeline == "hibrido" and "nao" not in fluxos):
+        raise ValueError(f"A gravação em {diretorio} não tem os streams do pipeline '{pipeline}'.")
+
+    relogio = RelogioReplay(min(fluxo.blocos[0][2] for fluxo in fluxos.values()), velocidade)
+    alimentadores = {fonte: AlimentadorReplay(fluxo, relogio) for fonte, fluxo in fluxos.items()}
+    letras: list[tuple[str, float]] = []
+    finalizado = threading.Event()
+
+    def callback_letra(letra, confianca=100):
+        letras.append((letra.upper(), time.perf_counter()))
+
+    inicio = time.perf_counter()
+    if pipeline == "pc":
+        reconhecimento = ReconhecimentoVozPC(motor=motor, streaming=True, fabrica_stream=fabrica_stream_replay(alimentadores["pc"]))
+        thread = threading.Thread(target=reconhecimento.ouvir_soletracao, args=(callback_letra, finalizado.set), daemon=True)
+        thread.start()
+        parar = reconhecimento.parar_de_ouvir
+    else:
+        # O NAO simulado, sem latência, com a gravação no lugar do áudio sintético
+        sessao = SessaoSimulada(SimuladorNAO(latencia_s=0.0, palavra=""), lambda: alimentadores["nao"])
+        reconhecimento_nao = ReconhecimentoVozNAO(sessao, callback_letra, finalizado.set, motor=motor)
+        sessao.registerService(NOME_MODULO_AUDIO, reconhecimento_nao)
+        if pipeline == "nao":
+            reconhecimento_nao.iniciar_escuta()
+            parar = reconhecimento_nao.parar_escuta
+        else:
+            processador = ProcessadorAudioMultiCanal(reconhecimento_nao, callback_letra, finalizado.set, motor=motor,
+                                                     fabrica_stream=fabrica_stream_replay(alimentadores["pc"]))
+            processador.iniciar()
+            parar = processador.parar
+
+    principal = alimentadores[fonte_principal]
+    while not principal.terminado.wait(0.05):
+        pass
+    # Margem para o VAD fechar o último segmento antes de parar a captura
+    time.sleep(0.5 / velocidade + 0.1)
+    parar()
+    finalizado.wait(timeout=10)
+    duracao = time.perf_counter() - inicio
+
+    fluxo = fluxos[fonte_principal]
+    esperadas = [letra for _, _, letra in rotulos]
+    distancia, pares = _alinhar([letra for letra, _ in letras], esperadas)
+    latencias = []
+    for i, j in pares:
+        fim_fala = principal.instante_entrega(int(rotulos[j][1] * fluxo.taxa_amostragem))
+        if fim_fala is not None:
+            latencias.append((letras[i][1] - fim_fala) * 1000)
+
+    metricas = {
+        "pipeline": pipeline,
+        "letras": len(letras),
+        "duracao_s": duracao,
+        "audio_s": fluxo.amostras.shape[1] / fluxo.taxa_amostragem,
+        "letras_por_s": len(letras) / duracao,
+        "distancia_edicao": distancia,
+        "acuracia": 1 - distancia / len(esperadas) if esperadas else None,
+        "reconhecidas": "".join(letra for letra, _ in letras),
+        "esperadas": "".join(esperadas),
+    }
+    if latencias:
+        metricas.update({f"latencia_p{p}_ms": float(np.percentile(latencias, p)) for p in (50, 90, 99)})
+    if pipeline == "hibrido":
+        metricas["contadores"] = processador.obter_contadores()
+    return metricas
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay de uma sessão de áudio gravada pelos pipelines de reconhecimento.")
+    parser.add_argument("diretorio")
+    parser.add_argument("--pipeline", choices=PIPELINES + ("todos",), default="todos")
+    parser.add_argument("--velocidade", type=float, default=VELOCIDADE_PADRAO, help="vezes o tempo real")
+    parser.add_argument("--motor", default="tons", help="'tons' (sessões sintéticas), 'google' ou 'vosk'")
+    parser.add_argument("--latencia-motor", type=float, default=0.0, help="latência simulada do motor 'tons', em s")
+    parser.add_argument("--sintetico", metavar="PALAVRA", help="gera uma sessão sintética no diretório antes do replay")
+    args = parser.parse_args()
+
+    if args.sintetico:
+        gerar_sessao_sintetica(args.diretorio, args.sintetico)
+    motor = MotorTons(args.latencia_motor) if args.motor == "tons" else obter_motor(args.motor)
+
+    resultados = []
+    for pipeline in (PIPELINES if args.pipeline == "todos" else (args.pipeline,)):
+        resultados.append(executar_replay(args.diretorio, pipeline, args.velocidade, motor))
+
+    print()
+    for r in resultados:
+        print(f"[{r['pipeline']}] {r['letras']} letras em {r['duracao_s']:.2f} s "
+              f"({r['letras_por_s']:.1f} letras/s, {r['audio_s'] / r['duracao_s']:.1f}x tempo real)")
+        if "latencia_p50_ms" in r:
+            print(f"    latência fim da fala -> letra: p50 {r['latencia_p50_ms']:.0f} ms  "
+                  f"p90 {r['latencia_p90_ms']:.0f} ms  p99 {r['latencia_p99_ms']:.0f} ms")
+        if r["acuracia"] is not None:
+            print(f"    acurácia: {r['acuracia']:.1%} (esperado '{r['esperadas']}', reconhecido '{r['reconhecidas']}', "
+                  f"distância {r['distancia_edicao']})")
+        if "contadores" in r:
+            print(f"    buffers de jitter: {r['contadores']}")
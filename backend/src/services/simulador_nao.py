@@ -0,0 +1,517 @@
+"""
+NAO simulado em processo, no lugar da qi.Session, para testar e medir os
+caminhos do robô (ComandosNAO, ReconhecimentoVozNAO, modo híbrido) sem o robô.
+
+Cada chamada a um serviço espera `latencia_s` (a ida e volta da rede) e as
+chamadas que bloqueiam no robô de verdade (say, fadeRGB, wakeUp) também
+esperam a duração da ação. O ALAudioDevice entrega blocos sintéticos de 4
+canais ao processRemote do módulo registrado, em tempo real (ou os de outra
+fonte, como a gravação do replay). `derrubar_rede` simula a queda do Wi-Fi,
+para testar o heartbeat e a reconexão.
+
+Uso: conectar ao IP "simulado" (IP_NAO_SIMULADO), pela API ou pelo ConexaoNAO.
+Benchmark de latência da API (a partir de backend/src):
+    python -m services.simulador_nao --latencias 0 0.05 0.2 --sessoes 8
+"""
+import time
+import threading
+from functools import lru_cache, partial
+import numpy as np
+
+from config.settings import LATENCIA_NAO_SIMULADO_S, PALAVRA_NAO_SIMULADO
+from services.beamforming import Beamformer
+
+# Fala sintética: cada letra é um tom de FREQUENCIA_BASE + i * PASSO_FREQUENCIA Hz
+LETRAS = "abcdefghijklmnopqrstuvwxyz"
+FREQUENCIA_BASE = 300.0
+PASSO_FREQUENCIA = 60.0
+
+TAXA_AUDIO_NAO = 16000
+AMOSTRAS_POR_BLOCO_NAO = 1365
+SEGUNDOS_POR_CARACTERE = 0.06
+# Tempo de síntese antes de o robô começar a falar (say e sayToFile); arquivos já renderizados tocam direto
+ATRASO_SINTESE_S = 0.3
+DURACAO_ACORDAR_S = 1.0
+
+
+def sintetizar_soletracao(palavra: str, taxa_amostragem: int = TAXA_AUDIO_NAO) -> tuple[np.ndarray, np.ndarray, list]:
+    """
+    Sintetiza a soletração de uma palavra: cada letra vira um tom de 300 ms, com
+    600 ms de silêncio entre letras. Retorna a fala mono, os quatro canais do NAO
+    (com os atrasos geométricos de uma fala vinda da frente) e os rótulos
+    (inicio_s, fim_s, letra), sem ruído.
+    """
+    duracao_letra, pausa = int(0.3 * taxa_amostragem), int(0.6 * taxa_amostragem)
+    total = pausa + len(palavra) * (duracao_letra + pausa) + taxa_amostragem
+    fala = np.zeros(total)
+    rotulos = []
+    for i, letra in enumerate(palavra.lower()):
+        inicio = pausa + i * (duracao_letra + pausa)
+        t = np.arange(duracao_letra) / taxa_amostragem
+        frequencia = FREQUENCIA_BASE + LETRAS.index(letra) * PASSO_FREQUENCIA
+        fala[inicio:inicio + duracao_letra] = 4000 * np.sin(2 * np.pi * frequencia * t) * np.hanning(duracao_letra)
+        rotulos.append((inicio / taxa_amostragem, (inicio + duracao_letra) / taxa_amostragem, letra.upper()))
+
+    atrasos = Beamformer(taxa_amostragem).atrasos
+    frequencias = np.fft.rfftfreq(total)
+    espectro_fala = np.fft.rfft(fala)
+    nao = np.stack([
+        np.fft.irfft(espectro_fala * np.exp(-2j * np.pi * frequencias * (atrasos.max() - atraso)), n=total)
+        for atraso in atrasos
+    ]) * 0.5
+    return fala, nao, rotulos
+
+
+class SimuladorNAO:
+    """
+    Estado compartilhado pelos serviços simulados: a latência das chamadas, o
+    estado da rede e o registro de quanto tempo cada chamada levou (ver
+    `estatisticas`). Pode ser compartilhado por várias sessões, como um robô.
+    """
+    def __init__(self, latencia_s: float = LATENCIA_NAO_SIMULADO_S, palavra: str = PALAVRA_NAO_SIMULADO,
+                 deslocamento_relogio_s: float = 0.0):
+        self.latencia_s = latencia_s
+        self.palavra = palavra
+        # O relógio do robô não é o do PC; o híbrido tem que estimar a diferença
+        self.deslocamento_relogio_s = deslocamento_relogio_s
+        self.rede_ativa = True
+        # O disco do robô (caminho -> duração em s), o ALMemory e quando cada áudio começou a tocar
+        self.arquivos: dict[str, float] = {}
+        self.memoria: dict[str, object] = {}
+        self.inicios_audio: list[tuple[float, str]] = []
+        self._chamadas: dict[str, list[float]] = {}
+        self._trava = threading.Lock()
+
+    def chamar(self, metodo: str, duracao_s: float = 0.0, interrupcao: threading.Event | None = None,
+               audio: str | None = None, atraso_audio_s: float = 0.0):
+        """
+        Simula uma chamada remota: a latência da rede mais a duração da ação no
+        robô. Com `audio`, registra quando o som começa (após `atraso_audio_s`).
+        """
+        inicio = time.perf_counter()
+        time.sleep(self.latencia_s)
+        if not self.rede_ativa:
+            raise RuntimeError(f"{metodo}: Network is unreachable")
+        esperar = interrupcao.wait if interrupcao is not None else time.sleep
+        if atraso_audio_s > 0:
+            esperar(atraso_audio_s)
+        if audio is not None:
+            self.registrar_inicio_audio(audio)
+        if duracao_s > 0:
+            esperar(duracao_s)
+        decorrido = time.perf_counter() - inicio
+        with self._trava:
+            self._chamadas.setdefault(metodo, []).append(decorrido)
+
+    def registrar_inicio_audio(self, descricao: str):
+        with self._trava:
+            self.inicios_audio.append((time.perf_counter(), descricao))
+
+    def derrubar_rede(self):
+        """Simula a queda do link: as chamadas falham e o áudio para, mas as sessões não percebem."""
+        self.rede_ativa = False
+
+    def restaurar_rede(self):
+        self.rede_ativa = True
+
+    def relogio(self) -> float:
+        """Tempo do robô, em segundos (é o que vai no timestamp do ALAudioDevice)."""
+        return time.monotonic() + self.deslocamento_relogio_s
+
+    def estatisticas(self) -> dict[str, dict]:
+        """Por método ("Servico.metodo"): número de chamadas, tempo total e máximo em s."""
+        with self._trava:
+            return {
+                metodo: {"chamadas": len(tempos), "total_s": sum(tempos), "max_s": max(tempos)}
+                for metodo, tempos in self._chamadas.items()
+            }
+
+
+class TextToSpeechSimulado:
+    """ALTextToSpeech: `say` bloqueia pelo tempo da fala, uma fala por vez, até um `stopAll`."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self.idioma = "English"
+        self.falas: list[str] = []
+        self._falando = threading.Lock()
+        self._interrupcao = threading.Event()
+
+    def setLanguage(self, idioma: str):
+        self.simulador.chamar("ALTextToSpeech.setLanguage")
+        self.idioma = idioma
+
+    def say(self, texto: str):
+        with self._falando:
+            self._interrupcao.clear()
+            self.falas.append(texto)
+            self.simulador.chamar("ALTextToSpeech.say", len(texto) * SEGUNDOS_POR_CARACTERE, self._interrupcao,
+                                  audio=texto, atraso_audio_s=ATRASO_SINTESE_S)
+
+    def sayToFile(self, texto: str, caminho: str):
+        """Sintetiza para um arquivo no disco do robô, sem tocar."""
+        self.simulador.chamar("ALTextToSpeech.sayToFile", ATRASO_SINTESE_S)
+        self.simulador.arquivos[caminho] = len(texto) * SEGUNDOS_POR_CARACTERE
+
+    def stopAll(self):
+        self._interrupcao.set()
+        self.simulador.chamar("ALTextToSpeech.stopAll")
+
+
+class AudioPlayerSimulado:
+    """ALAudioPlayer: `playFile` toca um arquivo do disco do robô, bloqueando até o fim ou um `stopAll`."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self._interrupcao = threading.Event()
+
+    def playFile(self, caminho: str):
+        self._interrupcao.clear()
+        if caminho not in self.simulador.arquivos:
+            self.simulador.chamar("ALAudioPlayer.playFile")
+            raise RuntimeError(f"ALAudioPlayer::playFile: arquivo '{caminho}' não existe")
+        self.simulador.chamar("ALAudioPlayer.playFile", self.simulador.arquivos[caminho], self._interrupcao, audio=caminho)
+
+    def stopAll(self):
+        self._interrupcao.set()
+        self.simulador.chamar("ALAudioPlayer.stopAll")
+
+
+class LedsSimulados:
+    """ALLeds: `fadeRGB` bloqueia pela duração da transição."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self.cores: dict[str, object] = {}
+
+    def fadeRGB(self, grupo: str, cor, duracao: float):
+        self.simulador.chamar("ALLeds.fadeRGB", duracao)
+        self.cores[grupo] = cor
+
+
+class MotionSimulado:
+    """ALMotion: `wakeUp` bloqueia (se o robô estiver em repouso); `setAngles` não."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self.acordado = False
+        self.rigidez: dict[str, float] = {}
+        self.angulos: dict[str, float] = {}
+
+    def wakeUp(self):
+        self.simulador.chamar("ALMotion.wakeUp", 0.0 if self.acordado else DURACAO_ACORDAR_S)
+        self.acordado = True
+
+    def rest(self):
+        self.simulador.chamar("ALMotion.rest", DURACAO_ACORDAR_S if self.acordado else 0.0)
+        self.acordado = False
+
+    def setStiffnesses(self, nomes, rigidez: float):
+        self.simulador.chamar("ALMotion.setStiffnesses")
+        for nome in [nomes] if isinstance(nomes, str) else nomes:
+            self.rigidez[nome] = rigidez
+
+    def setAngles(self, nomes, angulos, fracao_velocidade: float):
+        self.simulador.chamar("ALMotion.setAngles")
+        if isinstance(nomes, str):
+            nomes, angulos = [nomes], [angulos]
+        self.angulos.update(zip(nomes, angulos))
+
+
+class FuturoSimulado:
+    """qi.Future de uma chamada com `_async=True`: `value(timeout_ms)` falha se não responder a tempo."""
+    def __init__(self, funcao: callable):
+        self._resultado = None
+        self._erro = None
+        self._pronto = threading.Event()
+        threading.Thread(target=self._executar, args=(funcao,), daemon=True).start()
+
+    def _executar(self, funcao: callable):
+        try:
+            self._resultado = funcao()
+        except Exception as e:
+            self._erro = e
+        self._pronto.set()
+
+    def value(self, timeout_ms: int | None = None):
+        if not self._pronto.wait(None if timeout_ms is None else timeout_ms / 1000):
+            raise RuntimeError("Future timeout")
+        if self._erro:
+            raise self._erro
+        return self._resultado
+
+
+class MemoriaSimulada:
+    """ALMemory: um dicionário do robô; `getData` de uma chave inexistente falha como no qi."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self.dados = simulador.memoria
+
+    def getData(self, chave: str):
+        self.simulador.chamar("ALMemory.getData")
+        if chave not in self.dados:
+            raise RuntimeError(f"ALMemory::getData: chave '{chave}' não encontrada")
+        return self.dados[chave]
+
+    def insertData(self, chave: str, valor):
+        self.simulador.chamar("ALMemory.insertData")
+        self.dados[chave] = valor
+
+    def ping(self, _async: bool = False):
+        if _async:
+            return FuturoSimulado(self.ping)
+        self.simulador.chamar("ALMemory.ping")
+        return True
+
+
+class SpeechRecognitionSimulado:
+    """ALSpeechRecognition: só guarda a configuração (o reconhecimento é feito no PC)."""
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self.idioma = "English"
+        self.parametros: dict[str, float] = {}
+        self.vocabulario: list[str] = []
+
+    def setLanguage(self, idioma: str):
+        self.simulador.chamar("ALSpeechRecognition.setLanguage")
+        self.idioma = idioma
+
+    def setParameter(self, nome: str, valor: float):
+        self.simulador.chamar("ALSpeechRecognition.setParameter")
+        self.parametros[nome] = valor
+
+    def setVocabulary(self, vocabulario: list[str], usar_word_spotting: bool):
+        self.simulador.chamar("ALSpeechRecognition.setVocabulary")
+        self.vocabulario = list(vocabulario)
+
+
+@lru_cache(maxsize=4)
+def _audio_sintetico(palavra: str) -> np.ndarray:
+    """
+    A soletração sintética da palavra (ou só silêncio) com ruído, como amostras
+    (n, 4) int16 intercaladas: gerada uma vez e fatiada sem cópias por bloco.
+    """
+    rng = np.random.default_rng(0)
+    if palavra:
+        _, nao, _ = sintetizar_soletracao(palavra, TAXA_AUDIO_NAO)
+    else:
+        nao = np.zeros((4, 2 * TAXA_AUDIO_NAO))
+    # Múltiplo do bloco, para o laço não partir um bloco no meio
+    total = -(-nao.shape[1] // AMOSTRAS_POR_BLOCO_NAO) * AMOSTRAS_POR_BLOCO_NAO
+    canais = np.zeros((4, total))
+    canais[:, :nao.shape[1]] = nao
+    canais += rng.normal(0, 100, canais.shape)
+    audio = np.ascontiguousarray(canais.astype(np.int16).T)
+    audio.flags.writeable = False
+    return audio
+
+
+class FonteAudioSintetica:
+    """
+    Fonte de áudio padrão do ALAudioDevice simulado: a soletração sintética de
+    `simulador.palavra`, repetida, em tempo real. Uma fonte de áudio tem
+    `iniciar(entregar)`, que passa a chamar `entregar(bloco (canais, n), timestamp)`
+    numa thread própria, e `parar()` (ex. replay.AlimentadorReplay).
+    """
+    def __init__(self, simulador: SimuladorNAO):
+        self.simulador = simulador
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self, entregar: callable):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._alimentar, args=(entregar,), name="AudioSimulado", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
+
+    def _alimentar(self, entregar: callable):
+        audio = _audio_sintetico(self.simulador.palavra)
+        duracao_bloco = AMOSTRAS_POR_BLOCO_NAO / TAXA_AUDIO_NAO
+        posicao, proximo = 0, time.perf_counter() + duracao_bloco
+        while not self._parar.is_set():
+            atraso = proximo - time.perf_counter()
+            if atraso > 0 and self._parar.wait(atraso):
+                break
+            # O timestamp é o da primeira amostra do bloco, como no robô
+            entregar(audio[posicao:posicao + AMOSTRAS_POR_BLOCO_NAO].T, self.simulador.relogio() - duracao_bloco)
+            posicao = (posicao + AMOSTRAS_POR_BLOCO_NAO) % len(audio)
+            proximo += duracao_bloco
+
+
+class AudioDeviceSimulado:
+    """
+    ALAudioDevice: ao `subscribe`, uma fonte de áudio (por padrão a
+    FonteAudioSintetica) passa a entregar ao processRemote do módulo registrado
+    blocos de canais intercalados (int16). Com a rede caída, os blocos se perdem.
+    """
+    def __init__(self, simulador: SimuladorNAO, sessao: "SessaoSimulada", fabrica_fonte_audio: callable = None):
+        self.simulador = simulador
+        self.sessao = sessao
+        self.fabrica_fonte_audio = fabrica_fonte_audio or (lambda: FonteAudioSintetica(simulador))
+        self.preferencias: dict[str, tuple] = {}
+        self._fontes: dict[str, object] = {}
+
+    def setClientPreferences(self, nome: str, taxa: int, canais: int, deinterleaved: int):
+        self.simulador.chamar("ALAudioDevice.setClientPreferences")
+        self.preferencias[nome] = (taxa, canais, deinterleaved)
+
+    def subscribe(self, nome: str):
+        self.simulador.chamar("ALAudioDevice.subscribe")
+        if nome in self._fontes:
+            return
+        modulo = self.sessao.servicos_registrados.get(nome)
+        if modulo is None:
+            raise RuntimeError(f"ALAudioDevice::subscribe: módulo '{nome}' não registrado")
+        fonte = self._fontes[nome] = self.fabrica_fonte_audio()
+        fonte.iniciar(partial(self._entregar, modulo))
+
+    def unsubscribe(self, nome: str):
+        self.simulador.chamar("ALAudioDevice.unsubscribe")
+        fonte = self._fontes.pop(nome, None)
+        if fonte:
+            fonte.parar()
+
+    def encerrar(self):
+        for nome in list(self._fontes):
+            self._fontes.pop(nome).parar()
+
+    def _entregar(self, modulo, bloco: np.ndarray, timestamp: float):
+        if not self.simulador.rede_ativa:
+            return
+        try:
+            # Busca o processRemote a cada bloco: o híbrido o substitui pelo seu callback
+            modulo.processRemote(bloco.shape[0], bloco.shape[1], [int(timestamp), int(timestamp % 1 * 1e6)],
+                                 bloco.T.tobytes())
+        except Exception as e:
+            print(f"Erro no processRemote do módulo simulado: {e}")
+
+
+class SessaoSimulada:
+    """
+    qi.Session: `service` devolve os serviços simulados e `registerService`
+    guarda os módulos do PC. Como no qi, a sessão não percebe sozinha a queda da
+    rede: `isConnected` só fica falso depois de `close`. `fabrica_fonte_audio`
+    troca o áudio do ALAudioDevice (ver FonteAudioSintetica).
+    """
+    def __init__(self, simulador: SimuladorNAO, fabrica_fonte_audio: callable = None):
+        self.simulador = simulador
+        self.conectada = False
+        self.servicos_registrados: dict[str, object] = {}
+        self._ids: dict[int, str] = {}
+        self._proximo_id = 1
+        self.servicos = {
+            "ALTextToSpeech": TextToSpeechSimulado(simulador),
+            "ALAudioPlayer": AudioPlayerSimulado(simulador),
+            "ALLeds": LedsSimulados(simulador),
+            "ALMotion": MotionSimulado(simulador),
+            "ALMemory": MemoriaSimulada(simulador),
+            "ALSpeechRecognition": SpeechRecognitionSimulado(simulador),
+            "ALAudioDevice": AudioDeviceSimulado(simulador, self, fabrica_fonte_audio),
+        }
+
+    def connect(self, url: str):
+        self.simulador.chamar("session.connect")
+        self.conectada = True
+
+    def isConnected(self) -> bool:
+        return self.conectada
+
+    def close(self):
+        self.servicos["ALAudioDevice"].encerrar()
+        self.conectada = False
+
+    def service(self, nome: str):
+        self.simulador.chamar("session.service")
+        if nome not in self.servicos:
+            raise RuntimeError(f"Cannot find service '{nome}' in index")
+        return self.servicos[nome]
+
+    def registerService(self, nome: str, objeto) -> int:
+        self.simulador.chamar("session.registerService")
+        if nome in self.servicos_registrados:
+            raise RuntimeError(f"Service '{nome}' already registered")
+        self.servicos_registrados[nome] = objeto
+        identificador = self._proximo_id
+        self._proximo_id += 1
+        self._ids[identificador] = nome
+        return identificador
+
+    def unregisterService(self, identificador: int):
+        self.simulador.chamar("session.unregisterService")
+        self.servicos_registrados.pop(self._ids.pop(identificador, None), None)
+
+
+if __name__ == "__main__":
+    # Mede a latência dos endpoints da API com o NAO simulado, para várias latências
+    # de rede e várias sessões concorrentes. O /game/state não fala com o robô: se
+    # ele piorar com a latência, alguma chamada bloqueante está no event loop.
+    import argparse
+    import asyncio
+    import os
+    import tempfile
+    import httpx
+    import api
+    from game.historico import HistoricoTentativas
+
+    parser = argparse.ArgumentParser(description="Latência da API com o NAO simulado.")
+    parser.add_argument("--latencias", type=float, nargs="+", default=[0.0, 0.05, 0.2], help="latência por chamada, em s")
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--rodadas", type=int, default=3)
+    args = parser.parse_args()
+    NIVEL_CARGA = "1_ano"
+    # As partidas de carga não entram no histórico de tentativas de verdade
+    api.sessoes.historico = HistoricoTentativas(os.path.join(tempfile.mkdtemp(), "historico.db"))
+
+    async def jogar(cliente: httpx.AsyncClient, i: int, tempos: dict[str, list[float]]):
+        sessao = f"carga-{i}"
+
+        async def medir(metodo: str, rota: str, **params):
+            inicio = time.perf_counter()
+            resposta = await cliente.request(metodo, rota, params={"sessao": sessao, **params})
+            tempos.setdefault(rota, []).append((time.perf_counter() - inicio) * 1000)
+            return resposta.json()
+
+        resposta = await medir("POST", "/nao/connect", ip=f"10.0.0.{i + 1}")
+        if resposta.get("status") != "conectado":
+            raise RuntimeError(f"Falha ao conectar ao NAO simulado: {resposta}")
+        await medir("POST", "/game/audio-output", output="nao")
+        await medir("POST", "/game/level", level=NIVEL_CARGA)
+        resposta = await medir("POST", "/game/start")
+        if "palavra" not in resposta:
+            raise RuntimeError(f"O jogo não começou com uma palavra: {resposta}")
+        for rodada in range(args.rodadas):
+            await medir("GET", "/game/state")
+            # Cada verificação faz o robô falar (acerto ou erro) e a próxima rodada, a palavra
+            resposta = await medir("POST", "/game/check")
+            if "resultado" not in resposta:
+                raise RuntimeError(f"A verificação da rodada {rodada + 1} falhou: {resposta}")
+            resposta = await medir("POST", "/game/next-round")
+            if "palavra" not in resposta:
+                raise RuntimeError(f"A rodada {rodada + 2} não começou: {resposta}")
+        await medir("POST", "/nao/disconnect")
+
+    async def medir_latencia(latencia: float) -> tuple[dict[str, list[float]], list[SimuladorNAO]]:
+        tempos: dict[str, list[float]] = {}
+        simuladores: list[SimuladorNAO] = []
+
+        def criar_sessao() -> SessaoSimulada:
+            # Um robô simulado por sessão, cada um num IP
+            simuladores.append(SimuladorNAO(latencia_s=latencia, palavra=""))
+            return SessaoSimulada(simuladores[-1])
+
+        api.sessoes.pool_nao.fabrica_sessao = criar_sessao
+        transporte = httpx.ASGITransport(app=api.app)
+        async with api.app.router.lifespan_context(api.app):
+            async with httpx.AsyncClient(transport=transporte, base_url="http://simulado") as cliente:
+                await asyncio.gather(*(jogar(cliente, i, tempos) for i in range(args.sessoes)))
+        return tempos, simuladores
+
+    for latencia in args.latencias:
+        tempos, simuladores = asyncio.run(medir_latencia(latencia))
+        print(f"\nLatência do robô {latencia * 1000:.0f} ms, {args.sessoes} sessões:")
+        for rota, valores in tempos.items():
+            print(f"    {rota:20s} p50 {np.percentile(valores, 50):7.1f} ms   p99 {np.percentile(valores, 99):7.1f} ms")
+        # Confirma que as rotas medidas mandaram o robô falar (ao vivo ou do cache de falas)
+        falas = {metodo: sum(s.estatisticas().get(metodo, {}).get("chamadas", 0) for s in simuladores)
+                 for metodo in ("ALTextToSpeech.say", "ALAudioPlayer.playFile")}
+        print(f"    falas no robô: {falas}")
@@ -0,0 +1,132 @@
+"""Módulo de estimativa contínua do atraso entre os streams do PC e do NAO."""
+from collections import deque
+import numpy as np
+
+JANELA_S = 1.0
+INTERVALO_S = 0.5
+MAX_ATRASO_S = 0.5
+CONFIANCA_MINIMA = 8.0
+ESTIMATIVAS_MEDIANA = 3
+TOLERANCIA_AMOSTRAS = 2
+
+
+class BuffersGCC:
+    """Buffers pré-alocados para rodar `gcc_phat` repetidamente sobre janelas de até `tamanho` amostras."""
+    def __init__(self, tamanho: int, max_atraso: int):
+        self.n_fft = 1 << int(2 * tamanho - 1).bit_length()
+        self.max_atraso = min(max_atraso, self.n_fft // 2 - 1)
+        bins = self.n_fft // 2 + 1
+        # As janelas ficam no início, com zeros à direita (correlação linear, não circular)
+        self.sinal = np.zeros(self.n_fft)
+        self.referencia = np.zeros(self.n_fft)
+        self.espectro_sinal = np.zeros(bins, dtype=np.complex128)
+        self.espectro_referencia = np.zeros(bins, dtype=np.complex128)
+        self.magnitude = np.zeros(bins)
+        self.correlacao = np.zeros(self.n_fft)
+        self.faixa = np.zeros(2 * self.max_atraso + 1)
+
+
+def gcc_phat(sinal: np.ndarray, referencia: np.ndarray, max_atraso: int,
+             buffers: BuffersGCC | None = None) -> tuple[int, float]:
+    """
+    Correlação cruzada generalizada com transformada de fase (GCC-PHAT), via FFT.
+
+    Retorna (atraso, confiança): atraso > 0 significa que `sinal` está atrasado
+    em relação a `referencia`; a confiança é a razão entre o pico e a média
+    da correlação na faixa de busca. Com `buffers`, não aloca memória.
+    """
+    if buffers is None:
+        buffers = BuffersGCC(max(len(sinal), len(referencia)), max_atraso)
+    b = buffers
+    for destino, origem in ((b.sinal, sinal), (b.referencia, referencia)):
+        destino[:len(origem)] = origem
+        destino[len(origem):] = 0
+
+    np.fft.rfft(b.sinal, out=b.espectro_sinal)
+    np.fft.rfft(b.referencia, out=b.espectro_referencia)
+    np.conj(b.espectro_referencia, out=b.espectro_referencia)
+    b.espectro_sinal *= b.espectro_referencia
+    # A PHAT normaliza a magnitude: só a fase (o atraso) importa, o que deixa o pico estreito
+    np.abs(b.espectro_sinal, out=b.magnitude)
+    np.maximum(b.magnitude, 1e-12, out=b.magnitude)
+    # Divide por um array complexo (e não pelo real) para o NumPy não alocar buffer de conversão
+    b.espectro_referencia[:] = b.magnitude
+    b.espectro_sinal /= b.espectro_referencia
+    np.fft.irfft(b.espectro_sinal, b.n_fft, out=b.correlacao)
+
+    m = b.max_atraso
+    np.abs(b.correlacao[-m:], out=b.faixa[:m])
+    np.abs(b.correlacao[:m + 1], out=b.faixa[m:])
+    indice = int(b.faixa.argmax())
+    confianca = float(b.faixa[indice] / (b.faixa.mean() + 1e-12))
+    return indice - m, confianca
+
+
+class EstimadorAtraso:
+    """
+    Acompanha o atraso residual entre dois streams já alinhados por contagem de
+    amostras. A cada `intervalo_s`, roda GCC-PHAT sobre a última `janela_s` e,
+    quando a mediana das últimas estimativas confiáveis passa da tolerância,
+    retorna a correção a aplicar.
+    """
+    def __init__(self, taxa_amostragem: int = 16000, janela_s: float = JANELA_S,
+                 intervalo_s: float = INTERVALO_S, max_atraso_s: float = MAX_ATRASO_S,
+                 confianca_minima: float = CONFIANCA_MINIMA):
+        self.tamanho_janela = int(taxa_amostragem * janela_s)
+        self.intervalo = int(taxa_amostragem * intervalo_s)
+        self.max_atraso = int(taxa_amostragem * max_atraso_s)
+        self.confianca_minima = confianca_minima
+
+        self._janela_sinal = np.zeros(self.tamanho_janela)
+        self._janela_ref = np.zeros(self.tamanho_janela)
+        self._buffers_gcc = BuffersGCC(self.tamanho_janela, self.max_atraso)
+        self._preenchido = 0
+        self._desde_ultima = 0
+        self._estimativas: deque[int] = deque(maxlen=ESTIMATIVAS_MEDIANA)
+        self.atraso_total = 0
+
+    def reiniciar(self):
+        self._preenchido = 0
+        self._desde_ultima = 0
+        self._estimativas.clear()
+        self.atraso_total = 0
+
+    def adicionar(self, sinal: np.ndarray, referencia: np.ndarray) -> int:
+        """
+        Acrescenta amostras alinhadas dos dois streams. Retorna a correção em
+        amostras (> 0: descartar do `sinal`; < 0: descartar da `referencia`) ou 0.
+        """
+        n = min(len(sinal), len(referencia), self.tamanho_janela)
+        if n == 0:
+            return 0
+        sinal, referencia = sinal[-n:], referencia[-n:]
+        # Desloca a janela deslizante e acrescenta as amostras novas no fim
+        for janela, novos in ((self._janela_sinal, sinal), (self._janela_ref, referencia)):
+            janela[:-n] = janela[n:]
+            janela[-n:] = novos
+        self._preenchido = min(self._preenchido + n, self.tamanho_janela)
+        self._desde_ultima += n
+
+        if self._preenchido < self.tamanho_janela or self._desde_ultima < self.intervalo:
+            return 0
+        self._desde_ultima = 0
+
+        # Sem energia nos dois lados (silêncio) a correlação não diz nada
+        if not np.count_nonzero(self._janela_sinal) or not np.count_nonzero(self._janela_ref):
+            return 0
+        atraso, confianca = gcc_phat(self._janela_sinal, self._janela_ref, self.max_atraso, self._buffers_gcc)
+        if confianca < self.confianca_minima:
+            return 0
+
+        self._estimativas.append(atraso)
+        if len(self._estimativas) < self._estimativas.maxlen:
+            return 0
+        correcao = sorted(self._estimativas)[len(self._estimativas) // 2]
+        if abs(correcao) <= TOLERANCIA_AMOSTRAS:
+            return 0
+
+        # Os dados da janela são anteriores à correção: recomeça a medição
+        self._estimativas.clear()
+        self._preenchido = 0
+        self.atraso_total += correcao
+        return correcao
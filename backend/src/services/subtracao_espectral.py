@@ -0,0 +1,229 @@
+"""Módulo de subtração espectral em streaming (overlap-add) para cancelamento de ruído."""
+import numpy as np
+
+TAMANHO_QUADRO = 256
+SALTO = 128
+SUAVIZACAO_RUIDO = 0.95
+FATOR_SUBTRACAO = 1.0
+PISO_ESPECTRAL = 0.05
+# Quadros por fatia da média exponencial vetorizada (a^k ainda longe de zero)
+FATIA_PERFIL = 64
+
+
+class SubtratorEspectral:
+    """
+    Subtração espectral com estado entre chamadas.
+
+    Os blocos de entrada (sinal e referência de ruído, já alinhados e do mesmo
+    tamanho) são acumulados e processados em quadros com sobreposição de 50%
+    e janela raiz de Hann, cuja soma de análise x síntese é constante: assim a
+    reconstrução por overlap-add não tem emendas nas bordas dos blocos. O perfil
+    de ruído é uma média exponencial da magnitude da referência, quadro a quadro.
+
+    A saída tem `tamanho_quadro - salto` amostras de latência.
+    """
+    def __init__(self, tamanho_quadro: int = TAMANHO_QUADRO, salto: int = SALTO,
+                 suavizacao_ruido: float = SUAVIZACAO_RUIDO, fator_subtracao: float = FATOR_SUBTRACAO,
+                 piso_espectral: float = PISO_ESPECTRAL):
+        if tamanho_quadro % salto:
+            raise ValueError("tamanho_quadro deve ser múltiplo de salto.")
+        self.tamanho_quadro = tamanho_quadro
+        self.salto = salto
+        self.suavizacao_ruido = suavizacao_ruido
+        self.fator_subtracao = fator_subtracao
+        self.piso_espectral = piso_espectral
+
+        # Raiz da Hann periódica: análise x síntese = Hann, que soma 1 com 50% de sobreposição
+        self.janela = np.sqrt(np.hanning(tamanho_quadro + 1)[:-1])
+        self.perfil_ruido: np.ndarray | None = None
+        bins = tamanho_quadro // 2 + 1
+        # Pesos a^k já replicados por bin (quadros x bins): as operações do loop
+        # principal são todas entre arrays contíguos de mesmo formato, sem broadcast,
+        # para que o NumPy não precise alocar buffers temporários
+        self._pesos = np.repeat((suavizacao_ruido ** np.arange(1, FATIA_PERFIL + 1, dtype=np.float64))[:, None], bins, axis=1)
+
+        self._historico = tamanho_quadro - salto
+        self._entrada_sinal = np.zeros(0)
+        self._entrada_ruido = np.zeros(0)
+        self._n_entrada = 0
+        self._sobreposicao = np.zeros(self._historico)
+        self._saida = np.zeros(0)
+        self._reservar(4096)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Zera o histórico de amostras, a sobreposição pendente e o perfil de ruído."""
+        self._entrada_sinal[:self._historico] = 0
+        self._entrada_ruido[:self._historico] = 0
+        self._n_entrada = self._historico
+        self._sobreposicao[:] = 0
+        self.perfil_ruido = None
+
+    def _reservar(self, capacidade: int):
+        """Garante buffers de trabalho com pelo menos `capacidade` amostras (só cresce)."""
+        if capacidade <= self._entrada_sinal.size:
+            return
+        capacidade = max(capacidade, 2 * self._entrada_sinal.size)
+        for nome in ("_entrada_sinal", "_entrada_ruido"):
+            novo = np.zeros(capacidade)
+            antigo = getattr(self, nome)
+            novo[:antigo.size] = antigo
+            setattr(self, nome, novo)
+        self._saida = np.zeros(capacidade)
+        self._saida_int16 = np.zeros(capacidade, dtype=np.int16)
+
+        # Buffers por quadro, reaproveitados a cada bloco (views [:n_quadros])
+        max_quadros = capacidade // self.salto + 1
+        bins = self.tamanho_quadro // 2 + 1
+        self._janelas = np.repeat(self.janela[None, :], max_quadros, axis=0)
+        self._quadros = np.zeros((max_quadros, self.tamanho_quadro))
+        self._fatias = np.zeros((max_quadros, self.salto))
+        self._espectro = np.zeros((max_quadros, bins), dtype=np.complex128)
+        self._ganho = np.zeros((max_quadros, bins), dtype=np.complex128)
+        self._mag_sinal = np.zeros((max_quadros, bins))
+        self._mag_ruido = np.zeros((max_quadros, bins))
+        self._perfis = np.zeros((max_quadros, bins))
+
+    def _enquadrar(self, entrada: np.ndarray, n_quadros: int) -> np.ndarray:
+        """Copia os quadros (com sobreposição) de `entrada` já multiplicados pela janela."""
+        quadros = self._quadros[:n_quadros]
+        for parte in range(self.tamanho_quadro // self.salto):
+            inicio = parte * self.salto
+            quadros[:, inicio:inicio + self.salto] = entrada[inicio:inicio + n_quadros * self.salto].reshape(n_quadros, self.salto)
+        quadros *= self._janelas[:n_quadros]
+        return quadros
+
+    def processar(self, sinal: np.ndarray, ref_ruido: np.ndarray) -> np.ndarray:
+        """
+        Filtra um bloco e retorna as amostras int16 que já puderam ser reconstruídas.
+        A saída é uma view de um buffer interno, válida até a próxima chamada.
+        """
+        n = min(len(sinal), len(ref_ruido))
+        self._reservar(self._n_entrada + n + self.tamanho_quadro)
+        self._entrada_sinal[self._n_entrada:self._n_entrada + n] = sinal[:n]
+        self._entrada_ruido[self._n_entrada:self._n_entrada + n] = ref_ruido[:n]
+        self._n_entrada += n
+
+        n_quadros = (self._n_entrada - self.tamanho_quadro) // self.salto + 1
+        if n_quadros <= 0:
+            return self._saida_int16[:0]
+
+        espectro, ganho = self._espectro[:n_quadros], self._ganho[:n_quadros]
+        mag_sinal, mag_ruido = self._mag_sinal[:n_quadros], self._mag_ruido[:n_quadros]
+
+        np.fft.rfft(self._enquadrar(self._entrada_ruido, n_quadros), axis=1, out=espectro)
+        np.abs(espectro, out=mag_ruido)
+        perfis = self._atualizar_perfil(mag_ruido)
+
+        np.fft.rfft(self._enquadrar(self._entrada_sinal, n_quadros), axis=1, out=espectro)
+        np.abs(espectro, out=mag_sinal)
+
+        # Ganho por bin: evita recomputar fase (exp/angle) e mantém um piso contra "ruído musical".
+        # mag_ruido vira o piso e perfis vira a magnitude limpa (e depois o ganho).
+        mag_limpa = perfis
+        mag_limpa *= -self.fator_subtracao
+        mag_limpa += mag_sinal
+        np.multiply(mag_sinal, self.piso_espectral, out=mag_ruido)
+        np.maximum(mag_limpa, mag_ruido, out=mag_limpa)
+        np.maximum(mag_sinal, 1e-9, out=mag_sinal)
+        mag_limpa /= mag_sinal
+        ganho[:] = mag_limpa
+        espectro *= ganho
+        quadros = self._quadros[:n_quadros]
+        np.fft.irfft(espectro, n=self.tamanho_quadro, axis=1, out=quadros)
+        quadros *= self._janelas[:n_quadros]
+
+        # Overlap-add: cada quadro contribui com `tamanho_quadro / salto` fatias de `salto` amostras
+        n_saida = n_quadros * self.salto
+        saida = self._saida[:n_saida + self._historico]
+        saida[:] = 0
+        saida[:self._historico] += self._sobreposicao
+        fatias = self._fatias[:n_quadros]
+        for parte in range(self.tamanho_quadro // self.salto):
+            inicio = parte * self.salto
+            fatias[:] = quadros[:, inicio:inicio + self.salto]
+            saida[inicio:inicio + n_saida].reshape(n_quadros, self.salto)[:] += fatias
+        self._sobreposicao[:] = saida[n_saida:]
+
+        # Mantém só as amostras ainda necessárias para o próximo quadro
+        restantes = self._n_entrada - n_saida
+        self._entrada_sinal[:restantes] = self._entrada_sinal[n_saida:self._n_entrada]
+        self._entrada_ruido[:restantes] = self._entrada_ruido[n_saida:self._n_entrada]
+        self._n_entrada = restantes
+
+        saida = saida[:n_saida]
+        np.minimum(saida, 32767, out=saida)
+        np.maximum(saida, -32768, out=saida)
+        saida_int16 = self._saida_int16[:n_saida]
+        np.copyto(saida_int16, saida, casting='unsafe')
+        return saida_int16
+
+    def _atualizar_perfil(self, mag_ruido: np.ndarray) -> np.ndarray:
+        """
+        Atualiza o perfil de ruído com cada quadro da referência e retorna o
+        perfil vigente em cada quadro, com formato (n_quadros, bins).
+        Sobrescreve `mag_ruido`.
+        """
+        a = self.suavizacao_ruido
+        if self.perfil_ruido is None:
+            self.perfil_ruido = mag_ruido[0].copy()
+        perfis = self._perfis[:mag_ruido.shape[0]]
+        # Média exponencial vetorizada, em fatias para a^k não ir a zero:
+        # p_k = a^k (p_0 + (1-a) * sum_{i<k} x_i / a^(i+1))
+        for inicio in range(0, mag_ruido.shape[0], FATIA_PERFIL):
+            fatia = mag_ruido[inicio:inicio + FATIA_PERFIL]
+            pesos = self._pesos[:fatia.shape[0]]
+            destino = perfis[inicio:inicio + fatia.shape[0]]
+            fatia /= pesos
+            np.add.accumulate(fatia, axis=0, out=destino)
+            destino *= 1 - a
+            fatia[:] = self.perfil_ruido
+            destino += fatia
+            destino *= pesos
+            self.perfil_ruido[:] = destino[-1]
+        return perfis
+
+
+if __name__ == "__main__":
+    # Benchmark: quadros/s e tempo por segundo de áudio, streaming x STFT/ISTFT por bloco
+    import time
+    from scipy.signal import stft, istft
+
+    def subtracao_por_bloco(sinal_ruidoso, ref_ruido, taxa=16000):
+        """Implementação anterior (sem estado), usada como referência."""
+        _, _, Zxx_sinal = stft(sinal_ruidoso, fs=taxa, nperseg=256)
+        _, _, Zxx_ruido = stft(ref_ruido, fs=taxa, nperseg=256)
+        mag_ruido_medio = np.mean(np.abs(Zxx_ruido), axis=1, keepdims=True)
+        mag_limpa = np.maximum(np.abs(Zxx_sinal) - mag_ruido_medio, 0)
+        _, sinal_limpo = istft(mag_limpa * np.exp(1j * np.angle(Zxx_sinal)), fs=taxa)
+        return sinal_limpo.astype(np.int16)
+
+    taxa, segundos, tamanho_bloco = 16000, 30, 1024
+    rng = np.random.default_rng(0)
+    t = np.arange(taxa * segundos) / taxa
+    ruido = rng.normal(0, 800, t.size)
+    fala = 4000 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)
+    sinal = (fala + ruido).astype(np.int16)
+    ref = (ruido + rng.normal(0, 100, t.size)).astype(np.int16)
+    blocos = range(0, t.size - tamanho_bloco + 1, tamanho_bloco)
+
+    inicio = time.perf_counter()
+    for i in blocos:
+        subtracao_por_bloco(sinal[i:i + tamanho_bloco], ref[i:i + tamanho_bloco], taxa)
+    t_bloco = time.perf_counter() - inicio
+
+    subtrator = SubtratorEspectral()
+    inicio = time.perf_counter()
+    saida = [subtrator.processar(sinal[i:i + tamanho_bloco], ref[i:i + tamanho_bloco]) for i in blocos]
+    t_stream = time.perf_counter() - inicio
+
+    quadros = t.size / SALTO
+    print(f"STFT por bloco: {quadros / t_bloco:10.0f} quadros/s  {t_bloco / segundos * 1000:6.2f} ms por s de áudio")
+    print(f"Streaming OLA:  {quadros / t_stream:10.0f} quadros/s  {t_stream / segundos * 1000:6.2f} ms por s de áudio")
+
+    # Sem ruído, a reconstrução deve ser transparente (exceto pela latência)
+    subtrator = SubtratorEspectral(fator_subtracao=0.0)
+    limpo = np.concatenate([subtrator.processar(fala[i:i + tamanho_bloco], np.zeros(tamanho_bloco)).copy() for i in blocos])
+    latencia = TAMANHO_QUADRO - SALTO
+    erro = np.max(np.abs(limpo[latencia:] - fala[:limpo.size - latencia].astype(np.int16)))
+    print(f"Erro máximo de reconstrução (sem subtração): {erro} (int16)")
@@ -0,0 +1,159 @@
+"""Módulo de detecção de atividade de voz (VAD) por energia, para captura em streaming."""
+import numpy as np
+
+DURACAO_QUADRO_MS = 20
+# Letras são monossílabos curtos: uma pausa de ~250 ms já encerra o segmento
+HANGOVER_MS = 250
+PRE_FALA_MS = 150
+MIN_FALA_MS = 60
+MAX_SEGMENTO_MS = 3000
+CALIBRACAO_MS = 300
+FATOR_LIMIAR = 3.0
+ENERGIA_MINIMA = 150.0
+
+
+class DetectorVoz:
+    """
+    Recebe blocos de áudio int16 mono de qualquer tamanho e devolve os
+    segmentos de fala concluídos. O limiar acompanha o ruído de fundo,
+    estimado por média exponencial da energia dos quadros sem fala.
+
+    O pré-fala e o segmento em andamento ficam em buffers pré-alocados: só o
+    segmento concluído, devolvido como cópia, aloca memória.
+    """
+    def __init__(self, taxa_amostragem: int = 16000, hangover_ms: int = HANGOVER_MS,
+                 pre_fala_ms: int = PRE_FALA_MS, min_fala_ms: int = MIN_FALA_MS,
+                 max_segmento_ms: int = MAX_SEGMENTO_MS, calibracao_ms: int = CALIBRACAO_MS,
+                 fator_limiar: float = FATOR_LIMIAR, energia_minima: float = ENERGIA_MINIMA):
+        self.taxa_amostragem = taxa_amostragem
+        self.tamanho_quadro = taxa_amostragem * DURACAO_QUADRO_MS // 1000
+        quadros = lambda ms: max(1, ms // DURACAO_QUADRO_MS)
+        self.quadros_hangover = quadros(hangover_ms)
+        self.quadros_min_fala = quadros(min_fala_ms)
+        self.quadros_max_segmento = quadros(max_segmento_ms)
+        self.quadros_calibracao = quadros(calibracao_ms)
+        self.fator_limiar = fator_limiar
+        self.energia_minima = energia_minima
+
+        self.quadros_pre_fala = quadros(pre_fala_ms)
+        self._pre_fala = np.zeros((self.quadros_pre_fala, self.tamanho_quadro), dtype=np.int16)
+        self._segmento = np.zeros((max(self.quadros_max_segmento, self.quadros_pre_fala + 1), self.tamanho_quadro), dtype=np.int16)
+        self._resto = np.zeros(self.tamanho_quadro, dtype=np.int16)
+        self._energias = np.zeros(0, dtype=np.float32)
+        self._quadrados = np.zeros((0, self.tamanho_quadro), dtype=np.float32)
+        self.reiniciar()
+
+    def reiniciar(self):
+        """Descarta o áudio pendente e recalibra o ruído de fundo."""
+        self._n_resto = 0
+        self._n_pre_fala = 0
+        self._pos_pre_fala = 0
+        self._n_segmento = 0
+        self._quadros_fala = 0
+        self._quadros_silencio = 0
+        self._quadros_vistos = 0
+        self.ruido = 0.0
+
+    @property
+    def em_fala(self) -> bool:
+        return self._n_segmento > 0
+
+    @property
+    def limiar(self) -> float:
+        return max(self.energia_minima, self.ruido * self.fator_limiar)
+
+    def processar(self, amostras: np.ndarray) -> list[np.ndarray]:
+        """Consome um bloco de amostras e retorna os segmentos de fala que terminaram nele."""
+        amostras = np.asarray(amostras).reshape(-1)
+        segmentos = []
+        if self._n_resto:
+            # Completa o quadro que sobrou do bloco anterior
+            k = min(self.tamanho_quadro - self._n_resto, amostras.size)
+            self._resto[self._n_resto:self._n_resto + k] = amostras[:k]
+            self._n_resto += k
+            amostras = amostras[k:]
+            if self._n_resto < self.tamanho_quadro:
+                return segmentos
+            self._n_resto = 0
+            self._processar_quadros(self._resto.reshape(1, -1), segmentos)
+
+        n_quadros = amostras.size // self.tamanho_quadro
+        fim = n_quadros * self.tamanho_quadro
+        if n_quadros:
+            self._processar_quadros(amostras[:fim].reshape(n_quadros, self.tamanho_quadro), segmentos)
+        self._n_resto = amostras.size - fim
+        self._resto[:self._n_resto] = amostras[fim:]
+        return segmentos
+
+    def finalizar(self) -> list[np.ndarray]:
+        """Encerra a fala em andamento (fim da captura) e a retorna, se for longa o bastante."""
+        segmento = self._fechar_segmento()
+        return [segmento] if segmento is not None else []
+
+    def _processar_quadros(self, quadros: np.ndarray, segmentos: list):
+        n = quadros.shape[0]
+        if n > self._energias.size:
+            self._energias = np.zeros(n, dtype=np.float32)
+            self._quadrados = np.zeros((n, self.tamanho_quadro), dtype=np.float32)
+        # Energia RMS de todos os quadros do bloco de uma vez
+        quadrados, energias = self._quadrados[:n], self._energias[:n]
+        quadrados[:] = quadros
+        quadrados *= quadrados
+        np.mean(quadrados, axis=1, out=energias)
+        np.sqrt(energias, out=energias)
+
+        for i in range(n):
+            segmento = self._processar_quadro(quadros[i], float(energias[i]))
+            if segmento is not None:
+                segmentos.append(segmento)
+
+    def _guardar_pre_fala(self, quadro: np.ndarray):
+        self._pre_fala[self._pos_pre_fala] = quadro
+        self._pos_pre_fala = (self._pos_pre_fala + 1) % self.quadros_pre_fala
+        self._n_pre_fala = min(self._n_pre_fala + 1, self.quadros_pre_fala)
+
+    def _processar_quadro(self, quadro: np.ndarray, energia: float) -> np.ndarray | None:
+        self._quadros_vistos += 1
+        if self._quadros_vistos <= self.quadros_calibracao:
+            # Média simples durante a calibração inicial
+            self.ruido += (energia - self.ruido) / self._quadros_vistos
+            self._guardar_pre_fala(quadro)
+            return None
+
+        voz = energia > self.limiar
+        if not self._n_segmento:
+            if voz:
+                # O segmento começa com o pré-fala, do quadro mais antigo ao mais novo
+                for i in range(self._n_pre_fala):
+                    self._segmento[i] = self._pre_fala[(self._pos_pre_fala - self._n_pre_fala + i) % self.quadros_pre_fala]
+                self._segmento[self._n_pre_fala] = quadro
+                self._n_segmento = self._n_pre_fala + 1
+                self._n_pre_fala = 0
+                self._quadros_fala = 1
+                self._quadros_silencio = 0
+            else:
+                self._guardar_pre_fala(quadro)
+                self.ruido = 0.95 * self.ruido + 0.05 * energia
+            return None
+
+        self._segmento[self._n_segmento] = quadro
+        self._n_segmento += 1
+        if voz:
+            self._quadros_fala += 1
+            self._quadros_silencio = 0
+        else:
+            self._quadros_silencio += 1
+
+        if (self._quadros_silencio >= self.quadros_hangover or self._n_segmento >= self.quadros_max_segmento
+                or self._n_segmento == self._segmento.shape[0]):
+            return self._fechar_segmento()
+        return None
+
+    def _fechar_segmento(self) -> np.ndarray | None:
+        n, fala = self._n_segmento, self._quadros_fala
+        self._n_segmento = 0
+        self._quadros_fala = 0
+        self._quadros_silencio = 0
+        if fala < self.quadros_min_fala or not n:
+            return None
+        return self._segmento[:n].reshape(-1).copy()
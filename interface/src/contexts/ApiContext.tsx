@@ -4,6 +4,19 @@ import axios from "axios";
 const API_URL = import.meta.env.VITE_BACKEND_URL;
 const WS_URL = import.meta.env.VITE_BACKEND_URL.replace('http', 'ws');
 
+// Each browser tab plays its own game session on the backend
+const getSessionId = () => {
+  let id = sessionStorage.getItem("soletrando-sessao");
+  if (!id) {
+    // crypto.randomUUID only exists in secure contexts, which LAN http is not
+    id = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+    sessionStorage.setItem("soletrando-sessao", id);
+  }
+  return id;
+};
+
+export const SESSION_ID = getSessionId();
+
 interface GameState {
   palavra_atual: string;
   soletracao_usuario: string;
@@ -40,23 +53,45 @@ const ApiContext = createContext<ApiContextType | undefined>(undefined);
 export function ApiProvider({ children }: { children: ReactNode }) {
   const [gameState, setGameState] = useState<GameState | null>(null);
   const ws = useRef<WebSocket | null>(null);
+  const lastSeq = useRef<number>(-1);
+  const resyncRequested = useRef(false);
 
   useEffect(() => {
     const connect = () => {
-      ws.current = new WebSocket(`${WS_URL}/ws/game`);
+      ws.current = new WebSocket(`${WS_URL}/ws/game?sessao=${SESSION_ID}`);
 
       ws.current.onopen = () => {
         console.log("WebSocket connected");
-        fetchGameState();
       };
 
+      // The server sends a full snapshot on connect, then only the changed fields
       ws.current.onmessage = (event) => {
         const data = JSON.parse(event.data);
-        setGameState(data);
+        if (data.tipo === "snapshot") {
+          lastSeq.current = data.seq;
+          resyncRequested.current = false;
+          setGameState(data.estado);
+        } else if (data.tipo === "delta") {
+          if (data.seq <= lastSeq.current) {
+            return;
+          }
+          if (data.seq !== lastSeq.current + 1) {
+            // We missed an update: ask the server (once) for what we lost
+            if (!resyncRequested.current) {
+              resyncRequested.current = true;
+              ws.current?.send(JSON.stringify({ tipo: "resync", seq: lastSeq.current }));
+            }
+            return;
+          }
+          lastSeq.current = data.seq;
+          resyncRequested.current = false;
+          setGameState((prev) => (prev ? { ...prev, ...data.mudancas } : prev));
+        }
       };
 
       ws.current.onclose = () => {
         console.log("WebSocket disconnected, reconnecting...");
+        lastSeq.current = -1;
         setTimeout(connect, 1000); // Reconnect after 1 second
       };
 
@@ -73,18 +108,11 @@ export function ApiProvider({ children }: { children: ReactNode }) {
     };
   }, []);
 
-  const fetchGameState = async () => {
-    try {
-      const response = await axios.get(`${API_URL}/game/state`);
-      setGameState(response.data);
-    } catch (error) {
-      console.error('Erro ao buscar o estado do jogo:', error);
-    }
-  };
-
   const apiCall = async (endpoint: string, method: 'get' | 'post' = 'post', params: any = {}) => {
     try {
-      const response = await axios[method](`${API_URL}${endpoint}`, null, { params });
+      const response = await axios[method](`${API_URL}${endpoint}`, null, {
+        params: { ...params, sessao: SESSION_ID },
+      });
       // The game state will be updated via WebSocket, but we can fetch it here for immediate feedback if needed.
       // For now, we rely on the WebSocket broadcast.
       return response.data;
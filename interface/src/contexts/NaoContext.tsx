@@ -1,5 +1,6 @@
 import { createContext, useState, useContext, ReactNode } from "react";
 import axios from "axios";
+import { SESSION_ID } from "./ApiContext";
 
 const API_URL = import.meta.env.VITE_BACKEND_URL;
 
@@ -23,7 +24,7 @@ export function NaoProvider({ children }: { children: ReactNode }) {
     setIsConnecting(true);
     try {
       const response = await axios.post(`${API_URL}/nao/connect`, null, {
-        params: { ip: naoIp },
+        params: { ip: naoIp, sessao: SESSION_ID },
       });
       if (response.data.status === "conectado") {
         setIsConnected(true);
@@ -37,7 +38,9 @@ export function NaoProvider({ children }: { children: ReactNode }) {
 
   const disconnectFromNao = async () => {
     try {
-      await axios.post(`${API_URL}/nao/disconnect`);
+      await axios.post(`${API_URL}/nao/disconnect`, null, {
+        params: { sessao: SESSION_ID },
+      });
       setIsConnected(false);
     } catch (error) {
       console.error("Erro ao desconectar do NAO:", error);